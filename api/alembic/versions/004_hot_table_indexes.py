@@ -0,0 +1,53 @@
+"""Add indexes for hot lookup paths
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns) — every run, poll and list endpoint filters on these
+INDEXES = [
+    ('ix_executions_workflow_id_started_at', 'executions', ['workflow_id', sa.text('started_at DESC')]),
+    ('ix_execution_nodes_execution_id', 'execution_nodes', ['execution_id']),
+    ('ix_connections_user_id_type', 'connections', ['user_id', 'type']),
+    ('ix_workflows_user_id_is_active', 'workflows', ['user_id', 'is_active']),
+    ('ix_approvals_execution_id', 'approvals', ['execution_id']),
+    ('ix_knowledge_entries_user_id_priority', 'knowledge_entries', ['user_id', sa.text('priority DESC')]),
+]
+
+
+def _existing(indexes):
+    """Skip tables that only create_all makes (e.g. knowledge_entries); it adds their indexes too."""
+    if op.get_context().as_sql:
+        return indexes
+    inspector = sa.inspect(op.get_bind())
+    return [ix for ix in indexes if inspector.has_table(ix[1])]
+
+
+def upgrade() -> None:
+    # On PostgreSQL build the indexes CONCURRENTLY so the hot tables stay
+    # writable; that can't run inside a transaction, hence autocommit_block.
+    # if_not_exists covers databases where create_all already made them.
+    indexes = _existing(INDEXES)
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in indexes:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in indexes:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(_existing(INDEXES)):
+        op.drop_index(name, table_name=table, if_exists=True)
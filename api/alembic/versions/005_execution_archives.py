@@ -0,0 +1,34 @@
+"""Add execution_archives table and executions.compacted_at
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('executions', sa.Column('compacted_at', sa.DateTime(), nullable=True))
+    
+    op.create_table(
+        'execution_archives',
+        sa.Column('execution_id', sa.String(36), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('original_size', sa.Integer(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['execution_id'], ['executions.id'], ),
+        sa.PrimaryKeyConstraint('execution_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('execution_archives')
+    op.drop_column('executions', 'compacted_at')
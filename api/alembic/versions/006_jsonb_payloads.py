@@ -0,0 +1,68 @@
+"""Store JSON payload columns as JSONB on PostgreSQL and index them
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+# (table, column) moved from json to jsonb
+JSONB_COLUMNS = [
+    ('executions', 'trigger_data'),
+    ('execution_nodes', 'input_data'),
+    ('execution_nodes', 'output_data'),
+    ('workflows', 'nodes'),
+    ('audit_logs', 'details'),
+]
+
+
+def upgrade() -> None:
+    # SQLite keeps plain JSON (see app.database.JSONType); nothing to do there
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    for table, column in JSONB_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    # Built CONCURRENTLY so the hot tables stay writable (see 004)
+    with op.get_context().autocommit_block():
+        # Trigger discovery: nodes @> '[{"type": "start_schedule"}]'
+        op.create_index(
+            'ix_workflows_nodes', 'workflows', ['nodes'],
+            postgresql_using='gin', postgresql_ops={'nodes': 'jsonb_path_ops'},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        # Email trigger dedup by message id
+        op.create_index(
+            'ix_executions_workflow_id_message_id', 'executions',
+            ['workflow_id', sa.text("(trigger_data ->> 'message_id')")],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    op.drop_index('ix_executions_workflow_id_message_id', table_name='executions', if_exists=True)
+    op.drop_index('ix_workflows_nodes', table_name='workflows', if_exists=True)
+    for table, column in reversed(JSONB_COLUMNS):
+        op.alter_column(
+            table, column,
+            type_=sa.JSON(),
+            postgresql_using=f'{column}::json',
+        )
@@ -0,0 +1,31 @@
+"""Add daily_metrics rollup table for the admin dashboard
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by app.services.metrics_rollup (first dashboard load backfills 30 days / 12 months)
+    op.create_table(
+        'daily_metrics',
+        sa.Column('metric', sa.String(32), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('metric', 'day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_metrics')
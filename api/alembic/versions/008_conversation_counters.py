@@ -0,0 +1,68 @@
+"""Denormalize message counters onto chat_conversations
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+# Recomputes every conversation's counters from chat_messages (portable SQL)
+BACKFILL = """
+UPDATE chat_conversations SET
+    message_count = (
+        SELECT COUNT(*) FROM chat_messages m
+        WHERE m.conversation_id = chat_conversations.id
+    ),
+    last_message_preview = (
+        SELECT SUBSTR(m.content, 1, 100) FROM chat_messages m
+        WHERE m.conversation_id = chat_conversations.id
+        ORDER BY m.created_at DESC LIMIT 1
+    ),
+    last_role = (
+        SELECT m.role FROM chat_messages m
+        WHERE m.conversation_id = chat_conversations.id
+        ORDER BY m.created_at DESC LIMIT 1
+    )
+"""
+
+
+def _table_exists() -> bool:
+    """chat_conversations is made by create_all, not by a migration; it adds the columns itself."""
+    if op.get_context().as_sql:
+        return True
+    return sa.inspect(op.get_bind()).has_table('chat_conversations')
+
+
+def upgrade() -> None:
+    if not _table_exists():
+        return
+    
+    op.add_column('chat_conversations', sa.Column('message_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('chat_conversations', sa.Column('last_message_preview', sa.String(100), nullable=True))
+    op.add_column('chat_conversations', sa.Column('last_role', sa.String(20), nullable=True))
+    op.execute(BACKFILL)
+    
+    # The conversation list: WHERE user_id = ? ORDER BY updated_at DESC
+    op.create_index(
+        'ix_chat_conversations_user_id_updated_at', 'chat_conversations',
+        ['user_id', sa.text('updated_at DESC')],
+    )
+
+
+def downgrade() -> None:
+    if not _table_exists():
+        return
+    
+    op.drop_index('ix_chat_conversations_user_id_updated_at', table_name='chat_conversations')
+    op.drop_column('chat_conversations', 'last_role')
+    op.drop_column('chat_conversations', 'last_message_preview')
+    op.drop_column('chat_conversations', 'message_count')
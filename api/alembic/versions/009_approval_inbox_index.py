@@ -0,0 +1,30 @@
+"""Index approvals by status and creation time for the paginated inbox
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+# revision identifiers
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY on PostgreSQL so approvals stay writable mid-campaign (see 004)
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_approvals_status_created_at', 'approvals', ['status', 'created_at'],
+                postgresql_concurrently=True, if_not_exists=True,
+            )
+    else:
+        op.create_index('ix_approvals_status_created_at', 'approvals', ['status', 'created_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_approvals_status_created_at', table_name='approvals', if_exists=True)
@@ -1,4 +1,14 @@
-from sqlalchemy import create_engine
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Request
+from sqlalchemy import JSON, cast, create_engine, event, func, literal, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool, QueuePool
@@ -6,6 +16,18 @@ from app.config import get_settings
 
 settings = get_settings()
 
+
+def _is_sqlite_file(url: str) -> bool:
+    """True for an on-disk SQLite database (in-memory ones can't use WAL or be shared by a pool)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return False
+    return parsed.database not in (None, "", ":memory:") and parsed.query.get("mode") != "memory"
+
+
+# Tuned single-node SQLite: WAL journal, pooled connections, single writer gate
+SQLITE_TUNED = settings.sqlite_tuned and _is_sqlite_file(settings.database_url)
+
 # Configure connection based on database type
 connect_args = {}
 engine_kwargs = {
@@ -15,7 +37,13 @@ engine_kwargs = {
 if settings.database_url.startswith("sqlite"):
     # SQLite needs special connect_args for multi-threading
     connect_args = {"check_same_thread": False}
-    engine_kwargs["poolclass"] = NullPool  # SQLite doesn't support connection pooling
+    if SQLITE_TUNED:
+        # Bounded pool: reuse open handles (and their page cache) instead of reopening the file per session
+        engine_kwargs["poolclass"] = QueuePool
+        engine_kwargs["pool_size"] = settings.sqlite_pool_size
+        engine_kwargs["max_overflow"] = settings.sqlite_pool_size
+    else:
+        engine_kwargs["poolclass"] = NullPool
 elif settings.database_url.startswith("postgresql"):
     # PostgreSQL production settings with connection pooling
     engine_kwargs["poolclass"] = QueuePool
@@ -30,8 +58,184 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _tune_sqlite_connection(dbapi_connection, connection_record):
+    """
+    WAL lets readers run alongside the writer; synchronous=NORMAL is durable
+    across app crashes in WAL mode (only an OS crash can lose the last
+    commits); busy_timeout makes writers wait for the lock instead of failing.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.close()
+
+
+if SQLITE_TUNED:
+    event.listen(engine, "connect", _tune_sqlite_connection)
+
+
+# --- SQLite single writer ---
+# SQLite allows one writer at a time; contending writers otherwise spin in
+# the busy handler's sleep/retry loop. Worker-thread sessions (execution
+# journaling in WorkflowRunner, trigger pollers) instead queue on this lock
+# from their first flush (or bulk UPDATE/DELETE) until the transaction ends,
+# so writes are handed over in order with no retry sleeps. Sessions used on a
+# thread running an event loop don't take it (async sessions, and sync get_db
+# sessions in async def handlers or the email poller): waiting here would
+# stall every request on that loop. They fall back to SQLite's busy handler.
+# A plain Lock, not an RLock: get_db may close the session on another thread
+_sqlite_writer = threading.Lock()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _acquire_sqlite_writer(session):
+    if session.info.get("sqlite_writer") or _on_event_loop():
+        return
+    # Bounded wait: if the holder is stuck, fall back to SQLite's own busy handling
+    if _sqlite_writer.acquire(timeout=settings.sqlite_busy_timeout_ms / 1000):
+        session.info["sqlite_writer"] = True
+
+
+def _before_flush(session, flush_context, instances):
+    _acquire_sqlite_writer(session)
+
+
+def _do_orm_execute(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        _acquire_sqlite_writer(orm_execute_state.session)
+
+
+def _after_transaction_end(session, transaction):
+    if transaction.parent is None and session.info.pop("sqlite_writer", False):
+        _sqlite_writer.release()
+
+
+if SQLITE_TUNED and settings.sqlite_single_writer:
+    event.listen(SessionLocal, "before_flush", _before_flush)
+    event.listen(SessionLocal, "do_orm_execute", _do_orm_execute)
+    event.listen(SessionLocal, "after_transaction_end", _after_transaction_end)
+
+
+def _async_database_url(url: str):
+    """
+    Point DATABASE_URL at the async driver for the same database.
+    
+    sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg. asyncpg
+    doesn't understand libpq's sslmode/channel_binding query params, so
+    sslmode is passed through as ssl and channel_binding is dropped.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode and "ssl" not in query:
+            query["ssl"] = sslmode
+        return parsed.set(drivername="postgresql+asyncpg", query=query)
+    return parsed
+
+
+# Async engine for request handlers — same database, non-blocking driver.
+# Background workers (WorkflowRunner, trigger pollers) keep using SessionLocal.
+async_engine_kwargs = {"pool_pre_ping": True}
+if SQLITE_TUNED:
+    async_engine_kwargs["pool_size"] = settings.sqlite_pool_size
+    async_engine_kwargs["max_overflow"] = settings.sqlite_pool_size
+elif settings.database_url.startswith("sqlite"):
+    async_engine_kwargs["poolclass"] = NullPool
+elif settings.database_url.startswith("postgresql"):
+    async_engine_kwargs["pool_size"] = 5
+    async_engine_kwargs["max_overflow"] = 10
+
+async_engine = create_async_engine(
+    _async_database_url(settings.database_url),
+    **async_engine_kwargs,
+)
+if SQLITE_TUNED:
+    event.listen(async_engine.sync_engine, "connect", _tune_sqlite_connection)
+
+# expire_on_commit=False: objects handed back from a request (e.g. the
+# current user) stay readable after the session closes
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Optional read replica. Without DATABASE_READ_URL the "read" engines are the primary.
+if settings.database_read_url:
+    read_engine = create_engine(
+        settings.database_read_url,
+        connect_args=connect_args,
+        **engine_kwargs,
+    )
+    async_read_engine = create_async_engine(
+        _async_database_url(settings.database_read_url),
+        **async_engine_kwargs,
+    )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
+# JSON payload columns: JSONB on PostgreSQL (GIN/expression indexable, @>
+# containment), plain JSON elsewhere so SQLite dev databases keep working
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def json_array_has(column, key: str, value: str, dialect_name: str):
+    """
+    Filter for a JSON array column holding an object whose key equals value,
+    e.g. workflows whose nodes include {"type": "start_schedule"}.
+    
+    PostgreSQL uses JSONB containment (served by a jsonb_path_ops GIN index);
+    other dialects walk the array with json_each.
+    """
+    if dialect_name == "postgresql":
+        return column.op("@>")(cast([{key: value}], JSONB))
+    elements = func.json_each(column).table_valued("value")
+    return (
+        select(literal(1))
+        .select_from(elements)
+        .where(func.json_extract(elements.c.value, f"$.{key}") == value)
+        .exists()
+    )
+
+
+def json_text(column, key: str, dialect_name: str):
+    """
+    A top-level key of a JSON column as text, e.g. an execution's message_id.
+    
+    PostgreSQL gets the bare ->> operator so the lookup matches expression
+    indexes on (column ->> 'key'); as_string() would wrap it in a CAST that
+    the index doesn't cover.
+    """
+    if dialect_name == "postgresql":
+        return type_coerce(column, JSONB)[key].astext
+    return column[key].as_string()
+
 
 def get_db():
     db = SessionLocal()
@@ -39,3 +243,61 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# --- Read replica routing ---
+# Clients (keyed by a hash of their Authorization header) whose write just
+# succeeded, so their next reads don't hit a replica that hasn't caught up.
+# Per process: across workers, send X-Read-Primary: 1 to force the primary.
+_recent_writes: Dict[str, float] = {}
+
+
+def _client_key(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def read_replica_enabled() -> bool:
+    return read_engine is not engine
+
+
+def mark_recent_write(authorization: Optional[str]):
+    """Called after a successful write request (see ReadYourWritesMiddleware)."""
+    key = _client_key(authorization)
+    if not key:
+        return
+    now = time.monotonic()
+    if len(_recent_writes) > 10000:
+        cutoff = now - settings.database_read_your_writes_seconds
+        for stale in [k for k, at in _recent_writes.items() if at < cutoff]:
+            del _recent_writes[stale]
+    _recent_writes[key] = now
+
+
+def _read_from_primary(request: Request) -> bool:
+    if not read_replica_enabled() or request.headers.get("X-Read-Primary"):
+        return True
+    wrote_at = _recent_writes.get(_client_key(request.headers.get("Authorization")) or "")
+    return wrote_at is not None and time.monotonic() - wrote_at < settings.database_read_your_writes_seconds
+
+
+def get_read_db(request: Request):
+    """Like get_db, but served by the read replica when one is configured."""
+    db = SessionLocal() if _read_from_primary(request) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Like get_async_db, but served by the read replica when one is configured."""
+    factory = AsyncSessionLocal if _read_from_primary(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
@@ -1,3 +1,17 @@
+import time
+
+# Startup timing report, logged once the app is serving (see lifespan)
+_phase_started = time.perf_counter()
+_startup_phases = []
+
+
+def _end_startup_phase(name: str):
+    global _phase_started
+    now = time.perf_counter()
+    _startup_phases.append(f"{name} {(now - _phase_started) * 1000:.0f}ms")
+    _phase_started = now
+
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -8,14 +22,14 @@ import logging
 from app.routers import auth, workflows, executions, approvals, connections, templates, ai, chat, webhooks, knowledge
 from app.routers import health
 from app.routers import admin as admin_router
-from app.database import engine, Base, SessionLocal
-from app.models import user, workflow, execution, approval, connection, template, knowledge as knowledge_model
+from app.database import SessionLocal
 from app.config import settings
 from app.utils.logging import setup_logging
 from app.middleware import (
     RequestLoggingMiddleware,
     SecurityHeadersMiddleware,
     ErrorHandlingMiddleware,
+    ReadYourWritesMiddleware,
 )
 
 # Setup logging
@@ -25,63 +39,8 @@ setup_logging(level=log_level, json_format=json_logs)
 
 logger = logging.getLogger(__name__)
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
-
-# Run lightweight migrations for new columns
-def _run_migrations():
-    """Add columns that may be missing from existing tables."""
-    from sqlalchemy import text, inspect
-    with engine.connect() as conn:
-        inspector = inspect(engine)
-        columns = [c["name"] for c in inspector.get_columns("workflows")]
-        if "is_agent_task" not in columns:
-            logger.info("[migration] Adding is_agent_task column to workflows")
-            conn.execute(text("ALTER TABLE workflows ADD COLUMN is_agent_task BOOLEAN DEFAULT FALSE"))
-            conn.commit()
-
-        user_columns = [c["name"] for c in inspector.get_columns("users")]
-        if "plan" not in user_columns:
-            logger.info("[migration] Adding plan/trial columns to users")
-            conn.execute(text("ALTER TABLE users ADD COLUMN plan VARCHAR DEFAULT 'trial'"))
-            conn.execute(text("ALTER TABLE users ADD COLUMN trial_started_at TIMESTAMP"))
-            conn.execute(text("ALTER TABLE users ADD COLUMN total_runs_used INTEGER DEFAULT 0"))
-            conn.execute(text("UPDATE users SET trial_started_at = NOW() WHERE trial_started_at IS NULL"))
-            conn.commit()
-
-        kb_columns = [c["name"] for c in inspector.get_columns("knowledge_entries")] if "knowledge_entries" in inspector.get_table_names() else []
-        # knowledge_entries table is created by create_all above, no extra migration needed
-
-        exec_columns = [c["name"] for c in inspector.get_columns("executions")] if "executions" in inspector.get_table_names() else []
-        if "error" not in exec_columns and exec_columns:
-            logger.info("[migration] Adding error column to executions")
-            conn.execute(text("ALTER TABLE executions ADD COLUMN error TEXT"))
-            conn.commit()
-
-        user_columns2 = [c["name"] for c in inspector.get_columns("users")]
-        if "email_verified" not in user_columns2:
-            logger.info("[migration] Adding email verification columns to users")
-            conn.execute(text("ALTER TABLE users ADD COLUMN email_verified BOOLEAN DEFAULT FALSE"))
-            conn.execute(text("ALTER TABLE users ADD COLUMN verification_token VARCHAR"))
-            # Mark existing users as verified (they signed up before this feature)
-            conn.execute(text("UPDATE users SET email_verified = TRUE WHERE email_verified IS NULL OR email_verified = FALSE"))
-            conn.commit()
-
-        if "password_reset_token" not in user_columns2:
-            logger.info("[migration] Adding password reset columns to users")
-            conn.execute(text("ALTER TABLE users ADD COLUMN password_reset_token VARCHAR"))
-            conn.execute(text("ALTER TABLE users ADD COLUMN password_reset_expires TIMESTAMP"))
-            conn.commit()
-
-        if "is_admin" not in user_columns2:
-            logger.info("[migration] Adding is_admin column to users")
-            conn.execute(text("ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE"))
-            conn.commit()
-
-try:
-    _run_migrations()
-except Exception as e:
-    logger.warning(f"[migration] Non-critical migration error: {e}")
+# Schema changes are not applied here: run `python -m app.migrate` first (start.sh does)
+_end_startup_phase("imports")
 
 # Background task for email polling
 async def poll_email_triggers_task():
@@ -105,6 +64,11 @@ async def poll_email_triggers_task():
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events."""
+    _phase_started_at = time.perf_counter()
+    # MCP tool registries used on this loop (chat, agent tasks) are pooled
+    from app.mcp_servers.registry import register_pooling_loop
+    register_pooling_loop(asyncio.get_running_loop())
+    
     # Start background email polling task
     email_task = asyncio.create_task(poll_email_triggers_task())
     print("[Email Trigger] Background polling started (every 60 seconds)")
@@ -114,8 +78,29 @@ async def lifespan(app: FastAPI):
     schedule_task = asyncio.create_task(poll_schedule_triggers_task())
     print("[Schedule Trigger] Background polling started (every 60 seconds)")
     
+    # Start background run history retention (compaction + purge)
+    retention_task = None
+    if settings.execution_retention_enabled:
+        from app.services.execution_retention import execution_retention_task
+        retention_task = asyncio.create_task(execution_retention_task())
+        print(f"[Retention] Background job started (every {settings.execution_retention_interval_minutes} minutes)")
+    
+    # Start background admin dashboard rollups
+    from app.services.metrics_rollup import metrics_rollup_task
+    metrics_task = asyncio.create_task(metrics_rollup_task())
+    print(f"[Metrics] Rollup job started (every {settings.metrics_rollup_interval_minutes} minutes)")
+    
+    _startup_phases.append(f"background tasks {(time.perf_counter() - _phase_started_at) * 1000:.0f}ms")
+    logger.info(f"[Startup] {' | '.join(_startup_phases)}")
+    
     yield
     # Cleanup on shutdown
+    from app.services.trigger_coalescer import trigger_coalescer
+    await trigger_coalescer.flush_all()
+    from app.services.execution_dispatcher import shutdown_dispatcher
+    shutdown_dispatcher()
+    from app.mcp_servers.registry import close_pooled_registries
+    await close_pooled_registries()
     email_task.cancel()
     schedule_task.cancel()
     try:
@@ -126,6 +111,17 @@ async def lifespan(app: FastAPI):
         await schedule_task
     except asyncio.CancelledError:
         pass
+    metrics_task.cancel()
+    try:
+        await metrics_task
+    except asyncio.CancelledError:
+        pass
+    if retention_task:
+        retention_task.cancel()
+        try:
+            await retention_task
+        except asyncio.CancelledError:
+            pass
 
 
 app = FastAPI(
@@ -175,6 +171,7 @@ logger.info(f"[CORS] Allowed origins: {cors_origins}")
 # app.add_middleware(ErrorHandlingMiddleware)
 # app.add_middleware(SecurityHeadersMiddleware)
 # app.add_middleware(RequestLoggingMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 
 # CORS must be after custom middleware
 app.add_middleware(
@@ -211,3 +208,6 @@ async def root():
         "docs": "/docs",
         "health": "/api/health/ready",
     }
+
+
+_end_startup_phase("app setup")
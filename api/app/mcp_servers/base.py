@@ -32,9 +32,32 @@ class BaseMCPServer:
 
     provider: str = "unknown"  # e.g. "google", "slack", "stripe"
 
+    _schema_cache: dict = {}  # server class -> list_tools() output, see tool_schemas()
+
     def __init__(self):
         self._tools: dict[str, ToolDef] = {}
 
+    def _register_tools(self):
+        """Register every tool. Must only call self._register(), so tool_schemas() can run it."""
+        raise NotImplementedError
+
+    @classmethod
+    def tool_schemas(cls) -> list[dict]:
+        """
+        list_tools() for this server class, without constructing a server.
+
+        Subclass constructors build API clients from credentials; schemas only
+        need _register_tools(), run once on a bare instance and cached.
+        """
+        schemas = BaseMCPServer._schema_cache.get(cls)
+        if schemas is None:
+            bare = cls.__new__(cls)
+            BaseMCPServer.__init__(bare)
+            bare._register_tools()
+            schemas = bare.list_tools()
+            BaseMCPServer._schema_cache[cls] = schemas
+        return schemas
+
     def _register(self, name: str, description: str, input_schema: dict, handler: Callable[..., Awaitable[dict]]):
         """Register a tool."""
         self._tools[name] = ToolDef(name, description, input_schema, handler)
@@ -22,7 +22,9 @@ class BrevoMCPServer(BaseMCPServer):
             logging.getLogger(__name__).warning(
                 f"[Brevo] No api_key found in credentials. Keys present: {list(credentials.keys())}"
             )
+        self._register_tools()
 
+    def _register_tools(self):
         # ===== Transactional Email =====
         self._register("brevo_send_transactional_email", "Send a transactional email via Brevo", {
             "type": "object",
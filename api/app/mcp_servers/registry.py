@@ -3,241 +3,249 @@ MCP Tool Registry — Central dispatcher for all MCP integration servers.
 
 Creates MCP servers based on user's active connections and routes tool calls.
 """
+import asyncio
+import hashlib
+import importlib
+import json
 import logging
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from typing import Any, Optional
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.mcp_servers.base import BaseMCPServer
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
-# Maps connection provider names to (ServerClass, credential_extractor) tuples
-def _google_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.google_server import GoogleMCPServer
-    return GoogleMCPServer(
+# provider -> "module.Class" under app.mcp_servers (schemas need no credentials)
+SERVER_CLASSES: dict[str, str] = {}
+# provider -> factory building the server from a connection's credentials
+SERVER_FACTORIES: dict = {}
+
+
+def _register(provider: str, path: str):
+    """Register a provider's server class and the function that builds it from credentials."""
+    def decorator(build):
+        SERVER_CLASSES[provider] = path
+        SERVER_FACTORIES[provider] = lambda creds: build(get_server_class(provider), creds)
+        return build
+    return decorator
+
+
+@_register("google", "google_server.GoogleMCPServer")
+def _google_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         access_token=creds.get("access_token", ""),
         refresh_token=creds.get("refresh_token", ""),
     )
 
 
-def _slack_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.slack_server import SlackMCPServer
-    return SlackMCPServer(access_token=creds.get("access_token", ""))
+@_register("slack", "slack_server.SlackMCPServer")
+def _slack_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _stripe_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.stripe_server import StripeMCPServer
+@_register("stripe", "stripe_server.StripeMCPServer")
+def _stripe_factory(server_class, creds: dict) -> BaseMCPServer:
     api_key = creds.get("api_key") or creds.get("access_token", "")
-    return StripeMCPServer(api_key=api_key)
+    return server_class(api_key=api_key)
 
 
-def _twilio_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.twilio_server import TwilioMCPServer
-    return TwilioMCPServer(
+@_register("twilio", "twilio_server.TwilioMCPServer")
+def _twilio_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         account_sid=creds.get("account_sid", ""),
         auth_token=creds.get("auth_token", ""),
         phone_number=creds.get("phone_number"),
     )
 
 
-def _airtable_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.airtable_server import AirtableMCPServer
-    return AirtableMCPServer(access_token=creds.get("access_token", ""))
+@_register("airtable", "airtable_server.AirtableMCPServer")
+def _airtable_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _notion_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.notion_server import NotionMCPServer
-    return NotionMCPServer(access_token=creds.get("access_token", ""))
+@_register("notion", "notion_server.NotionMCPServer")
+def _notion_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _calendly_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.calendly_server import CalendlyMCPServer
-    return CalendlyMCPServer(access_token=creds.get("access_token", ""))
+@_register("calendly", "calendly_server.CalendlyMCPServer")
+def _calendly_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _mailchimp_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.mailchimp_server import MailchimpMCPServer
-    return MailchimpMCPServer(access_token=creds.get("access_token", ""))
+@_register("mailchimp", "mailchimp_server.MailchimpMCPServer")
+def _mailchimp_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _hubspot_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.hubspot_server import HubSpotMCPServer
-    return HubSpotMCPServer(access_token=creds.get("access_token", ""))
+@_register("hubspot", "hubspot_server.HubSpotMCPServer")
+def _hubspot_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _shopify_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.shopify_server import ShopifyMCPServer
-    return ShopifyMCPServer(
+@_register("shopify", "shopify_server.ShopifyMCPServer")
+def _shopify_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         shop_domain=creds.get("shop_domain", ""),
         access_token=creds.get("access_token", ""),
     )
 
 
-def _discord_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.discord_server import DiscordMCPServer
-    return DiscordMCPServer(
+@_register("discord", "discord_server.DiscordMCPServer")
+def _discord_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         bot_token=creds.get("bot_token", ""),
         guild_id=creds.get("guild_id"),
     )
 
 
-def _jira_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.jira_server import JiraMCPServer
-    return JiraMCPServer(
+@_register("jira", "jira_server.JiraMCPServer")
+def _jira_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         domain=creds.get("domain", ""),
         email=creds.get("email", ""),
         api_token=creds.get("api_token", ""),
     )
 
 
-def _github_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.github_server import GitHubMCPServer
-    return GitHubMCPServer(access_token=creds.get("access_token", ""))
+@_register("github", "github_server.GitHubMCPServer")
+def _github_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _linear_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.linear_server import LinearMCPServer
-    return LinearMCPServer(api_key=creds.get("api_key", ""))
+@_register("linear", "linear_server.LinearMCPServer")
+def _linear_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(api_key=creds.get("api_key", ""))
 
 
-def _monday_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.monday_server import MondayMCPServer
-    return MondayMCPServer(api_key=creds.get("api_key", ""))
+@_register("monday", "monday_server.MondayMCPServer")
+def _monday_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(api_key=creds.get("api_key", ""))
 
 
-def _sendgrid_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.sendgrid_server import SendGridMCPServer
-    return SendGridMCPServer(api_key=creds.get("api_key", ""))
+@_register("sendgrid", "sendgrid_server.SendGridMCPServer")
+def _sendgrid_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(api_key=creds.get("api_key", ""))
 
 
-def _whatsapp_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.whatsapp_server import WhatsAppMCPServer
-    return WhatsAppMCPServer(
+@_register("whatsapp", "whatsapp_server.WhatsAppMCPServer")
+def _whatsapp_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         access_token=creds.get("access_token", ""),
         phone_number_id=creds.get("phone_number_id", ""),
     )
 
 
-def _brevo_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.brevo import BrevoMCPServer
-    return BrevoMCPServer(creds)
+@_register("brevo", "brevo.BrevoMCPServer")
+def _brevo_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(creds)
 
 
-def _telegram_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.telegram_server import TelegramMCPServer
-    return TelegramMCPServer(bot_token=creds.get("bot_token", ""))
+@_register("telegram", "telegram_server.TelegramMCPServer")
+def _telegram_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(bot_token=creds.get("bot_token", ""))
 
 
-def _typeform_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.typeform_server import TypeformMCPServer
-    return TypeformMCPServer(access_token=creds.get("access_token", ""))
+@_register("typeform", "typeform_server.TypeformMCPServer")
+def _typeform_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _asana_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.asana_server import AsanaMCPServer
-    return AsanaMCPServer(access_token=creds.get("access_token", ""))
+@_register("asana", "asana_server.AsanaMCPServer")
+def _asana_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _trello_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.trello_server import TrelloMCPServer
-    return TrelloMCPServer(
+@_register("trello", "trello_server.TrelloMCPServer")
+def _trello_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         api_key=creds.get("api_key", ""),
         api_token=creds.get("api_token", ""),
     )
 
 
-def _clickup_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.clickup_server import ClickUpMCPServer
-    return ClickUpMCPServer(api_key=creds.get("api_key", ""))
+@_register("clickup", "clickup_server.ClickUpMCPServer")
+def _clickup_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(api_key=creds.get("api_key", ""))
 
 
-def _pipedrive_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.pipedrive_server import PipedriveMCPServer
-    return PipedriveMCPServer(api_token=creds.get("api_token", ""))
+@_register("pipedrive", "pipedrive_server.PipedriveMCPServer")
+def _pipedrive_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(api_token=creds.get("api_token", ""))
 
 
-def _zendesk_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.zendesk_server import ZendeskMCPServer
-    return ZendeskMCPServer(
+@_register("zendesk", "zendesk_server.ZendeskMCPServer")
+def _zendesk_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         subdomain=creds.get("subdomain", ""),
         email=creds.get("email", ""),
         api_token=creds.get("api_token", ""),
     )
 
 
-def _intercom_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.intercom_server import IntercomMCPServer
-    return IntercomMCPServer(access_token=creds.get("access_token", ""))
+@_register("intercom", "intercom_server.IntercomMCPServer")
+def _intercom_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _freshdesk_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.freshdesk_server import FreshdeskMCPServer
-    return FreshdeskMCPServer(
+@_register("freshdesk", "freshdesk_server.FreshdeskMCPServer")
+def _freshdesk_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         domain=creds.get("domain", ""),
         api_key=creds.get("api_key", ""),
     )
 
 
-def _supabase_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.supabase_server import SupabaseMCPServer
-    return SupabaseMCPServer(
+@_register("supabase", "supabase_server.SupabaseMCPServer")
+def _supabase_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         url=creds.get("url", ""),
         api_key=creds.get("api_key", ""),
     )
 
 
-def _webflow_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.webflow_server import WebflowMCPServer
-    return WebflowMCPServer(access_token=creds.get("access_token", ""))
+@_register("webflow", "webflow_server.WebflowMCPServer")
+def _webflow_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
 
 
-def _twitch_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.twitch_server import TwitchMCPServer
-    return TwitchMCPServer(
+@_register("twitch", "twitch_server.TwitchMCPServer")
+def _twitch_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(
         client_id=creds.get("client_id", ""),
         access_token=creds.get("access_token", ""),
     )
 
 
-def _zoom_factory(creds: dict) -> BaseMCPServer:
-    from app.mcp_servers.zoom_server import ZoomMCPServer
-    return ZoomMCPServer(access_token=creds.get("access_token", ""))
-
-
-SERVER_FACTORIES = {
-    "google": _google_factory,
-    "slack": _slack_factory,
-    "stripe": _stripe_factory,
-    "twilio": _twilio_factory,
-    "airtable": _airtable_factory,
-    "notion": _notion_factory,
-    "calendly": _calendly_factory,
-    "mailchimp": _mailchimp_factory,
-    "hubspot": _hubspot_factory,
-    "shopify": _shopify_factory,
-    "discord": _discord_factory,
-    "jira": _jira_factory,
-    "github": _github_factory,
-    "linear": _linear_factory,
-    "monday": _monday_factory,
-    "sendgrid": _sendgrid_factory,
-    "whatsapp": _whatsapp_factory,
-    "brevo": _brevo_factory,
-    "telegram": _telegram_factory,
-    "typeform": _typeform_factory,
-    "asana": _asana_factory,
-    "trello": _trello_factory,
-    "clickup": _clickup_factory,
-    "pipedrive": _pipedrive_factory,
-    "zendesk": _zendesk_factory,
-    "intercom": _intercom_factory,
-    "freshdesk": _freshdesk_factory,
-    "supabase": _supabase_factory,
-    "webflow": _webflow_factory,
-    "twitch": _twitch_factory,
-    "zoom": _zoom_factory,
-}
+@_register("zoom", "zoom_server.ZoomMCPServer")
+def _zoom_factory(server_class, creds: dict) -> BaseMCPServer:
+    return server_class(access_token=creds.get("access_token", ""))
+
+
+def get_server_class(provider: str) -> Optional[type]:
+    path = SERVER_CLASSES.get(provider)
+    if not path:
+        return None
+    module_name, class_name = path.rsplit(".", 1)
+    module = importlib.import_module(f"app.mcp_servers.{module_name}")
+    return getattr(module, class_name)
+
+
+def get_tool_schemas(provider: str) -> list[dict]:
+    """
+    A provider's tools in OpenAI function format, without constructing a
+    server (no credentials, no API clients). Built on first use, then cached.
+    """
+    server_class = get_server_class(provider)
+    return server_class.tool_schemas() if server_class else []
 
 
 class MCPToolRegistry:
@@ -312,3 +320,102 @@ class MCPToolRegistry:
                 await server.close()
             except Exception:
                 pass
+
+
+# ── Registry pool ──────────────────────────────────────────────
+#
+# Building a registry constructs every connected server, and each server's
+# service opens its own HTTP client on first use. A for-each over MCP nodes used
+# to pay that (plus a TLS handshake) per row. Registries are now pooled per
+# (event loop, user, credential fingerprint): httpx clients belong to the loop
+# they were opened on, so an entry is only ever used on its own loop, where
+# concurrent tasks may share it. New credentials (e.g. a refreshed token) give a
+# new fingerprint; the old entry idles out.
+#
+# Only loops that live as long as the process pool registries: the app's loop
+# and the dispatcher workers' loops (see register_pooling_loop). Any other loop
+# (a one-off thread, a per-call loop) gets a registry per call, closed when the
+# call ends, so nothing is left behind when that loop goes away.
+
+@dataclass
+class _PoolEntry:
+    registry: MCPToolRegistry
+    loop: asyncio.AbstractEventLoop
+    last_used: float
+    in_use: int = 0
+
+
+_pool: dict[tuple, _PoolEntry] = {}
+_pool_lock = threading.Lock()
+_pooling_loops: "weakref.WeakSet[asyncio.AbstractEventLoop]" = weakref.WeakSet()
+
+
+def register_pooling_loop(loop: asyncio.AbstractEventLoop):
+    """Let registries requested on this long-lived loop be pooled."""
+    _pooling_loops.add(loop)
+
+
+def credential_fingerprint(connections: dict) -> str:
+    """Stable hash of a connections dict, so changed credentials never reuse a registry."""
+    raw = json.dumps(connections, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def _evict_idle(loop: asyncio.AbstractEventLoop):
+    """Close this loop's idle registries; forget those whose loop has been closed."""
+    now = time.monotonic()
+    idle_after = settings.mcp_registry_idle_seconds
+    stale = []
+    with _pool_lock:
+        for key, entry in list(_pool.items()):
+            if entry.loop.is_closed():
+                del _pool[key]  # Its clients died with the loop; nothing to await
+            elif entry.loop is loop and entry.in_use == 0 and now - entry.last_used > idle_after:
+                del _pool[key]
+                stale.append(entry.registry)
+    for registry in stale:
+        await registry.close()
+
+
+@asynccontextmanager
+async def pooled_registry(user_id: Optional[str], connections: dict):
+    """
+    A registry for these connections, reused across calls on the running loop.
+
+    Do not close it: the pool does, once it has been idle for
+    MCP_REGISTRY_IDLE_SECONDS (checked whenever a registry is requested).
+    On a loop that isn't registered for pooling, the registry is closed on exit.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _pooling_loops:
+        registry = MCPToolRegistry(connections)
+        try:
+            yield registry
+        finally:
+            await registry.close()
+        return
+    await _evict_idle(loop)
+
+    key = (loop, user_id, credential_fingerprint(connections))
+    with _pool_lock:
+        entry = _pool.get(key)
+        if entry is None:
+            entry = _PoolEntry(MCPToolRegistry(connections), loop, time.monotonic())
+            _pool[key] = entry
+        entry.in_use += 1
+    try:
+        yield entry.registry
+    finally:
+        with _pool_lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+
+
+async def close_pooled_registries():
+    """Close every registry owned by the running loop (shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _pool_lock:
+        owned = [key for key, entry in _pool.items() if entry.loop is loop]
+        entries = [_pool.pop(key) for key in owned]
+    for entry in entries:
+        await entry.registry.close()
@@ -10,6 +10,9 @@ import uuid
 from typing import Callable
 import logging
 
+from starlette.datastructures import Headers
+
+from app.database import mark_recent_write, read_replica_enabled
 from app.utils.logging import set_correlation_id, set_user_id, get_correlation_id
 from app.utils.rate_limit import rate_limiter, RateLimitExceeded
 
@@ -187,3 +190,30 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                     "correlation_id": correlation_id,
                 }
             )
+
+
+class ReadYourWritesMiddleware:
+    """
+    Remember clients whose write request just succeeded, so get_read_db keeps
+    their reads on the primary while the replica catches up.
+    
+    Plain ASGI rather than BaseHTTPMiddleware so SSE streams pass through.
+    """
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS or not read_replica_enabled():
+            await self.app(scope, receive, send)
+            return
+        
+        authorization = Headers(scope=scope).get("authorization")
+        
+        async def _send(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                mark_recent_write(authorization)
+            await send(message)
+        
+        await self.app(scope, receive, _send)
@@ -0,0 +1,170 @@
+"""
+Migrate - Brings the database schema up to date. Run before starting the API.
+
+    python -m app.migrate
+
+start.sh (and run.py for local development) run this once per deploy, so
+importing app.main never touches the database and every autoscaled worker
+starts without schema checks of its own.
+
+Phases, in order:
+1. alembic upgrade head (databases built by create_all are stamped first)
+2. create_all for tables alembic doesn't manage yet (chat, knowledge base)
+3. columns added before alembic was set up (databases created by create_all)
+4. model indexes missing on tables that already existed
+"""
+import logging
+import os
+import time
+
+from sqlalchemy import inspect, text
+
+from app.database import Base, engine
+import app.models  # noqa: F401 - registers every table on Base.metadata
+
+logger = logging.getLogger(__name__)
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Databases created by create_all before alembic ran on deploy have the schema
+# up to this revision but no alembic_version table
+BASELINE_REVISION = "002"
+
+
+def upgrade_alembic():
+    from alembic import command
+    from alembic.config import Config
+
+    # No ini file: alembic.ini's logging config would disable this module's logger
+    config = Config()
+    config.set_main_option("script_location", os.path.join(API_DIR, "alembic"))
+
+    inspector = inspect(engine)
+    if inspector.has_table("users") and not inspector.has_table("alembic_version"):
+        # Upgrading from scratch would fail re-creating tables that already exist
+        logger.info(f"[migration] Stamping pre-alembic database at revision {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, "head")
+
+
+def create_tables():
+    Base.metadata.create_all(bind=engine)
+
+
+def add_missing_columns():
+    """Add columns that may be missing from existing tables."""
+    with engine.connect() as conn:
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+
+        def columns(table):
+            return [c["name"] for c in inspector.get_columns(table)] if table in tables else []
+
+        if "is_agent_task" not in columns("workflows"):
+            logger.info("[migration] Adding is_agent_task column to workflows")
+            conn.execute(text("ALTER TABLE workflows ADD COLUMN is_agent_task BOOLEAN DEFAULT FALSE"))
+            conn.commit()
+
+        user_columns = columns("users")
+        if "plan" not in user_columns:
+            logger.info("[migration] Adding plan/trial columns to users")
+            conn.execute(text("ALTER TABLE users ADD COLUMN plan VARCHAR DEFAULT 'trial'"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN trial_started_at TIMESTAMP"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN total_runs_used INTEGER DEFAULT 0"))
+            conn.execute(text("UPDATE users SET trial_started_at = CURRENT_TIMESTAMP WHERE trial_started_at IS NULL"))
+            conn.commit()
+
+        exec_columns = columns("executions")
+        if "error" not in exec_columns and exec_columns:
+            logger.info("[migration] Adding error column to executions")
+            conn.execute(text("ALTER TABLE executions ADD COLUMN error TEXT"))
+            conn.commit()
+
+        if "compacted_at" not in exec_columns and exec_columns:
+            logger.info("[migration] Adding compacted_at column to executions")
+            conn.execute(text("ALTER TABLE executions ADD COLUMN compacted_at TIMESTAMP"))
+            conn.commit()
+
+        convo_columns = columns("chat_conversations")
+        if "message_count" not in convo_columns and convo_columns:
+            logger.info("[migration] Adding message counters to chat_conversations")
+            conn.execute(text("ALTER TABLE chat_conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"))
+            conn.execute(text("ALTER TABLE chat_conversations ADD COLUMN last_message_preview VARCHAR(100)"))
+            conn.execute(text("ALTER TABLE chat_conversations ADD COLUMN last_role VARCHAR(20)"))
+            conn.execute(text(
+                "UPDATE chat_conversations SET "
+                "message_count = (SELECT COUNT(*) FROM chat_messages m WHERE m.conversation_id = chat_conversations.id), "
+                "last_message_preview = (SELECT SUBSTR(m.content, 1, 100) FROM chat_messages m "
+                "WHERE m.conversation_id = chat_conversations.id ORDER BY m.created_at DESC LIMIT 1), "
+                "last_role = (SELECT m.role FROM chat_messages m "
+                "WHERE m.conversation_id = chat_conversations.id ORDER BY m.created_at DESC LIMIT 1)"
+            ))
+            conn.commit()
+
+        if "email_verified" not in user_columns:
+            logger.info("[migration] Adding email verification columns to users")
+            conn.execute(text("ALTER TABLE users ADD COLUMN email_verified BOOLEAN DEFAULT FALSE"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN verification_token VARCHAR"))
+            # Mark existing users as verified (they signed up before this feature)
+            conn.execute(text("UPDATE users SET email_verified = TRUE WHERE email_verified IS NULL OR email_verified = FALSE"))
+            conn.commit()
+
+        if "password_reset_token" not in user_columns:
+            logger.info("[migration] Adding password reset columns to users")
+            conn.execute(text("ALTER TABLE users ADD COLUMN password_reset_token VARCHAR"))
+            conn.execute(text("ALTER TABLE users ADD COLUMN password_reset_expires TIMESTAMP"))
+            conn.commit()
+
+        if "is_admin" not in user_columns:
+            logger.info("[migration] Adding is_admin column to users")
+            conn.execute(text("ALTER TABLE users ADD COLUMN is_admin BOOLEAN DEFAULT FALSE"))
+            conn.commit()
+
+
+def create_missing_indexes():
+    """
+    create_all skips indexes on tables that already exist; add any the models
+    declare (production builds them CONCURRENTLY via alembic, so these are no-ops there).
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                # e.g. the JSONB GIN index on a PostgreSQL database alembic 006 hasn't converted yet
+                logger.warning(f"[migration] Could not create index {index.name}: {e}")
+
+
+PHASES = [
+    ("alembic upgrade", upgrade_alembic),
+    ("create tables", create_tables),
+    ("legacy columns", add_missing_columns),
+    ("indexes", create_missing_indexes),
+]
+
+
+def migrate() -> bool:
+    """
+    Run every phase and log how long each took. A failing phase is logged and
+    the rest still run, as they did at import time. Returns False if any failed.
+    """
+    timings = []
+    ok = True
+    for name, phase in PHASES:
+        started = time.perf_counter()
+        try:
+            phase()
+        except Exception as e:
+            logger.warning(f"[migration] {name} failed: {e}")
+            ok = False
+        timings.append(f"{name} {(time.perf_counter() - started) * 1000:.0f}ms")
+    logger.info(f"[migration] {' | '.join(timings)}")
+    return ok
+
+
+if __name__ == "__main__":
+    import sys
+    from app.utils.logging import setup_logging
+
+    setup_logging(level=os.getenv("LOG_LEVEL", "INFO"), json_format=os.getenv("ENVIRONMENT") == "production")
+    sys.exit(0 if migrate() else 1)
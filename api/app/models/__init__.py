@@ -1,18 +1,21 @@
 from app.models.user import User
 from app.models.workflow import Workflow
-from app.models.execution import Execution, ExecutionNode
+from app.models.execution import Execution, ExecutionNode, ExecutionArchive
 from app.models.approval import Approval
 from app.models.connection import Connection
 from app.models.template import Template
 from app.models.audit_log import AuditLog
 from app.models.chat import ChatMessage, ChatConversation
 from app.models.knowledge import KnowledgeEntry
+from app.models.idempotency import IdempotencyKey
+from app.models.metrics import DailyMetric
 
 __all__ = [
     "User",
     "Workflow", 
     "Execution",
     "ExecutionNode",
+    "ExecutionArchive",
     "Approval",
     "Connection",
     "Template",
@@ -20,4 +23,6 @@ __all__ = [
     "ChatMessage",
     "ChatConversation",
     "KnowledgeEntry",
+    "IdempotencyKey",
+    "DailyMetric",
 ]
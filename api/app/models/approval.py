@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -20,4 +20,10 @@ class Approval(Base):
     rejection_reason = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_approvals_execution_id", execution_id),
+        # Approval inbox: pending first-page and keyset seeks, newest first
+        Index("ix_approvals_status_created_at", status, created_at),
+    )
+    
     execution = relationship("Execution", back_populates="approvals")
@@ -2,11 +2,11 @@
 Audit log model for tracking user actions and system events.
 Important for security, compliance, and debugging.
 """
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, JSON
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 import uuid
 
-from app.database import Base
+from app.database import Base, JSONType
 
 
 class AuditLog(Base):
@@ -37,7 +37,7 @@ class AuditLog(Base):
     resource_id = Column(String(50), nullable=True)  # The ID of the affected resource
     
     # Details - use JSON for SQLite compatibility, JSONB for PostgreSQL
-    details = Column(JSON, nullable=True)
+    details = Column(JSONType, nullable=True)
     
     # Status
     status = Column(String(20), default="success")  # success, failure, pending
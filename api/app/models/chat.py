@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, String, DateTime, Text, Integer, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -15,6 +15,14 @@ class ChatConversation(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_archived = Column(Boolean, default=False)
+    # Denormalized for the conversation list; kept in step by agentic_chat._save_message
+    message_count = Column(Integer, default=0, nullable=False, server_default="0")
+    last_message_preview = Column(String(100), nullable=True)
+    last_role = Column(String(20), nullable=True)
+
+    __table_args__ = (
+        Index("ix_chat_conversations_user_id_updated_at", user_id, updated_at.desc()),
+    )
 
     messages = relationship("ChatMessage", back_populates="conversation", order_by="ChatMessage.created_at")
 
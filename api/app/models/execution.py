@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Integer, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
-from app.database import Base
+from app.database import Base, JSONType, json_text
 
 
 class Execution(Base):
@@ -17,7 +17,18 @@ class Execution(Base):
     started_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     current_node_id = Column(String, nullable=True)
-    trigger_data = Column(JSON, nullable=True)
+    trigger_data = Column(JSONType, nullable=True)
+    compacted_at = Column(DateTime, nullable=True)  # Payloads moved to execution_archives
+    
+    __table_args__ = (
+        # Run history per workflow, newest first; also serves trigger dedup lookups
+        Index("ix_executions_workflow_id_started_at", workflow_id, started_at.desc()),
+        # Email trigger dedup: "has this workflow already run for message X?"
+        Index(
+            "ix_executions_workflow_id_message_id",
+            workflow_id, json_text(trigger_data, "message_id", "postgresql"),
+        ).ddl_if(dialect="postgresql"),
+    )
     
     workflow = relationship("Workflow", back_populates="executions")
     execution_nodes = relationship("ExecutionNode", back_populates="execution", cascade="all, delete-orphan")
@@ -33,11 +44,31 @@ class ExecutionNode(Base):
     node_type = Column(String, nullable=False)
     node_label = Column(String, nullable=True)
     status = Column(String, default="pending")
-    input_data = Column(JSON, nullable=True)
-    output_data = Column(JSON, nullable=True)
+    input_data = Column(JSONType, nullable=True)
+    output_data = Column(JSONType, nullable=True)
     logs = Column(Text, nullable=True)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
     duration_ms = Column(Integer, nullable=True)
     
+    __table_args__ = (
+        Index("ix_execution_nodes_execution_id", execution_id),
+    )
+    
     execution = relationship("Execution", back_populates="execution_nodes")
+
+
+class ExecutionArchive(Base):
+    """
+    Compressed payloads of a compacted execution.
+    
+    The retention job moves trigger_data and every node's input/output/logs
+    here (zlib-compressed JSON) and leaves the execution and node rows as
+    summaries. Deleted together with the execution at the history horizon.
+    """
+    __tablename__ = "execution_archives"
+    
+    execution_id = Column(String(36), ForeignKey("executions.id"), primary_key=True)
+    payload = Column(LargeBinary, nullable=False)
+    original_size = Column(Integer, nullable=True)  # Bytes of JSON before compression
+    archived_at = Column(DateTime, default=datetime.utcnow)
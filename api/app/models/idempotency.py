@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, DateTime, Integer, JSON, Index
+from datetime import datetime
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """A processed (or in-flight) request, used to drop provider retries."""
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String(128), primary_key=True)
+    response = Column(JSON, nullable=True)  # NULL while the first request is still in flight
+    status_code = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
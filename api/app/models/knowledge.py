@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -18,4 +18,9 @@ class KnowledgeEntry(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # Knowledge context is read per user, highest priority first
+        Index("ix_knowledge_entries_user_id_priority", user_id, priority.desc()),
+    )
+    
     user = relationship("User", backref="knowledge_entries")
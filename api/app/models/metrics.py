@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Date, DateTime, Integer
+from datetime import datetime
+
+from app.database import Base
+
+
+class DailyMetric(Base):
+    """
+    One rolled-up platform metric for one day, read by the admin dashboard.
+    
+    metric is e.g. "signups", "executions", "messages" or "dau"; for "mau"
+    the row is per month and day is the first of that month. Filled by
+    app.services.metrics_rollup.
+    """
+    __tablename__ = "daily_metrics"
+    
+    metric = Column(String(32), primary_key=True)
+    day = Column(Date, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
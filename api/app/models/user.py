@@ -14,6 +14,9 @@ TRIAL_LIMITS = {
     "max_knowledge_entries": 3,
     "allow_agent_tasks": False,
     "allow_file_import": False,
+    # Run history retention: full payloads/logs, then summaries only, then deleted
+    "execution_detail_days": 7,
+    "execution_history_days": 30,
 }
 
 # Paid plan (no limits enforced in code for now)
@@ -23,6 +26,8 @@ PAID_LIMITS = {
     "max_knowledge_entries": 999,
     "allow_agent_tasks": True,
     "allow_file_import": True,
+    "execution_detail_days": 30,
+    "execution_history_days": 365,
 }
 
 
@@ -80,5 +85,7 @@ class User(Base):
                 "max_knowledge_entries": 0,
                 "allow_agent_tasks": False,
                 "allow_file_import": False,
+                "execution_detail_days": TRIAL_LIMITS["execution_detail_days"],
+                "execution_history_days": TRIAL_LIMITS["execution_history_days"],
             }
         return PAID_LIMITS
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
-from app.database import Base
+from app.database import Base, JSONType
 
 
 class Workflow(Base):
@@ -14,12 +14,21 @@ class Workflow(Base):
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     summary = Column(String, nullable=True)
-    nodes = Column(JSON, default=list)
+    nodes = Column(JSONType, default=list)
     edges = Column(JSON, default=list)
     is_active = Column(Boolean, default=False)
     is_agent_task = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        Index("ix_workflows_user_id_is_active", user_id, is_active),
+        # Trigger discovery: nodes @> '[{"type": "start_schedule"}]'
+        Index(
+            "ix_workflows_nodes", nodes,
+            postgresql_using="gin", postgresql_ops={"nodes": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     user = relationship("User", back_populates="workflows")
     executions = relationship("Execution", back_populates="workflow", cascade="all, delete-orphan")
@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func, case, distinct
 from datetime import datetime, timedelta
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User
 from app.models.workflow import Workflow
 from app.models.execution import Execution, ExecutionNode
@@ -16,6 +16,9 @@ from app.models.connection import Connection
 from app.models.knowledge import KnowledgeEntry
 from app.models.audit_log import AuditLog
 from app.routers.auth import get_current_user
+from app.services.webhook_routing import invalidate_user_routes
+from app.services.user_cache import invalidate_user
+from app.services.metrics_rollup import read_trends
 
 router = APIRouter()
 
@@ -29,7 +32,7 @@ def require_admin(current_user: User = Depends(get_current_user)) -> User:
 @router.get("/stats")
 async def get_stats(
     admin: User = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """High-level platform stats for the admin dashboard."""
     now = datetime.utcnow()
@@ -95,58 +98,8 @@ async def get_stats(
         ChatMessage.created_at >= week_ago
     ).scalar() or 0
 
-    # --- Signups over last 30 days (daily) ---
-    signup_trend = []
-    for i in range(30):
-        day_start = (now - timedelta(days=29 - i)).replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        count = db.query(func.count(User.id)).filter(
-            User.created_at >= day_start, User.created_at < day_end
-        ).scalar() or 0
-        signup_trend.append({"date": day_start.strftime("%Y-%m-%d"), "count": count})
-
-    # --- Executions over last 30 days (daily) ---
-    exec_trend = []
-    for i in range(30):
-        day_start = (now - timedelta(days=29 - i)).replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        count = db.query(func.count(Execution.id)).filter(
-            Execution.started_at >= day_start, Execution.started_at < day_end
-        ).scalar() or 0
-        exec_trend.append({"date": day_start.strftime("%Y-%m-%d"), "count": count})
-
-    # --- DAU trend (last 30 days) ---
-    dau_trend = []
-    for i in range(30):
-        day_start = (now - timedelta(days=29 - i)).replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        chat_users = db.query(func.count(distinct(ChatMessage.user_id))).filter(
-            ChatMessage.created_at >= day_start, ChatMessage.created_at < day_end
-        ).scalar() or 0
-        exec_users = db.query(func.count(distinct(Workflow.user_id))).join(
-            Execution, Execution.workflow_id == Workflow.id
-        ).filter(Execution.started_at >= day_start, Execution.started_at < day_end).scalar() or 0
-        dau_trend.append({"date": day_start.strftime("%Y-%m-%d"), "count": max(chat_users, exec_users)})
-
-    # --- MAU trend (last 12 months) ---
-    mau_trend = []
-    for i in range(12):
-        # Go back i months from current month
-        month_offset = 11 - i
-        year = now.year
-        month = now.month - month_offset
-        while month <= 0:
-            month += 12
-            year -= 1
-        month_start = datetime(year, month, 1)
-        if month == 12:
-            month_end = datetime(year + 1, 1, 1)
-        else:
-            month_end = datetime(year, month + 1, 1)
-        active_users = db.query(func.count(distinct(ChatMessage.user_id))).filter(
-            ChatMessage.created_at >= month_start, ChatMessage.created_at < month_end
-        ).scalar() or 0
-        mau_trend.append({"date": month_start.strftime("%Y-%m"), "count": active_users})
+    # --- Trends (30 days daily, MAU 12 months) from the daily_metrics rollup ---
+    trends = read_trends(db, now)
 
     # --- MAU current ---
     month_start_current = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
@@ -154,16 +107,6 @@ async def get_stats(
         ChatMessage.created_at >= month_start_current
     ).scalar() or 0
 
-    # --- Messages trend (last 30 days) ---
-    messages_trend = []
-    for i in range(30):
-        day_start = (now - timedelta(days=29 - i)).replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        count = db.query(func.count(ChatMessage.id)).filter(
-            ChatMessage.created_at >= day_start, ChatMessage.created_at < day_end
-        ).scalar() or 0
-        messages_trend.append({"date": day_start.strftime("%Y-%m-%d"), "count": count})
-
     return {
         "users": {
             "total": total_users,
@@ -201,20 +144,14 @@ async def get_stats(
         "knowledge": {
             "total": total_knowledge,
         },
-        "trends": {
-            "signups_30d": signup_trend,
-            "executions_30d": exec_trend,
-            "dau_30d": dau_trend,
-            "mau_12m": mau_trend,
-            "messages_30d": messages_trend,
-        },
+        "trends": trends,
     }
 
 
 @router.get("/users")
 async def list_users(
     admin: User = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """List all users with their usage stats."""
     users = db.query(User).order_by(User.created_at.desc()).all()
@@ -252,7 +189,7 @@ async def list_users(
 @router.get("/recent-activity")
 async def recent_activity(
     admin: User = Depends(require_admin),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 50,
 ):
     """Recent executions with user + workflow info."""
@@ -305,6 +242,9 @@ async def bootstrap_admin(
     if not allowed:
         raise HTTPException(status_code=403, detail="Not authorized to become admin")
 
-    current_user.is_admin = True
+    user = db.query(User).filter(User.id == current_user.id).first()
+    user.is_admin = True
     db.commit()
+    invalidate_user_routes(user.id)
+    invalidate_user(user.id)
     return {"message": "Admin access granted", "email": current_user.email}
@@ -1,44 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional
 from datetime import datetime
+import asyncio
+import copy
+import json
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import Approval, Execution, Workflow, User
-from app.schemas import ApprovalResponse, ApprovalAction
+from app.schemas import ApprovalResponse, ApprovalPage, ApprovalAction, BulkApprovalAction
 from app.routers.auth import get_current_user
+from app.services.execution_dispatcher import dispatch_resume
 from app.services.workflow_runner import WorkflowRunner
+from app.services.connection_cache import get_user_connections_async, connected_credentials
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter()
 
+# _enrich_approval reads approval.execution.workflow; async sessions can't lazy-load it.
+# One IN query per level for the whole page, and only the columns it reads
+# (not each execution's trigger_data).
+_WITH_WORKFLOW = (
+    selectinload(Approval.execution).load_only(Execution.id, Execution.workflow_id)
+    .selectinload(Execution.workflow).load_only(Workflow.id, Workflow.name, Workflow.nodes)
+)
 
-@router.get("/", response_model=List[ApprovalResponse])
+
+@router.get("/", response_model=ApprovalPage)
 async def list_approvals(
     status_filter: Optional[str] = None,
+    execution_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Approval).join(Execution).join(Workflow).filter(
+    """
+    The approval inbox, newest first.
+    
+    Keyset-paginated on (created_at, id): pass next_cursor back as ?cursor=
+    for the next page.
+    """
+    query = select(Approval).join(Execution).join(Workflow).filter(
         Workflow.user_id == current_user.id
-    )
+    ).options(_WITH_WORKFLOW)
     
     if status_filter:
         query = query.filter(Approval.status == status_filter)
+    if execution_id:
+        query = query.filter(Approval.execution_id == execution_id)
+    if cursor:
+        created_at, approval_id = decode_cursor(cursor)
+        query = query.filter(
+            Approval.created_at <= created_at,
+            or_(Approval.created_at < created_at, Approval.id < approval_id),
+        )
+    
+    result = await db.execute(
+        query.order_by(Approval.created_at.desc(), Approval.id.desc()).limit(limit + 1)
+    )
+    approvals = result.scalars().all()
     
-    approvals = query.order_by(Approval.created_at.desc()).all()
-    return [_enrich_approval(a, db) for a in approvals]
+    # For-each campaigns put hundreds of approvals on one workflow: index its nodes once
+    node_indexes: Dict[str, dict] = {}
+    items = [_enrich_approval(a, node_indexes) for a in approvals[:limit]]
+    next_cursor = None
+    if len(approvals) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return ApprovalPage(items=items, next_cursor=next_cursor)
+
+
+@router.get("/count")
+async def count_approvals(
+    status_filter: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """How many approvals match (the inbox itself is paginated)."""
+    query = select(func.count(Approval.id)).join(Execution).join(Workflow).filter(
+        Workflow.user_id == current_user.id
+    )
+    if status_filter:
+        query = query.filter(Approval.status == status_filter)
+    return {"count": (await db.execute(query)).scalar_one()}
 
 
 @router.get("/{approval_id}", response_model=ApprovalResponse)
 async def get_approval(
     approval_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    approval = db.query(Approval).join(Execution).join(Workflow).filter(
-        Approval.id == approval_id,
-        Workflow.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Approval).join(Execution).join(Workflow).filter(
+            Approval.id == approval_id,
+            Workflow.user_id == current_user.id
+        ).options(_WITH_WORKFLOW)
+    )
+    approval = result.scalars().first()
     
     if not approval:
         raise HTTPException(
@@ -46,10 +109,34 @@ async def get_approval(
             detail="Approval not found"
         )
     
-    return _enrich_approval(approval, db)
+    return _enrich_approval(approval)
+
+
+# Friendly node type labels
+_TYPE_LABELS = {
+    "send_email": "Send Email",
+    "stripe_create_payment_link": "Create Payment Link",
+    "stripe_create_invoice": "Create Invoice",
+    "stripe_send_invoice": "Send Invoice",
+    "twilio_send_sms": "Send SMS",
+    "twilio_send_whatsapp": "Send WhatsApp",
+    "twilio_make_call": "Make Phone Call",
+    "mailchimp_send_campaign": "Send Campaign",
+    "ai_reply": "AI Reply",
+}
+
+
+def _node_index(workflow: Optional[Workflow], cache: Dict[str, dict]) -> dict:
+    """{node_id: node} for a workflow, built once per workflow and reused across rows."""
+    if workflow is None:
+        return {}
+    index = cache.get(workflow.id)
+    if index is None:
+        index = cache[workflow.id] = {node.get("id"): node for node in workflow.nodes or []}
+    return index
 
 
-def _enrich_approval(approval: Approval, db: Session) -> ApprovalResponse:
+def _enrich_approval(approval: Approval, node_indexes: Optional[Dict[str, dict]] = None) -> ApprovalResponse:
     """Add workflow context, node type, and friendly labels to approval responses."""
     execution = approval.execution
     workflow = execution.workflow if execution else None
@@ -57,26 +144,12 @@ def _enrich_approval(approval: Approval, db: Session) -> ApprovalResponse:
     # Find the node in the workflow to get type and label
     node_type = None
     step_label = None
-    if workflow and workflow.nodes:
-        for node in workflow.nodes:
-            if node.get("id") == approval.node_id:
-                node_type = node.get("type", "unknown")
-                step_label = node.get("label", node_type)
-                break
-    
-    # Build friendly node type label
-    type_labels = {
-        "send_email": "Send Email",
-        "stripe_create_payment_link": "Create Payment Link",
-        "stripe_create_invoice": "Create Invoice",
-        "stripe_send_invoice": "Send Invoice",
-        "twilio_send_sms": "Send SMS",
-        "twilio_send_whatsapp": "Send WhatsApp",
-        "twilio_make_call": "Make Phone Call",
-        "mailchimp_send_campaign": "Send Campaign",
-        "ai_reply": "AI Reply",
-    }
-    friendly_type = type_labels.get(node_type, step_label or node_type or "Action")
+    node = _node_index(workflow, node_indexes if node_indexes is not None else {}).get(approval.node_id)
+    if node:
+        node_type = node.get("type", "unknown")
+        step_label = node.get("label", node_type)
+    
+    friendly_type = _TYPE_LABELS.get(node_type, step_label or node_type or "Action")
     
     return ApprovalResponse(
         id=approval.id,
@@ -147,3 +220,104 @@ async def action_approval(
     
     db.refresh(approval)
     return ApprovalResponse.model_validate(approval)
+
+
+@router.post("/bulk-action", response_class=StreamingResponse)
+async def bulk_action_approvals(
+    action_data: BulkApprovalAction,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Approve or reject every pending approval matching the filters (ids,
+    execution, node) in one call, e.g. all rows of a for-each run.
+    
+    The approvals are claimed with one UPDATE, so a concurrent single action
+    can't run a step twice. On approve, the owner's connections are loaded once
+    and each execution resumes on the worker pool (executions in parallel, an
+    execution's own steps in order). Progress streams as SSE events: start,
+    one execution event per resumed execution, then complete.
+    """
+    if action_data.action not in ("approve", "reject"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid action. Use 'approve' or 'reject'"
+        )
+    if not (action_data.approval_ids or action_data.execution_id or action_data.node_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Filter by approval_ids, execution_id or node_id"
+        )
+    
+    owned_executions = select(Execution.id).join(Workflow).where(Workflow.user_id == current_user.id)
+    filters = [Approval.status == "pending", Approval.execution_id.in_(owned_executions)]
+    if action_data.approval_ids:
+        filters.append(Approval.id.in_(action_data.approval_ids))
+    if action_data.execution_id:
+        filters.append(Approval.execution_id == action_data.execution_id)
+    if action_data.node_id:
+        filters.append(Approval.node_id == action_data.node_id)
+    
+    now = datetime.utcnow()
+    if action_data.action == "approve":
+        values = {"status": "approved", "approved_by": current_user.id, "approved_at": now}
+    else:
+        values = {"status": "rejected", "rejection_reason": action_data.rejection_reason, "approved_at": now}
+    claimed = (await db.execute(
+        update(Approval).where(*filters).values(**values).returning(Approval.id)
+    )).scalars().all()
+    
+    # Oldest first within each execution, matching the order the steps paused in
+    by_execution: Dict[str, List[str]] = {}
+    if claimed:
+        rows = (await db.execute(
+            select(Approval.id, Approval.execution_id)
+            .where(Approval.id.in_(claimed))
+            .order_by(Approval.created_at)
+        )).all()
+        for approval_id, execution_id in rows:
+            by_execution.setdefault(execution_id, []).append(approval_id)
+    
+    connections = None
+    if action_data.action == "reject" and by_execution:
+        await db.execute(
+            update(Execution).where(Execution.id.in_(list(by_execution))).values(status="failed")
+        )
+    elif by_execution:
+        connections = connected_credentials(await get_user_connections_async(db, current_user.id))
+    await db.commit()
+    
+    async def generate_progress():
+        total = len(by_execution)
+        yield f"data: {json.dumps({'type': 'start', 'action': action_data.action, 'approvals': len(claimed), 'executions': total})}\n\n"
+        
+        statuses: Dict[str, int] = {}
+        if action_data.action == "reject":
+            statuses = {"failed": total} if total else {}
+        else:
+            # Each runner gets its own deep copy: node executors patch refreshed tokens into the credential dicts
+            pending = {
+                asyncio.wrap_future(dispatch_resume(execution_id, approval_ids, copy.deepcopy(connections))): execution_id
+                for execution_id, approval_ids in by_execution.items()
+            }
+            done_count = 0
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    execution_id = pending.pop(future)
+                    execution_status = future.result()
+                    statuses[execution_status] = statuses.get(execution_status, 0) + 1
+                    done_count += 1
+                    yield f"data: {json.dumps({'type': 'execution', 'execution_id': execution_id, 'status': execution_status, 'approvals': len(by_execution[execution_id]), 'completed': done_count, 'total': total})}\n\n"
+        
+        yield f"data: {json.dumps({'type': 'complete', 'action': action_data.action, 'approvals': len(claimed), 'executions': statuses})}\n\n"
+    
+    return StreamingResponse(
+        generate_progress(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
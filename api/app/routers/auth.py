@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from pydantic import BaseModel as PydanticBaseModel
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.schemas import UserCreate, UserLogin, UserResponse, Token
 from app.schemas.user import UserUpdate
 from app.services.auth_service import (
@@ -15,6 +16,7 @@ from app.services.auth_service import (
     get_user_by_id,
     decode_token
 )
+from app.services.user_cache import get_cached_user, cache_user, invalidate_user
 from app.config import get_settings
 from app.models import User
 
@@ -23,10 +25,18 @@ security = HTTPBearer()
 settings = get_settings()
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
+    """
+    Resolve the bearer token to a User without blocking the event loop.
+    
+    The returned user is detached from any session. Endpoints that change
+    the user must load it on their own session first (get_user_by_id), and
+    call invalidate_user() after committing: users are served from
+    user_cache for a few seconds.
+    """
     token = credentials.credentials
     payload = decode_token(token)
     if payload is None:
@@ -42,13 +52,19 @@ def get_current_user(
             detail="Invalid token payload"
         )
     
-    user = get_user_by_id(db, user_id)
+    iat = payload.get("iat") or 0  # Tokens issued before iat was added
+    user = get_cached_user(user_id, iat)
+    if user is not None:
+        return user
+
+    user = await db.get(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
     
+    cache_user(user, iat)
     return user
 
 
@@ -107,6 +123,7 @@ async def verify_email(token: str, db: Session = Depends(get_db)):
     user.email_verified = True
     user.verification_token = None
     db.commit()
+    invalidate_user(user.id)
     
     return {"message": "Email verified successfully", "email": user.email}
 
@@ -122,10 +139,11 @@ async def resend_verification(
     
     from app.services.email_verification import generate_verification_token, send_verification_email
     token = generate_verification_token()
-    current_user.verification_token = token
+    user = get_user_by_id(db, current_user.id)
+    user.verification_token = token
     db.commit()
     
-    sent = send_verification_email(current_user.email, current_user.full_name, token)
+    sent = send_verification_email(user.email, user.full_name, token)
     if not sent:
         raise HTTPException(status_code=500, detail="Failed to send verification email. Please try again later.")
     
@@ -196,13 +214,15 @@ async def update_me(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    user = get_user_by_id(db, current_user.id)
     for field, value in update_data.model_dump(exclude_unset=True).items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
     db.commit()
-    db.refresh(current_user)
+    invalidate_user(user.id)
+    db.refresh(user)
     
-    return UserResponse.model_validate(current_user)
+    return UserResponse.model_validate(user)
 
 
 @router.get("/me/usage")
@@ -5,12 +5,14 @@ Chat API Router — Conversations, streaming, history
 import json
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_db, get_async_read_db
 from app.models import Execution, Workflow, User
 from app.models.chat import ChatMessage as ChatMessageModel, ChatConversation
 from app.routers.auth import get_current_user
@@ -42,11 +44,11 @@ class ChatResponse(BaseModel):
 async def list_conversations(
     limit: int = Query(20, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """List user's conversations, most recent first."""
-    convos = (
-        db.query(ChatConversation)
+    """List user's conversations, most recent first. Counters are denormalized onto the row."""
+    convos = (await db.execute(
+        select(ChatConversation)
         .filter(
             ChatConversation.user_id == current_user.id,
             ChatConversation.is_archived == False,
@@ -54,30 +56,19 @@ async def list_conversations(
         )
         .order_by(ChatConversation.updated_at.desc())
         .limit(limit)
-        .all()
-    )
-    result = []
-    for c in convos:
-        # Get message count and last message preview
-        msgs = (
-            db.query(ChatMessageModel)
-            .filter(ChatMessageModel.conversation_id == c.id)
-            .order_by(ChatMessageModel.created_at.desc())
-            .limit(1)
-            .all()
-        )
-        last_msg = msgs[0] if msgs else None
-        msg_count = db.query(ChatMessageModel).filter(ChatMessageModel.conversation_id == c.id).count()
-        result.append({
+    )).scalars().all()
+    return [
+        {
             "id": c.id,
             "title": c.title,
             "created_at": c.created_at.isoformat(),
             "updated_at": c.updated_at.isoformat(),
-            "message_count": msg_count,
-            "last_message": last_msg.content[:100] if last_msg else None,
-            "last_role": last_msg.role if last_msg else None,
-        })
-    return result
+            "message_count": c.message_count or 0,
+            "last_message": c.last_message_preview,
+            "last_role": c.last_role,
+        }
+        for c in convos
+    ]
 
 
 @router.post("/conversations")
@@ -133,21 +124,22 @@ async def get_conversation_messages(
     conversation_id: str,
     limit: int = Query(50, ge=1, le=200),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get messages for a conversation with full metadata."""
-    convo = db.query(ChatConversation).filter(
-        ChatConversation.id == conversation_id, ChatConversation.user_id == current_user.id
-    ).first()
+    convo = (await db.execute(
+        select(ChatConversation).filter(
+            ChatConversation.id == conversation_id, ChatConversation.user_id == current_user.id
+        )
+    )).scalars().first()
     if not convo:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    messages = (
-        db.query(ChatMessageModel)
+    messages = list((await db.execute(
+        select(ChatMessageModel)
         .filter(ChatMessageModel.conversation_id == conversation_id)
         .order_by(ChatMessageModel.created_at.desc())
         .limit(limit)
-        .all()
-    )
+    )).scalars().all())
     messages.reverse()
     return [
         {
@@ -8,6 +8,7 @@ from app.database import get_db
 from app.models import Connection, User
 from app.schemas import ConnectionCreate, ConnectionResponse
 from app.routers.auth import get_current_user
+from app.services.connection_cache import invalidate_connections
 from app.services.oauth_service import (
     get_authorization_url,
     exchange_code_for_tokens,
@@ -168,6 +169,7 @@ async def oauth_callback(
         db.add(connection)
     
     db.commit()
+    invalidate_connections(user_id)
     
     return RedirectResponse(
         url=f"{FRONTEND_URL}/oauth-callback?success={provider}"
@@ -199,6 +201,7 @@ async def create_connection(
         existing.credentials = connection_data.credentials
         existing.is_connected = True
         db.commit()
+        invalidate_connections(current_user.id)
         db.refresh(existing)
         return ConnectionResponse.model_validate(existing)
     
@@ -211,6 +214,7 @@ async def create_connection(
     )
     db.add(connection)
     db.commit()
+    invalidate_connections(current_user.id)
     db.refresh(connection)
     
     return ConnectionResponse.model_validate(connection)
@@ -235,6 +239,7 @@ async def delete_connection(
     
     db.delete(connection)
     db.commit()
+    invalidate_connections(current_user.id)
     
     return {"message": "Connection deleted"}
 
@@ -293,9 +298,10 @@ async def test_connection(
                         new_token = refresh_resp.json().get("access_token")
                         if new_token:
                             # Persist the refreshed token
-                            creds["access_token"] = new_token
-                            connection.credentials = creds
+                            # A new dict: reassigning the loaded one in place isn't saved
+                            connection.credentials = {**creds, "access_token": new_token}
                             db.commit()
+                            invalidate_connections(current_user.id)
                             resp = await _test_google_token(new_token)
                 
                 if resp.status_code == 200:
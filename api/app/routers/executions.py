@@ -1,39 +1,79 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from datetime import datetime
+from typing import Optional
 import asyncio
 import json
 
-from app.database import get_db, SessionLocal
-from app.models import Execution, ExecutionNode, Workflow, User
-from app.schemas import ExecutionCreate, ExecutionResponse
+from app.database import get_db, get_async_read_db, SessionLocal, AsyncSessionLocal
+from app.models import Execution, ExecutionNode, ExecutionArchive, Workflow, User
+from app.schemas import ExecutionCreate, ExecutionResponse, ExecutionSummary, ExecutionPage
 from app.routers.auth import get_current_user
 from app.services.workflow_runner import WorkflowRunner
+from app.services.execution_retention import unpack_payloads
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[ExecutionResponse])
+ERROR_SNIPPET_CHARS = 200
+
+
+@router.get("/", response_model=ExecutionPage)
 async def list_executions(
     workflow_id: Optional[str] = None,
-    limit: int = 500,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    query = db.query(Execution).join(Workflow).filter(Workflow.user_id == current_user.id)
+    """
+    Run history, newest first, as lightweight summaries.
+    
+    Keyset-paginated on (started_at, id): pass next_cursor back as ?cursor=
+    for the next page. Trigger data and node payloads are only returned by
+    GET /executions/{id}.
+    """
+    query = (
+        select(
+            Execution.id,
+            Execution.workflow_id,
+            Workflow.name.label("workflow_name"),
+            Execution.status,
+            func.substr(Execution.error, 1, ERROR_SNIPPET_CHARS).label("error"),
+            Execution.is_test,
+            Execution.started_at,
+            Execution.completed_at,
+            Execution.current_node_id,
+        )
+        .join(Workflow, Execution.workflow_id == Workflow.id)
+        .filter(Workflow.user_id == current_user.id)
+    )
     
     if workflow_id:
         query = query.filter(Execution.workflow_id == workflow_id)
     
-    executions = query.order_by(Execution.started_at.desc()).limit(limit).all()
+    if cursor:
+        started_at, execution_id = decode_cursor(cursor)
+        # started_at <= x keeps the range seekable on the (workflow_id, started_at) index
+        query = query.filter(
+            Execution.started_at <= started_at,
+            or_(Execution.started_at < started_at, Execution.id < execution_id),
+        )
+    
+    rows = (await db.execute(
+        query.order_by(Execution.started_at.desc(), Execution.id.desc()).limit(limit + 1)
+    )).all()
     
-    # Ensure workflow relationship is loaded for workflow_name
-    results = []
-    for e in executions:
-        resp = ExecutionResponse.model_validate(e)
-        results.append(resp)
-    return results
+    items = [ExecutionSummary.model_validate(row._mapping) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.started_at, last.id)
+    return ExecutionPage(items=items, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=ExecutionResponse)
@@ -129,22 +169,22 @@ async def create_execution_stream(
         poll_count = 0
         max_polls = 600  # 3 minutes max (600 * 0.3s)
         
-        # Create a separate session for polling - don't use the request's db session
-        poll_db = SessionLocal()
-        try:
+        # Poll on an async session so the 300ms loop never blocks other requests
+        async with AsyncSessionLocal() as poll_db:
             while (thread.is_alive() or last_status not in ['completed', 'failed']) and poll_count < max_polls:
                 await asyncio.sleep(0.3)  # Poll every 300ms
                 poll_count += 1
                 
                 try:
-                    # Query with fresh session
-                    poll_execution = poll_db.query(Execution).filter(Execution.id == execution_uuid).first()
+                    poll_execution = (await poll_db.execute(
+                        select(Execution).filter(Execution.id == execution_uuid)
+                    )).scalars().first()
                     if not poll_execution:
                         break
                     
-                    exec_nodes = poll_db.query(ExecutionNode).filter(
-                        ExecutionNode.execution_id == execution_uuid
-                    ).all()
+                    exec_nodes = (await poll_db.execute(
+                        select(ExecutionNode).filter(ExecutionNode.execution_id == execution_uuid)
+                    )).scalars().all()
                     
                     # Send updates for newly completed/waiting nodes
                     for node in exec_nodes:
@@ -161,24 +201,24 @@ async def create_execution_stream(
                         yield f"data: {json.dumps({'type': 'complete', 'execution_id': execution_id, 'status': 'paused', 'pending_approvals': pending_count})}\n\n"
                         break
                     
-                    # Expire objects so next query gets fresh data
-                    poll_db.expire_all()
+                    # End the read transaction so the next poll sees fresh rows
+                    await poll_db.rollback()
                 except Exception as e:
                     print(f"[StreamExecution] Poll error: {e}")
                     break
             
-            # Wait for thread to finish
-            thread.join(timeout=5.0)
+            # Wait for thread to finish without holding the event loop
+            await asyncio.to_thread(thread.join, 5.0)
             
             # Get final status
-            poll_db.expire_all()
-            final_execution = poll_db.query(Execution).filter(Execution.id == execution_uuid).first()
+            await poll_db.rollback()
+            final_execution = (await poll_db.execute(
+                select(Execution).filter(Execution.id == execution_uuid)
+            )).scalars().first()
             final_status = final_execution.status if final_execution else "failed"
             
             # Send final completion event
             yield f"data: {json.dumps({'type': 'complete', 'execution_id': execution_id, 'status': final_status})}\n\n"
-        finally:
-            poll_db.close()
     
     return StreamingResponse(
         generate_progress(),
@@ -195,12 +235,15 @@ async def create_execution_stream(
 async def get_execution(
     execution_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    execution = db.query(Execution).join(Workflow).filter(
-        Execution.id == execution_id,
-        Workflow.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Execution).join(Workflow).filter(
+            Execution.id == execution_id,
+            Workflow.user_id == current_user.id
+        ).options(selectinload(Execution.workflow), selectinload(Execution.execution_nodes))
+    )
+    execution = result.scalars().first()
     
     if not execution:
         raise HTTPException(
@@ -208,4 +251,18 @@ async def get_execution(
             detail="Execution not found"
         )
     
-    return ExecutionResponse.model_validate(execution)
+    response = ExecutionResponse.model_validate(execution)
+    
+    # Compacted runs keep their payloads in the archive; restore them for the detail view
+    if execution.compacted_at:
+        archive = await db.get(ExecutionArchive, execution.id)
+        if archive:
+            payloads = unpack_payloads(archive.payload)
+            response.trigger_data = payloads.get("trigger_data")
+            for node in response.execution_nodes:
+                archived = payloads.get("nodes", {}).get(node.id, {})
+                node.input_data = archived.get("input_data")
+                node.output_data = archived.get("output_data")
+                node.logs = archived.get("logs")
+    
+    return response
@@ -4,10 +4,11 @@ from typing import List, Optional
 import json
 import logging
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import KnowledgeEntry, User
 from app.schemas import KnowledgeCreate, KnowledgeUpdate, KnowledgeResponse, VALID_CATEGORIES
 from app.routers.auth import get_current_user
+from app.services.knowledge_service import invalidate_knowledge_context
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -34,7 +35,7 @@ async def list_categories():
 async def list_knowledge(
     category: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(KnowledgeEntry).filter(KnowledgeEntry.user_id == current_user.id)
     if category:
@@ -61,6 +62,7 @@ async def create_knowledge(
     )
     db.add(entry)
     db.commit()
+    invalidate_knowledge_context(current_user.id)
     db.refresh(entry)
     return KnowledgeResponse.model_validate(entry)
 
@@ -91,6 +93,7 @@ async def update_knowledge(
         entry.priority = data.priority
     
     db.commit()
+    invalidate_knowledge_context(current_user.id)
     db.refresh(entry)
     return KnowledgeResponse.model_validate(entry)
 
@@ -109,6 +112,7 @@ async def delete_knowledge(
         raise HTTPException(status_code=404, detail="Knowledge entry not found")
     db.delete(entry)
     db.commit()
+    invalidate_knowledge_context(current_user.id)
 
 
 MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB
@@ -289,4 +293,5 @@ async def import_knowledge_from_file(
         db.refresh(entry)
         created.append(KnowledgeResponse.model_validate(entry))
 
+    invalidate_knowledge_context(current_user.id)
     return created
@@ -6,7 +6,7 @@ import re
 import json
 import copy
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Template, Workflow, User
 from app.schemas import TemplateResponse, WorkflowResponse
 from app.routers.auth import get_current_user
@@ -175,7 +175,7 @@ class UseTemplateRequest(BaseModel):
 async def list_templates(
     category: Optional[str] = None,
     business_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(Template)
     
@@ -196,7 +196,7 @@ async def list_templates(
 @router.get("/{template_id}", response_model=TemplateResponse)
 async def get_template(
     template_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     template = db.query(Template).filter(Template.id == template_id).first()
     
@@ -212,7 +212,7 @@ async def get_template(
 @router.get("/{template_id}/setup-fields")
 async def get_template_setup_fields(
     template_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get the configurable fields for a template setup wizard."""
     template = db.query(Template).filter(Template.id == template_id).first()
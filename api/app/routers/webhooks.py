@@ -4,65 +4,325 @@ Webhook Router - Handles incoming webhooks and form submissions to trigger workf
 Each workflow with a start_form or start_webhook trigger gets a unique webhook URL.
 External systems (Webflow, Typeform, custom forms) can POST to this URL to trigger the workflow.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy.orm import Session
-from typing import Optional, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Any, Awaitable, Callable, List
+from datetime import datetime
+import asyncio
 import json
 import hmac
 import hashlib
+import uuid
 
-from app.database import get_db
-from app.models import Workflow, User
-from app.services.workflow_runner import WorkflowRunner
+from app.database import get_async_db
+from app.models import Workflow, Execution
+from app.services.execution_dispatcher import dispatch_execution, run_execution
+from app.services.webhook_routing import WebhookRoute, get_webhook_route
+from app.services.trigger_coalescer import trigger_coalescer
+from app.utils.idempotency import idempotency_store, build_webhook_idempotency_key
+from app.utils.validation import validate_webhook_payload
 from app.config import get_settings
 
 router = APIRouter()
 settings = get_settings()
 
-
-@router.post("/trigger/{workflow_id}")
-async def trigger_workflow_webhook(
-    workflow_id: str,
-    request: Request,
-    db: Session = Depends(get_db),
-):
-    """
-    Public webhook endpoint to trigger a workflow.
-    
-    Accepts JSON payload which becomes available as trigger data in the workflow.
-    Can be called from any external form, webhook provider, or API.
+async def _get_active_route(db: AsyncSession, workflow_id: str, require_trigger: bool = True) -> WebhookRoute:
+    """Look up a workflow that is allowed to be triggered by a webhook."""
+    route = await get_webhook_route(db, workflow_id)
     
-    Example: POST /api/webhooks/trigger/abc123
-    Body: {"name": "John", "email": "john@example.com", "message": "Hello!"}
-    """
-    # Find the workflow
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
-    
-    if not workflow:
+    if not route:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Workflow not found"
         )
     
-    if not workflow.is_active:
+    if not route.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Workflow is not active"
         )
     
     # Check if workflow has a form or webhook trigger
-    nodes = workflow.nodes or []
-    has_valid_trigger = any(
-        node.get("type") in ["start_form", "start_webhook"] 
-        for node in nodes
-    )
-    
-    if not has_valid_trigger:
+    if require_trigger and not route.has_webhook_trigger:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Workflow does not have a form or webhook trigger"
         )
     
+    return route
+
+
+def _check_owner_can_run(route: WebhookRoute):
+    """Make sure the workflow owner exists and has runs left on their plan."""
+    if not route.owner_found:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Workflow owner not found"
+        )
+    
+    if route.plan_error:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=route.plan_error
+        )
+
+
+async def _create_execution(db: AsyncSession, workflow_id: str, trigger_data: dict) -> str:
+    """Persist the trigger payload as a new execution and return its id."""
+    execution_id = str(uuid.uuid4())
+    execution = Execution(
+        id=execution_id,
+        workflow_id=workflow_id,
+        status="running",
+        started_at=datetime.utcnow(),
+        trigger_data=trigger_data,
+    )
+    db.add(execution)
+    await db.commit()
+    # No refresh: the id is all the caller needs, so skip the read-back
+    return execution_id
+
+
+async def _create_executions(db: AsyncSession, workflow_id: str, trigger_datas: List[dict]) -> List[str]:
+    """Persist a batch of trigger payloads in one transaction and return their ids."""
+    started_at = datetime.utcnow()
+    execution_ids = [str(uuid.uuid4()) for _ in trigger_datas]
+    db.add_all([
+        Execution(
+            id=execution_id,
+            workflow_id=workflow_id,
+            status="running",
+            started_at=started_at,
+            trigger_data=trigger_data,
+        )
+        for execution_id, trigger_data in zip(execution_ids, trigger_datas)
+    ])
+    await db.commit()
+    return execution_ids
+
+
+def _webhook_metadata(request: Request) -> dict:
+    """Request details stored under trigger_data["_webhook"]."""
+    return {
+        "source_ip": request.client.host if request.client else "unknown",
+        "user_agent": request.headers.get("user-agent", "unknown"),
+        "content_type": request.headers.get("content-type", "unknown"),
+    }
+
+
+def _idempotency_key(
+    workflow_id: str,
+    request: Request,
+    provider: Optional[str] = None,
+    raw_data: Optional[dict] = None,
+) -> Optional[str]:
+    """
+    Pick the dedup key for a delivery.
+    
+    An explicit Idempotency-Key header wins; otherwise use the provider's own
+    event/delivery id so its automatic retries map to the same key.
+    """
+    header_key = request.headers.get("idempotency-key")
+    if header_key:
+        return build_webhook_idempotency_key(workflow_id, "header", header_key)
+    
+    if not provider:
+        return None
+    
+    raw_data = raw_data if isinstance(raw_data, dict) else {}
+    event_id = None
+    if provider == "stripe":
+        event_id = raw_data.get("id")
+    elif provider == "github":
+        event_id = request.headers.get("x-github-delivery")
+    elif provider == "shopify":
+        event_id = request.headers.get("x-shopify-webhook-id")
+    elif provider == "typeform":
+        event_id = raw_data.get("event_id")
+    elif provider == "calendly":
+        payload_uri = (raw_data.get("payload") or {}).get("uri")
+        if payload_uri:
+            event_id = f"{raw_data.get('event', '')}:{payload_uri}"
+    
+    if not event_id:
+        return None
+    return build_webhook_idempotency_key(workflow_id, provider, str(event_id))
+
+
+async def _claim_delivery(idem_key: str, response: Response) -> Optional[dict]:
+    """
+    Reserve the delivery key. Returns None if this request should do the work,
+    or the response to send back for a duplicate delivery.
+    """
+    # The idempotency store is sync (shared with background code), so keep it off the event loop
+    existing = await run_in_threadpool(
+        idempotency_store.claim,
+        idem_key,
+        ttl=settings.webhook_claim_ttl_seconds,
+    )
+    if existing is None:
+        return None
+    
+    if existing.response is None:
+        # First delivery is still being queued
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {
+            "success": True,
+            "duplicate": True,
+            "message": "Duplicate delivery is already being processed",
+        }
+    
+    response.status_code = existing.status_code
+    return {**existing.response, "duplicate": True}
+
+
+async def _renew_claim(idem_key: str):
+    """Extend an in-flight claim every third of its lease until cancelled."""
+    ttl = settings.webhook_claim_ttl_seconds
+    while True:
+        await asyncio.sleep(max(1, ttl // 3))
+        try:
+            await run_in_threadpool(idempotency_store.renew, idem_key, ttl=ttl)
+        except Exception as e:
+            print(f"[Webhook] Failed to renew delivery claim: {e}")
+
+
+async def _run_once(
+    db: AsyncSession,
+    idem_key: Optional[str],
+    response: Response,
+    start: Callable[[], Awaitable[dict]],
+) -> dict:
+    """Run start() once per delivery key, remembering its result for duplicates."""
+    if idem_key:
+        duplicate = await _claim_delivery(idem_key, response)
+        if duplicate is not None:
+            return duplicate
+    
+    # ?wait=true can run longer than the claim's lease: keep it alive meanwhile,
+    # or a provider retry would take the key over and run the workflow again
+    renewal = asyncio.create_task(_renew_claim(idem_key)) if idem_key else None
+    try:
+        result = await start()
+    except BaseException:
+        # Also on cancellation (client disconnect, shutdown), so the sender's
+        # retry isn't told the delivery is still being processed
+        if idem_key:
+            renewal.cancel()
+            await db.rollback()
+            await run_in_threadpool(idempotency_store.release, idem_key)
+        raise
+    finally:
+        if renewal:
+            renewal.cancel()
+    
+    if idem_key:
+        await run_in_threadpool(
+            idempotency_store.set,
+            idem_key,
+            result,
+            status_code=response.status_code or status.HTTP_202_ACCEPTED,
+            ttl=settings.webhook_idempotency_ttl_hours * 3600,
+        )
+    return result
+
+
+async def _coalesce(route: WebhookRoute, trigger_data: dict) -> dict:
+    """Add the event to the workflow's open batch window instead of starting a run."""
+    placement = await trigger_coalescer.add(
+        route.workflow_id,
+        trigger_data,
+        window_seconds=route.batch_window_seconds,
+        max_events=route.batch_max_events,
+    )
+    return {
+        "success": True,
+        "message": "Event added to batch",
+        "status": "batched",
+        **placement,
+    }
+
+
+def _start(db: AsyncSession, route: WebhookRoute, trigger_data: dict, wait: bool, response: Response):
+    """Pick how a single event runs: coalesced into a batch, or as its own execution."""
+    # ?wait=true asks for this event's result, so it never waits in a batch
+    if route.batch_window_seconds and not wait:
+        return lambda: _coalesce(route, trigger_data)
+    return lambda: _trigger_single(db, route.workflow_id, trigger_data, wait, response)
+
+
+async def _trigger_single(
+    db: AsyncSession,
+    workflow_id: str,
+    trigger_data: dict,
+    wait: bool,
+    response: Response,
+) -> dict:
+    """Create one execution and start it."""
+    execution_id = await _create_execution(db, workflow_id, trigger_data)
+    return await _start_execution(execution_id, trigger_data, wait, response)
+
+
+async def _start_execution(
+    execution_id: str,
+    trigger_data: dict,
+    wait: bool,
+    response: Response,
+) -> dict:
+    """Hand the execution to the worker pool, optionally waiting for the result."""
+    if wait:
+        try:
+            run_status = await run_execution(execution_id, trigger_data)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to trigger workflow: {str(e)}"
+            )
+        response.status_code = status.HTTP_200_OK
+        return {
+            "success": run_status != "failed",
+            "message": "Workflow run finished",
+            "execution_id": execution_id,
+            "status": run_status,
+        }
+    
+    dispatch_execution(execution_id, trigger_data)
+    return {
+        "success": True,
+        "message": "Workflow triggered successfully",
+        "execution_id": execution_id,
+        "status": "queued",
+    }
+
+
+@router.post("/trigger/{workflow_id}", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_workflow_webhook(
+    workflow_id: str,
+    request: Request,
+    response: Response,
+    wait: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Public webhook endpoint to trigger a workflow.
+    
+    Accepts JSON payload which becomes available as trigger data in the workflow.
+    Can be called from any external form, webhook provider, or API.
+    
+    The payload is stored and the run is queued, so the sender gets a 202 right
+    away. Pass ?wait=true to block until the run finishes and get its status.
+    Send an Idempotency-Key header to make retries safe: a repeated key returns
+    the original response instead of starting another run.
+    
+    If the trigger node sets batch_window_seconds, events are buffered and run
+    together as one execution over a `rows` list (status "batched").
+    
+    Example: POST /api/webhooks/trigger/abc123
+    Body: {"name": "John", "email": "john@example.com", "message": "Hello!"}
+    """
+    route = await _get_active_route(db, workflow_id)
+    
     # Parse the incoming data
     try:
         content_type = request.headers.get("content-type", "")
@@ -85,60 +345,143 @@ async def trigger_workflow_webhook(
     except Exception as e:
         trigger_data = {}
     
+    if not isinstance(trigger_data, dict):
+        trigger_data = {"data": trigger_data}
+    
     # Add metadata
-    trigger_data["_webhook"] = {
-        "source_ip": request.client.host if request.client else "unknown",
-        "user_agent": request.headers.get("user-agent", "unknown"),
-        "content_type": request.headers.get("content-type", "unknown"),
-    }
+    trigger_data["_webhook"] = _webhook_metadata(request)
+    
+    _check_owner_can_run(route)
+    
+    idem_key = _idempotency_key(workflow_id, request)
+    return await _run_once(db, idem_key, response, _start(db, route, trigger_data, wait, response))
+
+
+def _parse_batch_body(body: bytes, content_type: str) -> List[tuple]:
+    """
+    Split a batch body into (event, error) pairs.
+    
+    Accepts a JSON array, or NDJSON (one JSON event per line) when the
+    content type says so. A bad NDJSON line only rejects that line.
+    """
+    text = body.decode("utf-8", errors="replace")
     
-    # Get the workflow owner
-    owner = db.query(User).filter(User.id == workflow.user_id).first()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except ValueError:
+                items.append((None, f"Invalid JSON on line {line_no}"))
+        return items
     
-    if not owner:
+    try:
+        events = json.loads(text) if text.strip() else []
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Workflow owner not found"
+            detail="Batch body must be a JSON array or NDJSON"
         )
+    if not isinstance(events, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch body must be a JSON array of events"
+        )
+    return [(event, None) for event in events]
+
+
+async def _trigger_batch(db: AsyncSession, workflow_id: str, items: List[tuple], metadata: dict) -> dict:
+    """Validate each event, enqueue the valid ones in one transaction and start them."""
+    results = []
+    accepted = []  # (index, trigger_data)
+    
+    for index, (event, error) in enumerate(items):
+        if error is None:
+            if not isinstance(event, dict):
+                event = {"data": event}
+            try:
+                trigger_data = validate_webhook_payload(event)
+            except ValueError as e:
+                error = str(e)
+        if error:
+            results.append({"index": index, "status": "rejected", "error": error})
+            continue
+        trigger_data["_webhook"] = {**metadata, "batch_index": index}
+        accepted.append((index, trigger_data))
     
+    execution_ids = await _create_executions(db, workflow_id, [td for _, td in accepted]) if accepted else []
+    
+    for (index, trigger_data), execution_id in zip(accepted, execution_ids):
+        dispatch_execution(execution_id, trigger_data)
+        results.append({"index": index, "status": "queued", "execution_id": execution_id})
+    
+    results.sort(key=lambda r: r["index"])
+    return {
+        "success": bool(accepted),
+        "message": f"Queued {len(accepted)} of {len(items)} events",
+        "accepted": len(accepted),
+        "rejected": len(items) - len(accepted),
+        "items": results,
+    }
 
-    # Check plan limits before running
-    from app.services.plan_limits import check_can_run_workflow
-    try:
-        check_can_run_workflow(owner)
-    except Exception as limit_err:
+
+@router.post("/trigger/{workflow_id}/batch", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_workflow_webhook_batch(
+    workflow_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bulk webhook endpoint: one request, one run per event.
+    
+    Send a JSON array of trigger payloads, or NDJSON with
+    Content-Type: application/x-ndjson. Each event is validated on its own;
+    the valid ones are stored in a single transaction and queued. The
+    response lists every event by index with its execution_id, or the
+    reason it was rejected. An Idempotency-Key header covers the whole batch.
+    
+    Example: POST /api/webhooks/trigger/abc123/batch
+    Body: [{"name": "John", "email": "john@example.com"}, {"name": "Jane", "email": "jane@example.com"}]
+    """
+    route = await _get_active_route(db, workflow_id)
+    
+    items = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    
+    if not items:
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=str(getattr(limit_err, 'detail', {}).get('message', 'Plan limit reached'))
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch contains no events"
         )
-    # Run the workflow
-    try:
-        runner = WorkflowRunner(db, workflow, owner)
-        execution = runner.run(trigger_data=trigger_data)
-        
-        return {
-            "success": True,
-            "message": "Workflow triggered successfully",
-            "execution_id": execution.id,
-            "status": execution.status,
-        }
-    except Exception as e:
+    if len(items) > settings.webhook_batch_max_items:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to trigger workflow: {str(e)}"
+            status_code=413,
+            detail=f"Batch has {len(items)} events (max: {settings.webhook_batch_max_items})"
         )
+    
+    _check_owner_can_run(route)
+    
+    idem_key = _idempotency_key(workflow_id, request)
+    metadata = _webhook_metadata(request)
+    return await _run_once(
+        db, idem_key, response,
+        lambda: _trigger_batch(db, route.workflow_id, items, metadata),
+    )
 
 
 @router.get("/url/{workflow_id}")
 async def get_webhook_url(
     workflow_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get the webhook URL for a workflow.
     This URL can be used in external forms, Webflow, Typeform, etc.
     """
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
+    workflow = await db.get(Workflow, workflow_id)
     
     if not workflow:
         raise HTTPException(
@@ -151,6 +494,7 @@ async def get_webhook_url(
     
     return {
         "webhook_url": webhook_url,
+        "batch_webhook_url": f"{webhook_url}/batch",
         "method": "POST",
         "content_types": ["application/json", "application/x-www-form-urlencoded", "multipart/form-data"],
         "example_curl": f'curl -X POST "{webhook_url}" -H "Content-Type: application/json" -d \'{{"name": "John", "email": "john@example.com"}}\'',
@@ -160,16 +504,19 @@ async def get_webhook_url(
             "custom_html": f'<form action="{webhook_url}" method="POST">...</form>',
             "zapier": "Use this URL as a webhook destination in Zapier",
             "api": "POST JSON data to this URL from any API or script",
+            "bulk": "POST a JSON array or NDJSON of events to the batch URL to queue many runs in one request",
         }
     }
 
 
-@router.post("/external/{provider}/{workflow_id}")
+@router.post("/external/{provider}/{workflow_id}", status_code=status.HTTP_202_ACCEPTED)
 async def handle_external_webhook(
     provider: str,
     workflow_id: str,
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    wait: bool = False,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Handle webhooks from specific external providers with their own formats.
@@ -182,20 +529,12 @@ async def handle_external_webhook(
     - stripe: Stripe webhook events
     - github: GitHub webhook events
     - shopify: Shopify webhook events
-    """
-    workflow = db.query(Workflow).filter(Workflow.id == workflow_id).first()
     
-    if not workflow:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Workflow not found"
-        )
-    
-    if not workflow.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Workflow is not active"
-        )
+    Like /trigger, this queues the run and returns 202 unless ?wait=true.
+    Retries are deduped on the Idempotency-Key header or the provider's own
+    id (Stripe event id, GitHub delivery id, Shopify webhook id, ...).
+    """
+    route = await _get_active_route(db, workflow_id, require_trigger=False)
     
     # Parse incoming data
     try:
@@ -206,39 +545,10 @@ async def handle_external_webhook(
     # Normalize data based on provider
     trigger_data = _normalize_webhook_data(provider, raw_data, request.headers)
     
-    # Get the workflow owner
-    owner = db.query(User).filter(User.id == workflow.user_id).first()
+    _check_owner_can_run(route)
     
-    if not owner:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Workflow owner not found"
-        )
-    
-
-    # Check plan limits before running
-    from app.services.plan_limits import check_can_run_workflow
-    try:
-        check_can_run_workflow(owner)
-    except Exception as limit_err:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=str(getattr(limit_err, 'detail', {}).get('message', 'Plan limit reached'))
-        )
-    # Run the workflow
-    try:
-        runner = WorkflowRunner(db, workflow, owner)
-        execution = runner.run(trigger_data=trigger_data)
-        
-        return {
-            "success": True,
-            "execution_id": execution.id,
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to trigger workflow: {str(e)}"
-        )
+    idem_key = _idempotency_key(workflow_id, request, provider, raw_data)
+    return await _run_once(db, idem_key, response, _start(db, route, trigger_data, wait, response))
 
 
 def _normalize_webhook_data(provider: str, data: dict, headers: Any) -> dict:
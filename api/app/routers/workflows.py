@@ -6,6 +6,7 @@ from app.database import get_db
 from app.models import Workflow, User
 from app.schemas import WorkflowCreate, WorkflowUpdate, WorkflowResponse
 from app.routers.auth import get_current_user
+from app.services.webhook_routing import invalidate_webhook_route
 
 router = APIRouter()
 
@@ -94,6 +95,7 @@ async def update_workflow(
         setattr(workflow, field, value)
     
     db.commit()
+    invalidate_webhook_route(workflow.id)
     db.refresh(workflow)
     
     return WorkflowResponse.model_validate(workflow)
@@ -118,6 +120,7 @@ async def delete_workflow(
     
     db.delete(workflow)
     db.commit()
+    invalidate_webhook_route(workflow_id)
     
     return {"message": "Workflow deleted"}
 
@@ -9,11 +9,15 @@ from app.schemas.workflow import (
 from app.schemas.execution import (
     ExecutionCreate, 
     ExecutionResponse, 
-    ExecutionNodeResponse
+    ExecutionNodeResponse,
+    ExecutionSummary,
+    ExecutionPage,
 )
 from app.schemas.approval import (
     ApprovalResponse, 
-    ApprovalAction
+    ApprovalPage,
+    ApprovalAction,
+    BulkApprovalAction,
 )
 from app.schemas.connection import (
     ConnectionCreate, 
@@ -41,8 +45,12 @@ __all__ = [
     "ExecutionCreate",
     "ExecutionResponse",
     "ExecutionNodeResponse",
+    "ExecutionSummary",
+    "ExecutionPage",
     "ApprovalResponse",
+    "ApprovalPage",
     "ApprovalAction",
+    "BulkApprovalAction",
     "ConnectionCreate",
     "ConnectionResponse",
     "TemplateResponse",
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class ApprovalResponse(BaseModel):
@@ -24,6 +24,20 @@ class ApprovalResponse(BaseModel):
         from_attributes = True
 
 
+class ApprovalPage(BaseModel):
+    items: List[ApprovalResponse]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next (older) page
+
+
 class ApprovalAction(BaseModel):
     action: str
     rejection_reason: Optional[str] = None
+
+
+class BulkApprovalAction(BaseModel):
+    """Approve or reject every pending approval matching the filters (at least one required)."""
+    action: str
+    rejection_reason: Optional[str] = None
+    approval_ids: Optional[List[str]] = None
+    execution_id: Optional[str] = None
+    node_id: Optional[str] = None
@@ -49,3 +49,21 @@ class ExecutionResponse(BaseModel):
         if hasattr(obj, 'workflow') and obj.workflow:
             data.workflow_name = obj.workflow.name
         return data
+
+
+class ExecutionSummary(BaseModel):
+    """Run history row: no trigger data or node payloads (see ExecutionResponse for those)."""
+    id: str
+    workflow_id: str
+    workflow_name: Optional[str] = None
+    status: str
+    error: Optional[str] = None  # First 200 characters
+    is_test: bool = False
+    started_at: datetime
+    completed_at: Optional[datetime] = None
+    current_node_id: Optional[str] = None
+
+
+class ExecutionPage(BaseModel):
+    items: list[ExecutionSummary]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next (older) page
@@ -13,7 +13,8 @@ from typing import Any, AsyncGenerator, Optional
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.models import Execution, ExecutionNode, Connection, Workflow, User
+from app.models import Execution, ExecutionNode, Workflow, User
+from app.services.connection_cache import get_user_connections, connected_credentials
 from app.utils.timezone import now_local
 
 settings = get_settings()
@@ -175,15 +176,7 @@ class AgentExecutor:
 
     def _load_connections(self) -> dict:
         """Load user's connection credentials as {provider: creds_dict}."""
-        connections = self.db.query(Connection).filter(
-            Connection.user_id == self.user.id,
-            Connection.is_connected == True,
-        ).all()
-        creds = {}
-        for conn in connections:
-            if conn.credentials:
-                creds[conn.type] = conn.credentials
-        return creds
+        return connected_credentials(get_user_connections(self.db, self.user.id))
 
     async def run(
         self,
@@ -202,17 +195,12 @@ class AgentExecutor:
           {"type": "escalate", "reason": "...", "question": "..."}
           {"type": "error", "content": "..."}
         """
-        from app.mcp_servers.registry import MCPToolRegistry
+        from app.mcp_servers.registry import pooled_registry
 
         creds = self._load_connections()
-        self.registry = MCPToolRegistry(creds)
-
-        try:
+        async with pooled_registry(self.user.id, creds) as self.registry:
             async for event in self._agent_loop(goal, context):
                 yield event
-        finally:
-            if self.registry:
-                await self.registry.close()
 
     async def _agent_loop(
         self,
@@ -5,16 +5,23 @@ as the AI thinks and executes tools in real-time.
 """
 
 import json
+import time
 import logging
 import asyncio
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from datetime import datetime
 from typing import List, Optional, Dict, Any, AsyncGenerator
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.models import Workflow, Execution, Connection, ChatMessage, User
+from app.models import Workflow, Execution, ChatMessage, ChatConversation, User
+from app.services.connection_cache import connections_version, get_user_connections
+from app.services.knowledge_service import knowledge_version
 from app.services.ai_generator import generate_workflow_from_prompt
+from app.services.webhook_routing import invalidate_webhook_route
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -631,7 +638,7 @@ def _get_user_connections(user: User, db: Session) -> dict:
     """Returns dict of service_type -> connection info.
     Also maps sub-services (gmail, google_calendar) to their parent connection type (google).
     """
-    connections = db.query(Connection).filter(Connection.user_id == user.id).all()
+    connections = get_user_connections(db, user.id)
     conn_map = {c.type: {"name": c.name, "connected": c.is_connected} for c in connections}
     
     # Map sub-service names used in NODE_REQUIREMENTS to actual connection types
@@ -787,6 +794,7 @@ def _tool_modify_workflow(args: dict, user: User, db: Session) -> str:
         if result.get("workflowName"):
             match.name = result["workflowName"]
         db.commit()
+        invalidate_webhook_route(match.id)
         db.refresh(match)
 
         user_connections = _get_user_connections(user, db)
@@ -873,6 +881,7 @@ def _tool_update_workflow_settings(args: dict, user: User, db: Session) -> str:
             applied.append(f"Renamed to '{changes['rename']}'")
         
         db.commit()
+        invalidate_webhook_route(match.id)
         
         return json.dumps({
             "success": True,
@@ -912,7 +921,7 @@ def _tool_get_workflow_details(args: dict, user: User, db: Session) -> str:
 
 
 def _tool_list_connections(user: User, db: Session) -> str:
-    connections = db.query(Connection).filter(Connection.user_id == user.id).all()
+    connections = get_user_connections(db, user.id)
     if not connections:
         return json.dumps({"connections": [], "message": "No tools connected yet."})
     return json.dumps({"connections": [
@@ -942,6 +951,7 @@ def _tool_toggle_workflow(args: dict, user: User, db: Session, activate: bool) -
         return json.dumps({"error": f"No workflow found matching '{args.get('workflow_name')}'"})
     match.is_active = activate
     db.commit()
+    invalidate_webhook_route(match.id)
     return json.dumps({"success": True, "message": f"Workflow '{match.name}' {'activated' if activate else 'deactivated'}."})
 
 
@@ -1078,6 +1088,7 @@ def _tool_run_agent_task(args: dict, user: User, db: Session) -> str:
 def _tool_save_knowledge(args: dict, user: User, db: Session) -> str:
     """Save a knowledge entry from chat."""
     from app.models import KnowledgeEntry
+    from app.services.knowledge_service import invalidate_knowledge_context
     
     category = args.get("category", "custom")
     title = args.get("title", "").strip()
@@ -1116,6 +1127,7 @@ def _tool_save_knowledge(args: dict, user: User, db: Session) -> str:
         existing.content = content
         existing.title = title  # Update title to latest version too
         db.commit()
+        invalidate_knowledge_context(user.id)
         logger.info(f"[knowledge-save] Updated entry id={existing.id} title='{title}' category='{category}' user={user.id}")
         return json.dumps({"success": True, "action": "updated", "title": title, "category": category,
                            "message": f"Updated existing entry '{title}' in {category}."})
@@ -1129,6 +1141,7 @@ def _tool_save_knowledge(args: dict, user: User, db: Session) -> str:
     )
     db.add(entry)
     db.commit()
+    invalidate_knowledge_context(user.id)
     db.refresh(entry)
     logger.info(f"[knowledge-save] Created entry id={entry.id} title='{title}' category='{category}' user={user.id}")
     return json.dumps({"success": True, "action": "created", "id": entry.id, "title": title, "category": category,
@@ -1158,50 +1171,10 @@ def _tool_list_knowledge(args: dict, user: User, db: Session) -> str:
 
 # --- System Prompt ---
 
-def build_system_prompt(user: User, db: Session) -> str:
-    name = user.full_name or user.email
-    biz = f" who runs a {user.business_type} business" if user.business_type else ""
-    wf_count = db.query(Workflow).filter(Workflow.user_id == user.id).count()
-    
-    # Get knowledge base context
-    from app.services.knowledge_service import get_knowledge_context
-    knowledge_ctx = get_knowledge_context(user.id, db)
-    
-    # Get actual connections
-    user_conns = _get_user_connections(user, db)
-    if user_conns:
-        conn_lines = []
-        for svc, info in user_conns.items():
-            status = "connected" if info["connected"] else "not connected"
-            conn_lines.append(f"  - {svc}: {status}")
-        conn_summary = "CONNECTED TOOLS:\n" + "\n".join(conn_lines)
-    else:
-        conn_summary = "CONNECTED TOOLS: None yet. User needs to connect tools at /app/connections."
-
-    # Get recent execution stats
-    from datetime import timedelta
-    recent_cutoff = datetime.utcnow() - timedelta(days=7)
-    recent_execs = db.query(Execution).join(Workflow).filter(
-        Workflow.user_id == user.id,
-        Execution.started_at >= recent_cutoff
-    ).all()
-    if recent_execs:
-        total = len(recent_execs)
-        completed = sum(1 for e in recent_execs if e.status == "completed")
-        failed = sum(1 for e in recent_execs if e.status == "failed")
-        exec_summary = f"RECENT ACTIVITY (last 7 days): {total} workflow runs ({completed} completed, {failed} failed)"
-    else:
-        exec_summary = "RECENT ACTIVITY: No workflow runs yet."
-
-    # Get user timezone
-    user_tz = getattr(user, 'timezone', None) or 'America/Los_Angeles'
-    
-    return f"""You are Aivaro — an AI that builds and runs business automations. You're talking to {name}{biz}.
-
-ACCOUNT: {wf_count} workflows. Timezone: {user_tz}
-{conn_summary}
-{exec_summary}
-{knowledge_ctx}
+# The instructions are identical for every user and turn, so with TOOLS they
+# form a stable prefix the provider can cache. Everything that varies per user
+# goes in the short context that follows them (see build_system_prompt).
+CHAT_INSTRUCTIONS = """You are Aivaro — an AI that builds and runs business automations. Who you're talking to, their account and their business knowledge are in the USER CONTEXT section at the end.
 
 YOU ARE THE PRODUCT. You build and run automations — but you build them RIGHT.
 
@@ -1219,7 +1192,7 @@ When a user asks to automate something:
 
 1. Call list_knowledge ONCE to check for business context. Do NOT call it again on follow-up messages.
 2. Read the user's message carefully. Extract EVERYTHING they already told you.
-3. Use the user's timezone (from ACCOUNT section above) as default.
+3. Use the user's timezone (from the ACCOUNT line of the user context) as default.
 4. If the user said "no approval needed" or "auto-send" — respect it. Set requiresApproval=false.
 
 GATHERING REQUIREMENTS — ALWAYS ASK ONE ROUND OF QUESTIONS:
@@ -1370,7 +1343,7 @@ INTEGRATION-SPECIFIC RULES (always follow these when creating workflows):
 
 **Gmail (email):**
 - ai_reply ONLY generates text — it does NOT send. Always follow ai_reply with send_email.
-- Pattern: start_email → ai_reply → send_email(to={{from}}, subject="Re: {{subject}}", body="{{ai_response}}")
+- Pattern: start_email → ai_reply → send_email(to={from}, subject="Re: {subject}", body="{ai_response}")
 
 **Stripe (payments):**
 - stripe_create_invoice with auto_send="false" → MUST add stripe_send_invoice step after.
@@ -1437,15 +1410,15 @@ AFTER CREATING A WORKFLOW:
 WHEN ASKED ABOUT HOW A STEP WORKS:
 - Use the get_step_info tool to look up exact details, then explain clearly.
 - For **form triggers (start_form)**: The workflow gets a unique webhook URL. The user can embed it in their website, use it with Typeform/Webflow, or share it as a booking link. Any form POST to that URL triggers the workflow. Use get_webhook_url to give them the actual URL.
-- For **email steps (send_email)**: Sends from their connected Gmail as them. Can use {{variables}} from previous steps.
+- For **email steps (send_email)**: Sends from their connected Gmail as them. Can use {variables} from previous steps.
 - For **Stripe steps**: Payments/deposits go to their Stripe account. Payment links are generated per-trigger.
 - For **Calendar steps**: Events created in their Google Calendar with data from the trigger.
 - For **Sheets steps (append_row)**: Adds a row with data from previous steps. They specify which spreadsheet.
-- For **SMS steps (twilio_send_sms)**: Sends a text message via Twilio. Great for appointment reminders, payment nudges, confirmations. Uses {{phone}} from the trigger. Requires Twilio connection.
+- For **SMS steps (twilio_send_sms)**: Sends a text message via Twilio. Great for appointment reminders, payment nudges, confirmations. Uses {phone} from the trigger. Requires Twilio connection.
 - For **WhatsApp steps (twilio_send_whatsapp)**: Sends WhatsApp messages via Twilio. Same as SMS but via WhatsApp. Requires Twilio connection with WhatsApp-enabled number.
 - For **Call steps (twilio_make_call)**: Makes an outbound phone call that speaks a message. Useful for urgent reminders. Requires Twilio connection.
 - For **Airtable steps (airtable_create_record, airtable_update_record, airtable_list_records, airtable_find_record)**: Full CRUD on Airtable bases. Create records to log data, update records to change status, list/find records to look up info. Requires Airtable connection.
-- Always explain what DATA flows between steps — e.g., a form trigger provides {{name}}, {{email}}, {{phone}} that later steps can use.
+- Always explain what DATA flows between steps — e.g., a form trigger provides {name}, {email}, {phone} that later steps can use.
 
 WHEN ASKED "HOW DOES THE FORM KNOW?" or "WHERE IS THE FORM?":
 - Explain the webhook URL concept simply: "Your workflow has a unique URL. Any form that posts to it triggers the automation."
@@ -1453,9 +1426,128 @@ WHEN ASKED "HOW DOES THE FORM KNOW?" or "WHERE IS THE FORM?":
 - Offer concrete options: embed HTML form, connect Typeform, use Webflow, or they can build a booking page.
 - If the workflow isn't activated yet, remind them to activate it first."""
 
+# user_id -> (expires_at, stamp, context), least recently used first
+_USER_CONTEXT_CACHE_SIZE = 2048
+_user_contexts: "OrderedDict[str, tuple]" = OrderedDict()
+_user_contexts_lock = Lock()
+
+
+def _build_user_context(user: User, db: Session) -> str:
+    name = user.full_name or user.email
+    biz = f" who runs a {user.business_type} business" if user.business_type else ""
+    wf_count = db.query(Workflow).filter(Workflow.user_id == user.id).count()
+    
+    # Get knowledge base context
+    from app.services.knowledge_service import get_knowledge_context
+    knowledge_ctx = get_knowledge_context(user.id, db)
+    
+    # Get actual connections
+    user_conns = _get_user_connections(user, db)
+    if user_conns:
+        conn_lines = []
+        for svc, info in user_conns.items():
+            status = "connected" if info["connected"] else "not connected"
+            conn_lines.append(f"  - {svc}: {status}")
+        conn_summary = "CONNECTED TOOLS:\n" + "\n".join(conn_lines)
+    else:
+        conn_summary = "CONNECTED TOOLS: None yet. User needs to connect tools at /app/connections."
+
+    # Get recent execution stats
+    from datetime import timedelta
+    recent_cutoff = datetime.utcnow() - timedelta(days=7)
+    total, completed, failed = db.query(
+        func.count(Execution.id),
+        func.count(Execution.id).filter(Execution.status == "completed"),
+        func.count(Execution.id).filter(Execution.status == "failed"),
+    ).join(Workflow).filter(
+        Workflow.user_id == user.id,
+        Execution.started_at >= recent_cutoff
+    ).one()
+    if total:
+        exec_summary = f"RECENT ACTIVITY (last 7 days): {total} workflow runs ({completed} completed, {failed} failed)"
+    else:
+        exec_summary = "RECENT ACTIVITY: No workflow runs yet."
+
+    # Get user timezone
+    user_tz = getattr(user, 'timezone', None) or 'America/Los_Angeles'
+    
+    return f"""USER CONTEXT:
+You're talking to {name}{biz}.
+ACCOUNT: {wf_count} workflows. Timezone: {user_tz}
+{conn_summary}
+{exec_summary}
+{knowledge_ctx}"""
+
+
+# Tools whose effects show up in the user context (workflow count, runs, knowledge)
+_CONTEXT_TOOLS = {"create_workflow", "save_knowledge", "run_agent_task"}
+
+
+def invalidate_user_context(user_id: str):
+    """Rebuild the user's context on their next message (after a tool changed their account)."""
+    with _user_contexts_lock:
+        _user_contexts.pop(user_id, None)
+
+
+def build_system_prompt(user: User, db: Session) -> str:
+    """
+    CHAT_INSTRUCTIONS followed by the user's context. The context is memoized
+    for CHAT_CONTEXT_TTL_SECONDS, so consecutive turns of a conversation send
+    an identical prefix (instructions, context and earlier messages).
+    
+    Connections and knowledge are checked on every turn through their version
+    stamps, so connecting a tool or editing an entry (from any page or worker)
+    shows up on the next message rather than after the TTL.
+    """
+    stamp = (connections_version(db, user.id), knowledge_version(user.id, db))
+    now = time.monotonic()
+    with _user_contexts_lock:
+        cached = _user_contexts.get(user.id)
+        if cached and cached[0] > now and cached[1] == stamp:
+            _user_contexts.move_to_end(user.id)
+            return f"{CHAT_INSTRUCTIONS}\n\n{cached[2]}"
+    
+    context = _build_user_context(user, db)
+    with _user_contexts_lock:
+        _user_contexts[user.id] = (now + settings.chat_context_ttl_seconds, stamp, context)
+        _user_contexts.move_to_end(user.id)
+        while len(_user_contexts) > _USER_CONTEXT_CACHE_SIZE:
+            _user_contexts.popitem(last=False)
+    return f"{CHAT_INSTRUCTIONS}\n\n{context}"
+
 
 # --- Streaming Chat ---
 
+def _log_usage(response, elapsed: float):
+    """Log prompt/cached/completion tokens and latency, to check prefix caching is working."""
+    usage = getattr(response, "usage", None)
+    if not usage:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) or 0
+    logger.info(
+        f"[agentic] usage prompt={usage.prompt_tokens} cached={cached} "
+        f"completion={usage.completion_tokens} latency={elapsed * 1000:.0f}ms"
+    )
+
+
+def _save_message(db: Session, user: User, role: str, content: str, conversation_id: Optional[str], metadata: dict = None):
+    """Store a chat message and keep the conversation's list counters in step."""
+    db.add(ChatMessage(
+        user_id=user.id, role=role, content=content,
+        conversation_id=conversation_id, metadata_json=metadata
+    ))
+    if conversation_id:
+        db.query(ChatConversation).filter(ChatConversation.id == conversation_id).update({
+            ChatConversation.message_count: func.coalesce(ChatConversation.message_count, 0) + 1,
+            ChatConversation.last_message_preview: content[:100],
+            ChatConversation.last_role: role,
+            # updated_at only tracks title/archive edits (it orders the list); don't bump it
+            ChatConversation.updated_at: ChatConversation.updated_at,
+        }, synchronize_session=False)
+    db.commit()
+
+
 async def agentic_chat_stream(
     user: User,
     db: Session,
@@ -1472,8 +1564,7 @@ async def agentic_chat_stream(
     """
 
     # Save user message (clean, without extra_context)
-    db.add(ChatMessage(user_id=user.id, role="user", content=user_message, conversation_id=conversation_id))
-    db.commit()
+    _save_message(db, user, "user", user_message, conversation_id)
 
     # Auto-extract knowledge from user message (background, non-blocking, own DB session)
     try:
@@ -1494,8 +1585,7 @@ async def agentic_chat_stream(
 
     # Auto-title: if conversation has <=1 messages, generate a short summary title via LLM
     if conversation_id:
-        from app.models.chat import ChatConversation
-        msg_count = db.query(ChatMessage).filter(ChatMessage.conversation_id == conversation_id).count()
+        msg_count = db.query(ChatConversation.message_count).filter(ChatConversation.id == conversation_id).scalar() or 0
         if msg_count <= 1:
             try:
                 from openai import OpenAI
@@ -1544,8 +1634,7 @@ async def agentic_chat_stream(
     client = _get_openai_client()
     if not client:
         fallback = _fallback_response(user, user_message)
-        db.add(ChatMessage(user_id=user.id, role="assistant", content=fallback, conversation_id=conversation_id))
-        db.commit()
+        _save_message(db, user, "assistant", fallback, conversation_id)
         yield {"type": "message", "content": fallback}
         yield {"type": "done"}
         return
@@ -1568,7 +1657,9 @@ async def agentic_chat_stream(
     for iteration in range(5):
         try:
             logger.info(f"[agentic] Iteration {iteration}, {len(messages)} messages in context")
+            started = time.perf_counter()
             response = await asyncio.get_event_loop().run_in_executor(_executor, _call_openai, messages)
+            _log_usage(response, time.perf_counter() - started)
         except Exception as e:
             logger.error(f"OpenAI error on iteration {iteration}: {e}", exc_info=True)
             yield {"type": "step", "index": step_index, "label": "Something went wrong", "status": "error"}
@@ -1707,6 +1798,8 @@ async def agentic_chat_stream(
                     "content": result,
                 })
                 step_index += 1
+                if fn_name in _CONTEXT_TOOLS:
+                    invalidate_user_context(user.id)
 
             continue
 
@@ -1721,11 +1814,7 @@ async def agentic_chat_stream(
             text = "Sorry, I had trouble generating a response. Could you try rephrasing or simplifying your request?"
         
         metadata = {"steps": collected_steps} if collected_steps else None
-        db.add(ChatMessage(
-            user_id=user.id, role="assistant", content=text,
-            conversation_id=conversation_id, metadata_json=metadata
-        ))
-        db.commit()
+        _save_message(db, user, "assistant", text, conversation_id, metadata)
         yield {"type": "message", "content": text, "metadata": metadata}
         yield {"type": "done"}
         return
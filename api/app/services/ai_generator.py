@@ -1,5 +1,6 @@
 import json
 import logging
+from functools import lru_cache
 from typing import Optional, List, Dict, Any
 
 from app.config import get_settings
@@ -8,73 +9,90 @@ settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
+# Providers already fully documented in the hardcoded prompt
+HARDCODED_PROVIDERS = {"google", "slack", "stripe", "twilio", "airtable", "notion", "calendly", "mailchimp"}
+
+
 def _get_mcp_tool_docs(connected_providers: list[str] = None) -> str:
     """Generate documentation for MCP tools that aren't hardcoded in the system prompt.
     
     Only includes tools from connected providers. Returns a string block to append to the prompt.
     """
-    # Providers already fully documented in the hardcoded prompt
-    HARDCODED_PROVIDERS = {"google", "slack", "stripe", "twilio", "airtable", "notion", "calendly", "mailchimp"}
-    
-    from app.mcp_servers.registry import SERVER_FACTORIES
+    from app.mcp_servers.registry import SERVER_CLASSES
     
     # Determine which new providers to document
     if connected_providers:
-        new_providers = [p for p in connected_providers if p not in HARDCODED_PROVIDERS and p in SERVER_FACTORIES]
+        new_providers = [p for p in connected_providers if p not in HARDCODED_PROVIDERS and p in SERVER_CLASSES]
     else:
         # If no connected_providers info, include all non-hardcoded
-        new_providers = [p for p in SERVER_FACTORIES if p not in HARDCODED_PROVIDERS]
+        new_providers = [p for p in SERVER_CLASSES if p not in HARDCODED_PROVIDERS]
     
     if not new_providers:
         return ""
+    providers = tuple(sorted(set(new_providers)))
+    try:
+        return _mcp_tool_docs_for(providers)
+    except Exception:
+        pass
     
-    # Fake creds to instantiate servers (just for schema — no API calls)
-    fake_creds = {
-        "access_token": "x", "api_key": "x", "account_sid": "x", "auth_token": "x",
-        "phone_number": "x", "shop_domain": "x", "bot_token": "x", "guild_id": "x",
-        "domain": "x", "email": "x", "api_token": "x", "phone_number_id": "x",
-        "refresh_token": "x",
-    }
-    
+    # A provider's schemas failed to load. Leave it out of this prompt only:
+    # nothing was cached, so it is retried on the next one.
     sections = []
-    for provider in sorted(new_providers):
-        factory = SERVER_FACTORIES.get(provider)
-        if not factory:
-            continue
+    for provider in providers:
         try:
-            server = factory(fake_creds)
-            tools = server.list_tools()
-            if not tools:
-                continue
-            
-            lines = [f"\n{provider.upper()} node types (user has {provider} connected):"]
-            for t in tools:
-                func_def = t.get("function", t)
-                name = func_def.get("name", "")
-                desc = func_def.get("description", "")
-                params = func_def.get("parameters", {})
-                props = params.get("properties", {})
-                required = params.get("required", [])
-                
-                param_parts = []
-                for pname, pdef in props.items():
-                    pdesc = pdef.get("description", "")
-                    req_marker = " (required)" if pname in required else ""
-                    param_parts.append(f'{pname}: "{pdesc}"{req_marker}')
-                
-                param_str = ", ".join(param_parts) if param_parts else "no parameters"
-                lines.append(f"- {name}: {desc}. Parameters: {{{param_str}}}")
-            
-            sections.append("\n".join(lines))
+            sections.append(_provider_tool_docs(provider))
         except Exception as e:
             logger.warning(f"[ai_generator] Failed to get MCP tool docs for {provider}: {e}")
-    
+    return _tool_docs_block(sections)
+
+
+@lru_cache(maxsize=256)
+def _mcp_tool_docs_for(providers: tuple) -> str:
+    """The docs block for a sorted provider set; each distinct set is rendered once."""
+    return _tool_docs_block([_provider_tool_docs(p) for p in providers])
+
+
+def _tool_docs_block(sections: list[str]) -> str:
+    sections = [section for section in sections if section]
     if not sections:
         return ""
     
     return "\n\nADDITIONAL INTEGRATION NODE TYPES (from MCP):\nWhen these nodes follow a read_sheet node, row columns are available as {{column_name}} (lowercased, spaces→underscores). Fill parameters with these variables.\n" + "\n".join(sections) + "\n"
 
 
+@lru_cache(maxsize=None)
+def _provider_tool_docs(provider: str) -> str:
+    """
+    One provider's section, from the registry's schema catalog (no server is
+    constructed). Raises if the schemas can't be loaded, so the failure isn't cached.
+    """
+    from app.mcp_servers.registry import get_tool_schemas
+    
+    tools = get_tool_schemas(provider)
+    if not tools:
+        return ""
+    
+    lines = [f"\n{provider.upper()} node types (user has {provider} connected):"]
+    for t in tools:
+        func_def = t.get("function", t)
+        name = func_def.get("name", "")
+        desc = func_def.get("description", "")
+        params = func_def.get("parameters", {})
+        props = params.get("properties", {})
+        required = params.get("required", [])
+        
+        param_parts = []
+        for pname, pdef in props.items():
+            pdesc = pdef.get("description", "")
+            req_marker = " (required)" if pname in required else ""
+            param_parts.append(f'{pname}: "{pdesc}"{req_marker}')
+        
+        param_str = ", ".join(param_parts) if param_parts else "no parameters"
+        lines.append(f"- {name}: {desc}. Parameters: {{{param_str}}}")
+    
+    return "\n".join(lines)
+
+
 # ============================================================
 # WORKFLOW CLARIFICATION SYSTEM
 # Asks clarifying questions before generating a workflow
@@ -744,7 +762,7 @@ Generate a workflow based on the user's description. Return a JSON object with:
 - start_manual: Manual start trigger (when user clicks "Run")
 - start_form: Form submission trigger (when someone fills a form)
 - start_schedule: Scheduled trigger (runs on a schedule). Parameters: {time: "09:00", frequency: "daily/weekly/monthly"}
-- start_email: Email received trigger - monitors the user's CONNECTED Gmail account for new emails matching criteria. Use this when user says "when I receive an email", "when an email comes in", "when I get an email", etc. Parameters: {subject: "keyword to match", from: "optional@sender.com"}
+- start_email: Email received trigger - monitors the user's CONNECTED Gmail account for new emails matching criteria. Use this when user says "when I receive an email", "when an email comes in", "when I get an email", etc. Parameters: {subject: "keyword to match", from: "optional@sender.com", include_body: false (optional, only when the workflow needs just the sender, subject and snippet)}
 
 IMPORTANT: When the user mentions receiving emails, getting emails, or email triggers, they mean their connected Gmail account. The start_email trigger monitors their Gmail inbox automatically.
 
@@ -0,0 +1,125 @@
+"""
+Connection Cache - Per-user integration connections and their credentials.
+
+A workflow run used to query the owner's connections up to three times
+(WorkflowRunner, its Google email lookup, AgentExecutor) and chat did it again
+on every message. Connections are now loaded once per user and kept in this
+process's memory only (never a shared cache) for at most
+CONNECTION_CACHE_TTL_SECONDS.
+
+Each lookup first reads a version stamp, the count and latest updated_at of the
+user's connections. That small indexed query lets a token refreshed by another
+worker show up straight away. Writers in this process also call
+invalidate_connections() after committing. Callers get copies of the
+credentials because token refresh callbacks patch them in place.
+"""
+import copy
+import time
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Connection
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass(frozen=True)
+class CachedConnection:
+    """The parts of a Connection row that runs and chat read."""
+    type: str
+    name: str
+    is_connected: bool
+    credentials: Any  # dict, or a JSON string for some legacy rows
+
+
+@dataclass(frozen=True)
+class _Entry:
+    version: Tuple
+    connections: Tuple[CachedConnection, ...]
+    expires_at: float
+
+
+_entries: Dict[str, _Entry] = {}
+_entries_lock = Lock()
+
+
+def _version_query(user_id: str):
+    return select(func.count(Connection.id), func.max(Connection.updated_at)).where(Connection.user_id == user_id)
+
+
+def _rows_query(user_id: str):
+    return select(Connection).where(Connection.user_id == user_id)
+
+
+def _fresh_entry(user_id: str, version: Tuple) -> Optional[_Entry]:
+    entry = _entries.get(user_id)
+    if entry and entry.version == version and entry.expires_at > time.monotonic():
+        return entry
+    return None
+
+
+def _store(user_id: str, version: Tuple, rows) -> Tuple[CachedConnection, ...]:
+    connections = tuple(
+        CachedConnection(
+            type=c.type, name=c.name, is_connected=bool(c.is_connected),
+            credentials=copy.deepcopy(c.credentials),  # Not the session's object, which may be patched
+        )
+        for c in rows
+    )
+    if settings.connection_cache_ttl_seconds > 0:
+        with _entries_lock:
+            _entries[user_id] = _Entry(version, connections, time.monotonic() + settings.connection_cache_ttl_seconds)
+    return connections
+
+
+def connections_version(db: Session, user_id: str) -> Tuple:
+    """(connection count, latest updated_at): changes whenever a connection is written."""
+    return tuple(db.execute(_version_query(user_id)).one())
+
+
+def get_user_connections(db: Session, user_id: str) -> List[CachedConnection]:
+    """All of a user's connections (connected or not), from the cache when current."""
+    version = connections_version(db, user_id)
+    entry = _fresh_entry(user_id, version)
+    if entry:
+        return list(entry.connections)
+    rows = db.execute(_rows_query(user_id)).scalars().all()
+    return list(_store(user_id, version, rows))
+
+
+async def get_user_connections_async(db: AsyncSession, user_id: str) -> List[CachedConnection]:
+    """get_user_connections() for an AsyncSession."""
+    version = tuple((await db.execute(_version_query(user_id))).one())
+    entry = _fresh_entry(user_id, version)
+    if entry:
+        return list(entry.connections)
+    rows = (await db.execute(_rows_query(user_id))).scalars().all()
+    return list(_store(user_id, version, rows))
+
+
+def connected_credentials(connections: List[CachedConnection]) -> dict:
+    """{provider type: credentials} for connected integrations, copied so callers may modify them."""
+    return {
+        c.type: copy.deepcopy(c.credentials)
+        for c in connections
+        if c.is_connected and c.credentials
+    }
+
+
+def invalidate_connections(user_id: str):
+    """Drop a user's cached connections after one is created, updated, refreshed or deleted."""
+    with _entries_lock:
+        _entries.pop(user_id, None)
+
+
+def clear_connection_cache():
+    with _entries_lock:
+        _entries.clear()
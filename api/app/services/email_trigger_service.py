@@ -7,9 +7,13 @@ from datetime import datetime, timedelta
 from typing import Optional
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.config import get_settings
+from app.database import SessionLocal, json_array_has, json_text
 from app.models import Workflow, Execution, Connection, User
 from app.services.integrations.google_service import GoogleService
+from app.utils.rate_limit import rate_limiter, RateLimitConfig, RateLimitExceeded
+
+settings = get_settings()
 
 
 class EmailTriggerService:
@@ -18,25 +22,41 @@ class EmailTriggerService:
     # Track processed message IDs to avoid duplicate triggers
     _processed_messages: set = set()
     
+    # Headers _parse_email_headers reads
+    TRIGGER_HEADERS = ("From", "To", "Subject", "Date")
+    # Partial responses: skip attachment metadata, label ids, size estimates, etc.
+    FULL_MESSAGE_FIELDS = "id,snippet,payload(headers,mimeType,body/data,parts(mimeType,body/data,parts(mimeType,body/data)))"
+    METADATA_MESSAGE_FIELDS = "id,snippet,payload/headers"
+    
     @classmethod
-    async def poll_and_trigger(cls, db: Session, user_id: Optional[str] = None) -> list[dict]:
+    async def poll_and_trigger(cls, db: Session, user_id: Optional[str] = None, session_factory=SessionLocal) -> list[dict]:
         """
         Poll Gmail for new emails and trigger matching workflows.
+        
+        Mailboxes are polled concurrently (capped by email_poll_concurrency) and
+        matched workflows are handed off to the execution dispatcher, so one slow
+        mailbox or long workflow doesn't delay triggers for everyone else.
+        db is only used to find the triggers: each job gets its own session from
+        session_factory, so one job's commit or rollback never touches another's.
         Returns list of triggered workflow executions.
         """
-        results = []
-        
         # Get all active workflows with email triggers
-        query = db.query(Workflow).filter(Workflow.is_active == True)
+        query = db.query(Workflow).filter(
+            Workflow.is_active == True,
+            json_array_has(Workflow.nodes, "type", "start_email", db.get_bind().dialect.name),
+        )
         if user_id:
             query = query.filter(Workflow.user_id == user_id)
         
         workflows = query.all()
         
+        # Collect (workflow, trigger, credentials) jobs up front — one connection lookup per user
+        jobs = []
+        connections_by_user = {}
         for workflow in workflows:
             # Find email trigger nodes
             email_triggers = [
-                node for node in workflow.nodes 
+                node for node in (workflow.nodes or [])
                 if node.get("type") == "start_email"
             ]
             
@@ -44,26 +64,76 @@ class EmailTriggerService:
                 continue
             
             # Get user's Google connection
-            connection = db.query(Connection).filter(
-                Connection.user_id == workflow.user_id,
-                Connection.type == "google",
-                Connection.is_connected == True
-            ).first()
+            if workflow.user_id not in connections_by_user:
+                connections_by_user[workflow.user_id] = db.query(Connection).filter(
+                    Connection.user_id == workflow.user_id,
+                    Connection.type == "google",
+                    Connection.is_connected == True
+                ).first()
+            connection = connections_by_user[workflow.user_id]
             
             if not connection or not connection.credentials:
                 continue
             
-            # Check for new emails matching the trigger
             for trigger in email_triggers:
+                jobs.append((workflow, trigger, connection.credentials))
+        
+        if not jobs:
+            return []
+        
+        semaphore = asyncio.Semaphore(max(1, settings.email_poll_concurrency))
+        
+        async def _run_job(workflow: Workflow, trigger: dict, credentials: dict) -> list[dict]:
+            async with semaphore:
+                job_db = session_factory()
                 try:
-                    triggered = await cls._check_trigger(
-                        db, workflow, trigger, connection.credentials
-                    )
-                    results.extend(triggered)
+                    return await cls._check_trigger(job_db, workflow, trigger, credentials)
                 except Exception as e:
+                    job_db.rollback()
                     print(f"Error checking email trigger for workflow {workflow.id}: {e}")
+                    return []
+                finally:
+                    job_db.close()
         
-        return results
+        # Check for new emails matching each trigger, all mailboxes in parallel
+        batches = await asyncio.gather(*(_run_job(*job) for job in jobs))
+        return [item for batch in batches for item in batch]
+    
+    @staticmethod
+    def _gmail_budget_key() -> str:
+        """Rate-limit key for the Google project our OAuth client belongs to."""
+        return f"gmail_project:{os.environ.get('GOOGLE_CLIENT_ID') or 'default'}"
+    
+    @staticmethod
+    def _gmail_budget_config() -> RateLimitConfig:
+        per_minute = max(1, settings.gmail_project_requests_per_minute)
+        return RateLimitConfig(
+            requests_per_minute=per_minute,
+            requests_per_hour=per_minute * 60,
+            burst_limit=max(1, settings.email_poll_concurrency),
+        )
+    
+    @staticmethod
+    def _wants_body(params: dict) -> bool:
+        """Triggers fetch the email body unless include_body is explicitly off."""
+        include_body = params.get("include_body", True)
+        if isinstance(include_body, str):
+            return include_body.strip().lower() not in ("false", "no", "0")
+        return bool(include_body)
+    
+    @classmethod
+    async def _gmail_call(cls, coro_factory, cost: int = 1):
+        """Run a Gmail API call inside the shared per-project rate budget.
+        
+        cost is the number of API requests the call makes (e.g. a batch fetch).
+        """
+        key = cls._gmail_budget_key()
+        if not await rate_limiter.acquire(key, cls._gmail_budget_config(), weight=max(1, cost)):
+            raise RateLimitExceeded("Gmail project rate budget exhausted, retrying next poll")
+        try:
+            return await coro_factory()
+        finally:
+            rate_limiter.release_request(key)
     
     @classmethod
     async def _check_trigger(
@@ -73,12 +143,17 @@ class EmailTriggerService:
         trigger: dict, 
         credentials: dict
     ) -> list[dict]:
-        """Check a single email trigger and execute workflow if matched."""
+        """
+        Check a single email trigger and execute workflow if matched.
+        
+        db belongs to this job. Its queries and commits run in a worker thread
+        (asyncio.to_thread) so they don't block the other mailboxes' polls.
+        """
         results = []
         
         # Check plan limits before doing any work
         from app.services.plan_limits import check_can_run_workflow
-        user = db.query(User).filter(User.id == workflow.user_id).first()
+        user = await asyncio.to_thread(lambda: db.query(User).filter(User.id == workflow.user_id).first())
         if user:
             try:
                 check_can_run_workflow(user)
@@ -92,8 +167,8 @@ class EmailTriggerService:
         
         # Build Gmail query — only match emails after workflow was activated
         # Use after: epoch to skip old emails
-        activated_epoch = int(workflow.updated_at.timestamp()) if workflow.updated_at else int(workflow.created_at.timestamp())
-        query_parts = [f"is:unread after:{activated_epoch}"]
+        after_epoch = int(cls._poll_after(workflow, user, datetime.utcnow()).timestamp())
+        query_parts = [f"is:unread after:{after_epoch}"]
         if from_filter:
             query_parts.append(f"from:{from_filter}")
         if subject_filter:
@@ -107,6 +182,8 @@ class EmailTriggerService:
             try:
                 from app.database import SessionLocal
                 from app.models.connection import Connection
+                from app.services.connection_cache import invalidate_connections
+                from sqlalchemy.orm.attributes import flag_modified
                 db_inner = SessionLocal()
                 try:
                     conn = db_inner.query(Connection).filter(
@@ -120,7 +197,9 @@ class EmailTriggerService:
                         if new_refresh_token:
                             creds["refresh_token"] = new_refresh_token
                         conn.credentials = json.dumps(creds) if isinstance(conn.credentials, str) else creds
+                        flag_modified(conn, "credentials")  # creds may be the loaded dict, patched in place
                         db_inner.commit()
+                        invalidate_connections(workflow.user_id)
                         print(f"[EmailTrigger] Persisted refreshed Google token for user {workflow.user_id}")
                 finally:
                     db_inner.close()
@@ -137,34 +216,61 @@ class EmailTriggerService:
         
         try:
             # Get recent unread messages
-            messages = await google.list_messages(query=gmail_query, max_results=10)
+            messages = await cls._gmail_call(
+                lambda: google.list_messages(query=gmail_query, max_results=10)
+            )
             
-            for msg_ref in messages:
-                msg_id = msg_ref.get("id")
-                
-                # Skip already processed messages (check in-memory cache first)
-                cache_key = f"{workflow.id}:{msg_id}"
-                if cache_key in cls._processed_messages:
-                    continue
-                
-                # Also check database for existing executions with this message_id
-                existing = db.query(Execution).filter(
-                    Execution.workflow_id == workflow.id
-                ).all()
-                
-                already_processed = False
-                for ex in existing:
-                    if ex.trigger_data and ex.trigger_data.get("message_id") == msg_id:
-                        already_processed = True
-                        break
-                
-                if already_processed:
+            # Drop messages we've already triggered on before fetching anything
+            # (check in-memory cache first)
+            candidate_ids = [
+                msg_ref.get("id") for msg_ref in messages
+                if f"{workflow.id}:{msg_ref.get('id')}" not in cls._processed_messages
+            ]
+            
+            # Also check database for existing executions with these message ids
+            # (indexed on PostgreSQL by ix_executions_workflow_id_message_id)
+            processed_ids = set()
+            if candidate_ids:
+                message_id = json_text(Execution.trigger_data, "message_id", db.get_bind().dialect.name)
+                processed_ids = await asyncio.to_thread(lambda: {
+                    row[0] for row in db.query(message_id).filter(
+                        Execution.workflow_id == workflow.id,
+                        message_id.in_(candidate_ids),
+                    )
+                })
+            
+            new_ids = []
+            for msg_id in candidate_ids:
+                if msg_id in processed_ids:
                     # Already processed - add to cache and skip
-                    cls._processed_messages.add(cache_key)
+                    cls._processed_messages.add(f"{workflow.id}:{msg_id}")
+                    continue
+                new_ids.append(msg_id)
+            
+            if not new_ids:
+                return results
+            
+            # Fetch all new messages in one concurrent batch. Only pull the body
+            # when the trigger wants it; otherwise headers + snippet are enough.
+            if cls._wants_body(params):
+                fetch_kwargs = {"format": "full", "fields": cls.FULL_MESSAGE_FIELDS}
+            else:
+                fetch_kwargs = {
+                    "format": "metadata",
+                    "metadata_headers": list(cls.TRIGGER_HEADERS),
+                    "fields": cls.METADATA_MESSAGE_FIELDS,
+                }
+            fetched = await cls._gmail_call(
+                lambda: google.get_messages(new_ids, **fetch_kwargs),
+                cost=len(new_ids),
+            )
+            
+            for msg_id, message in zip(new_ids, fetched):
+                if message.get("error"):
+                    print(f"[Email Trigger] Failed to fetch message {msg_id}: {message['error']}")
                     continue
                 
-                # Get full message details
-                message = await google.get_message(msg_id)
+                cache_key = f"{workflow.id}:{msg_id}"
                 
                 # Extract email details
                 headers = message.get("payload", {}).get("headers", [])
@@ -179,21 +285,11 @@ class EmailTriggerService:
                 
                 print(f"[Email Trigger] Email data: from={email_data.get('from')}, subject={email_data.get('subject')}, snippet_len={len(email_data.get('snippet', ''))}, body_len={len(email_data.get('body', ''))}")
                 
-                # Create and run execution
-                execution = Execution(
-                    workflow_id=workflow.id,
-                    status="running",
-                    started_at=datetime.utcnow(),
-                    trigger_data=email_data
-                )
-                db.add(execution)
-                db.commit()
-                db.refresh(execution)
+                # Create execution and hand it off — don't run it inside the polling coroutine
+                execution_id = await asyncio.to_thread(cls._store_execution, db, workflow.id, email_data)
                 
-                # Run the workflow
-                from app.services.workflow_runner import WorkflowRunner
-                runner = WorkflowRunner(db, execution.id)
-                runner.run(trigger_data=email_data)
+                from app.services.execution_dispatcher import dispatch_execution
+                dispatch_execution(execution_id, email_data)
                 
                 # Mark as processed
                 cls._processed_messages.add(cache_key)
@@ -205,7 +301,7 @@ class EmailTriggerService:
                 results.append({
                     "workflow_id": str(workflow.id),
                     "workflow_name": workflow.name,
-                    "execution_id": str(execution.id),
+                    "execution_id": str(execution_id),
                     "email_from": email_data.get("from"),
                     "email_subject": email_data.get("subject"),
                 })
@@ -215,6 +311,29 @@ class EmailTriggerService:
         
         return results
     
+    @staticmethod
+    def _poll_after(workflow: Workflow, user: Optional[User], now: datetime) -> datetime:
+        """Oldest email the trigger may pick up."""
+        after = workflow.updated_at or workflow.created_at
+        if user and settings.execution_retention_enabled:
+            # Purged runs take their message_id with them: an older unread email
+            # would no longer be recognised as processed and would run again
+            from app.services.execution_retention import history_cutoff
+            after = max(after, history_cutoff(user, now))
+        return after
+    
+    @staticmethod
+    def _store_execution(db: Session, workflow_id: str, email_data: dict) -> str:
+        execution = Execution(
+            workflow_id=workflow_id,
+            status="running",
+            started_at=datetime.utcnow(),
+            trigger_data=email_data
+        )
+        db.add(execution)
+        db.commit()
+        return execution.id
+    
     @staticmethod
     def _parse_email_headers(headers: list) -> dict:
         """Parse email headers into a dict."""
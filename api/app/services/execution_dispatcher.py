@@ -0,0 +1,118 @@
+"""
+Execution Dispatcher - Hands workflow runs off to a bounded worker pool.
+
+Trigger sources create the Execution row and dispatch it here instead of
+running WorkflowRunner inline, so one long workflow never holds up the
+poller or request that triggered it. Every run gets its own DB session
+because sessions are not thread-safe.
+"""
+import asyncio
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Optional
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Execution
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Create the worker pool on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.workflow_worker_threads),
+                    thread_name_prefix="workflow-run",
+                    initializer=_init_worker,
+                )
+    return _executor
+
+
+def _init_worker():
+    # Workers live as long as the pool, so each keeps one event loop (and its
+    # pooled MCP registries) for all the nodes it runs
+    from app.services.node_executor import keep_thread_loop
+    keep_thread_loop()
+
+
+def run_execution_sync(execution_id: str, trigger_data: Optional[dict] = None) -> str:
+    """Run an execution to completion on a fresh session. Returns the final status."""
+    from app.services.workflow_runner import WorkflowRunner
+
+    run_db = SessionLocal()
+    try:
+        runner = WorkflowRunner(run_db, execution_id)
+        result = runner.run(trigger_data=trigger_data)
+        return result.status
+    except Exception as e:
+        logger.error(f"[Dispatcher] Execution {execution_id} crashed: {e}")
+        # Mark execution as failed so it doesn't sit in "running" forever
+        try:
+            run_db.rollback()
+            ex = run_db.query(Execution).filter(Execution.id == execution_id).first()
+            if ex and ex.status == "running":
+                ex.status = "failed"
+                ex.error = str(e)
+                run_db.commit()
+        except Exception:
+            pass
+        return "failed"
+    finally:
+        run_db.close()
+
+
+def dispatch_execution(execution_id: str, trigger_data: Optional[dict] = None) -> Future:
+    """Queue an execution on the worker pool and return immediately."""
+    return _get_executor().submit(run_execution_sync, execution_id, trigger_data)
+
+
+async def run_execution(execution_id: str, trigger_data: Optional[dict] = None) -> str:
+    """Run an execution on the worker pool and wait for it without blocking the event loop."""
+    return await asyncio.wrap_future(dispatch_execution(execution_id, trigger_data))
+
+
+def resume_approvals_sync(execution_id: str, approval_ids: list, connections: Optional[dict] = None) -> str:
+    """Resume an execution's approved steps on a fresh session. Returns the final status."""
+    from app.services.workflow_runner import WorkflowRunner
+
+    run_db = SessionLocal()
+    try:
+        runner = WorkflowRunner(run_db, execution_id, connections=connections)
+        return runner.resume_from_approvals(approval_ids)
+    except Exception as e:
+        logger.error(f"[Dispatcher] Resuming execution {execution_id} crashed: {e}")
+        try:
+            run_db.rollback()
+            ex = run_db.query(Execution).filter(Execution.id == execution_id).first()
+            if ex and ex.status in ("running", "paused"):
+                ex.status = "failed"
+                ex.error = str(e)
+                run_db.commit()
+        except Exception:
+            pass
+        return "failed"
+    finally:
+        run_db.close()
+
+
+def dispatch_resume(execution_id: str, approval_ids: list, connections: Optional[dict] = None) -> Future:
+    """Queue a bulk approval resume on the worker pool and return immediately."""
+    return _get_executor().submit(resume_approvals_sync, execution_id, approval_ids, connections)
+
+
+def shutdown_dispatcher(wait: bool = False):
+    """Stop accepting new runs. In-flight runs finish unless the process exits."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
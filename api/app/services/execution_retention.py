@@ -0,0 +1,217 @@
+"""
+Execution Retention - Keeps run history from growing forever.
+
+Each plan has two horizons (see TRIAL_LIMITS / PAID_LIMITS):
+
+- execution_detail_days: after this, a finished run is compacted. Its
+  trigger_data and every node's input/output/logs are zlib-compressed into
+  execution_archives, and the execution/node rows stay behind as summaries
+  (status, timestamps, errors, durations). trigger_data keeps only the keys
+  triggers dedupe on (an email trigger's message_id).
+- execution_history_days: after this, a finished run is hard-deleted
+  together with its nodes, approvals and archive. Its message_id goes with
+  it, so the email trigger never looks further back than this horizon.
+
+Work is done in small batches, one transaction each, so the job never holds
+locks on the hot tables for long. Runs periodically in a worker thread.
+"""
+import asyncio
+import json
+import logging
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import User, Workflow, Execution, ExecutionNode, ExecutionArchive, Approval
+from app.models.user import PAID_LIMITS
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Only finished runs are compacted; paused runs still need their payloads to resume
+COMPACTABLE_STATUSES = ("completed", "failed")
+
+# Left in trigger_data after compaction: the email trigger skips messages whose
+# message_id already has a run, and Gmail keeps returning them while unread
+DEDUPE_TRIGGER_KEYS = ("message_id",)
+
+
+def retention_policy(user: User) -> Tuple[int, int]:
+    """(detail_days, history_days) for a user's plan. Admins get the paid horizons."""
+    limits = PAID_LIMITS if getattr(user, "is_admin", False) else user.limits
+    return limits["execution_detail_days"], limits["execution_history_days"]
+
+
+def history_cutoff(user: User, now: datetime) -> datetime:
+    """Runs started before this are purged (and no longer dedupe their trigger)."""
+    _, history_days = retention_policy(user)
+    return now - timedelta(days=history_days)
+
+
+def trigger_stub(trigger_data) -> Optional[dict]:
+    """The part of trigger_data a compacted run keeps, or None."""
+    if not isinstance(trigger_data, dict):
+        return None
+    stub = {k: trigger_data[k] for k in DEDUPE_TRIGGER_KEYS if k in trigger_data}
+    return stub or None
+
+
+def pack_payloads(execution: Execution, nodes: list) -> Tuple[bytes, int]:
+    """Compress an execution's payloads. Returns (compressed, original_size)."""
+    doc = {
+        "trigger_data": execution.trigger_data,
+        "nodes": {
+            n.id: {"input_data": n.input_data, "output_data": n.output_data, "logs": n.logs}
+            for n in nodes
+        },
+    }
+    raw = json.dumps(doc, default=str).encode("utf-8")
+    return zlib.compress(raw, 6), len(raw)
+
+
+def unpack_payloads(payload: bytes) -> dict:
+    """Inverse of pack_payloads."""
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def _user_executions(db: Session, user_id: str):
+    return db.query(Execution).join(Workflow).filter(Workflow.user_id == user_id)
+
+
+def compact_user_executions(db: Session, user: User, now: datetime, batch_size: int) -> int:
+    """Archive payloads of the user's finished runs older than the detail horizon."""
+    detail_days, _ = retention_policy(user)
+    cutoff = now - timedelta(days=detail_days)
+    user_id = user.id
+    compacted = 0
+
+    while True:
+        executions = (
+            _user_executions(db, user_id)
+            .filter(
+                Execution.started_at < cutoff,
+                Execution.compacted_at.is_(None),
+                Execution.status.in_(COMPACTABLE_STATUSES),
+            )
+            .limit(batch_size)
+            .all()
+        )
+        if not executions:
+            break
+
+        ids = [e.id for e in executions]
+        if settings.execution_archive_payloads:
+            nodes_by_execution = defaultdict(list)
+            for node in db.query(ExecutionNode).filter(ExecutionNode.execution_id.in_(ids)).all():
+                nodes_by_execution[node.execution_id].append(node)
+            for execution in executions:
+                payload, size = pack_payloads(execution, nodes_by_execution[execution.id])
+                db.add(ExecutionArchive(execution_id=execution.id, payload=payload, original_size=size))
+
+        db.query(ExecutionNode).filter(ExecutionNode.execution_id.in_(ids)).update(
+            {ExecutionNode.input_data: None, ExecutionNode.output_data: None, ExecutionNode.logs: None},
+            synchronize_session=False,
+        )
+        for execution in executions:
+            execution.trigger_data = trigger_stub(execution.trigger_data)
+            execution.compacted_at = now
+        db.commit()
+        compacted += len(ids)
+
+        if len(ids) < batch_size:
+            break
+
+    return compacted
+
+
+def purge_user_executions(db: Session, user: User, now: datetime, batch_size: int) -> int:
+    """Hard-delete the user's finished runs older than the history horizon, children first."""
+    cutoff = history_cutoff(user, now)
+    user_id = user.id
+    purged = 0
+
+    while True:
+        ids = [
+            row[0] for row in
+            _user_executions(db, user_id)
+            .with_entities(Execution.id)
+            .filter(
+                Execution.started_at < cutoff,
+                Execution.status.in_(COMPACTABLE_STATUSES),
+            )
+            .limit(batch_size)
+            .all()
+        ]
+        if not ids:
+            break
+
+        for model, column in (
+            (Approval, Approval.execution_id),
+            (ExecutionNode, ExecutionNode.execution_id),
+            (ExecutionArchive, ExecutionArchive.execution_id),
+            (Execution, Execution.id),
+        ):
+            db.query(model).filter(column.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+
+        if len(ids) < batch_size:
+            break
+
+    return purged
+
+
+def run_retention(now: Optional[datetime] = None, batch_size: Optional[int] = None) -> dict:
+    """Compact and purge run history for every user. Returns totals."""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.execution_retention_batch_size
+    totals = {"users": 0, "compacted": 0, "purged": 0}
+
+    db = SessionLocal()
+    try:
+        last_id = ""
+        while True:
+            users = (
+                db.query(User)
+                .filter(User.id > last_id)
+                .order_by(User.id)
+                .limit(500)
+                .all()
+            )
+            if not users:
+                break
+            for user in users:
+                try:
+                    totals["purged"] += purge_user_executions(db, user, now, batch_size)
+                    totals["compacted"] += compact_user_executions(db, user, now, batch_size)
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"[Retention] Failed for user {user.id}: {e}")
+                totals["users"] += 1
+            last_id = users[-1].id
+            db.expunge_all()
+    finally:
+        db.close()
+
+    return totals
+
+
+async def execution_retention_task():
+    """Background task that applies run history retention periodically."""
+    interval = max(1, settings.execution_retention_interval_minutes) * 60
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            totals = await asyncio.to_thread(run_retention)
+            if totals["compacted"] or totals["purged"]:
+                logger.info(
+                    f"[Retention] Compacted {totals['compacted']} and purged {totals['purged']} "
+                    f"executions across {totals['users']} users"
+                )
+        except Exception as e:
+            logger.error(f"[Retention] Error: {e}")
@@ -1,6 +1,7 @@
 """
 Google Services Integration - Sheets, Gmail, Calendar
 """
+import asyncio
 import httpx
 from typing import Optional, List, Any
 from datetime import datetime, date, time
@@ -25,6 +26,7 @@ class GoogleService:
         self.on_token_refresh = on_token_refresh  # callback(new_access_token, new_refresh_token)
         self._client = None
         self._refreshing = False
+        self._refresh_lock = asyncio.Lock()  # Concurrent requests share one refresh
     
     @property
     def headers(self) -> dict:
@@ -92,12 +94,15 @@ class GoogleService:
         """Make an HTTP request with automatic token refresh on 401."""
         client = await self._get_client()
         kwargs.setdefault("headers", self.headers)
+        token_used = self.access_token
         
         resp = await client.request(method, url, **kwargs)
         
         # If unauthorized, try refreshing the token and retry
         if resp.status_code == 401 and self.refresh_token:
-            refreshed = await self._refresh_access_token()
+            async with self._refresh_lock:
+                # Another request may have refreshed while we waited
+                refreshed = self.access_token != token_used or await self._refresh_access_token()
             if refreshed:
                 kwargs["headers"] = self.headers  # Update with new token
                 resp = await client.request(method, url, **kwargs)
@@ -458,11 +463,27 @@ class GoogleService:
         else:
             raise Exception(f"Failed to list messages: {response.text}")
     
-    async def get_message(self, message_id: str) -> dict:
-        """Get a specific Gmail message."""
+    async def get_message(
+        self,
+        message_id: str,
+        format: str = "full",
+        metadata_headers: Optional[List[str]] = None,
+        fields: Optional[str] = None,
+    ) -> dict:
+        """Get a specific Gmail message.
+        
+        Use format="metadata" with metadata_headers when only headers and snippet
+        are needed, and fields to trim the response to the parts you read.
+        """
+        params = {"format": format}
+        if format == "metadata" and metadata_headers:
+            params["metadataHeaders"] = metadata_headers
+        if fields:
+            params["fields"] = fields
+        
         response = await self._request("GET",
             f"{self.BASE_GMAIL_URL}/messages/{message_id}",
-            params={"format": "full"},
+            params=params,
         )
         
         if response.status_code == 200:
@@ -470,6 +491,41 @@ class GoogleService:
         else:
             raise Exception(f"Failed to get message: {response.text}")
     
+    async def get_messages(
+        self,
+        message_ids: List[str],
+        format: str = "full",
+        metadata_headers: Optional[List[str]] = None,
+        fields: Optional[str] = None,
+        max_concurrency: int = 10,
+    ) -> List[dict]:
+        """Fetch several Gmail messages concurrently over the shared client.
+        
+        Requests are capped by a semaphore so a large batch doesn't trip Gmail's
+        per-user concurrency limit. Results keep the order of message_ids; a
+        message that fails to load comes back as {"id": ..., "error": "..."}.
+        """
+        if not message_ids:
+            return []
+        
+        # Make sure the client exists before fanning out so all requests share it
+        await self._get_client()
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def _fetch(message_id: str) -> dict:
+            async with semaphore:
+                try:
+                    return await self.get_message(
+                        message_id,
+                        format=format,
+                        metadata_headers=metadata_headers,
+                        fields=fields,
+                    )
+                except Exception as e:
+                    return {"id": message_id, "error": str(e)}
+        
+        return await asyncio.gather(*(_fetch(mid) for mid in message_ids))
+    
     # ==================== Calendar ====================
     
     async def list_calendars(self) -> List[dict]:
@@ -16,8 +16,7 @@ class StripeService:
         Args:
             api_key: Stripe secret key (sk_live_... or sk_test_...)
         """
-        self.api_key = api_key
-        stripe.api_key = api_key
+        self.api_key = api_key  # Passed per request: the module-wide stripe.api_key is shared by every user
     
     async def get_or_create_customer(
         self, 
@@ -39,6 +38,7 @@ class StripeService:
         try:
             # Search for existing customer
             customers = stripe.Customer.search(
+                api_key=self.api_key,
                 query=f'email:"{email}"',
                 limit=1
             )
@@ -58,7 +58,7 @@ class StripeService:
             if metadata:
                 customer_data["metadata"] = metadata
                 
-            customer = stripe.Customer.create(**customer_data)
+            customer = stripe.Customer.create(**customer_data, api_key=self.api_key)
             
             return {
                 "success": True,
@@ -102,6 +102,7 @@ class StripeService:
             # Create invoice items first
             for item in items:
                 stripe.InvoiceItem.create(
+                    api_key=self.api_key,
                     customer=customer_id,
                     amount=int(item.get("amount", 0)),  # Amount in cents
                     currency=item.get("currency", "usd"),
@@ -122,14 +123,14 @@ class StripeService:
             if metadata:
                 invoice_data["metadata"] = metadata
                 
-            invoice = stripe.Invoice.create(**invoice_data)
+            invoice = stripe.Invoice.create(**invoice_data, api_key=self.api_key)
             
             # Finalize the invoice
-            invoice = stripe.Invoice.finalize_invoice(invoice.id)
+            invoice = stripe.Invoice.finalize_invoice(invoice.id, api_key=self.api_key)
             
             # Optionally send it
             if auto_send:
-                invoice = stripe.Invoice.send_invoice(invoice.id)
+                invoice = stripe.Invoice.send_invoice(invoice.id, api_key=self.api_key)
             
             return {
                 "success": True,
@@ -162,7 +163,7 @@ class StripeService:
             Updated invoice object
         """
         try:
-            invoice = stripe.Invoice.send_invoice(invoice_id)
+            invoice = stripe.Invoice.send_invoice(invoice_id, api_key=self.api_key)
             
             return {
                 "success": True,
@@ -201,6 +202,7 @@ class StripeService:
             line_items = []
             for item in items:
                 price = stripe.Price.create(
+                    api_key=self.api_key,
                     unit_amount=int(item.get("amount", 0)),
                     currency=item.get("currency", "usd"),
                     product_data={
@@ -230,7 +232,7 @@ class StripeService:
                     }
                 }
             
-            payment_link = stripe.PaymentLink.create(**link_data)
+            payment_link = stripe.PaymentLink.create(**link_data, api_key=self.api_key)
             
             return {
                 "success": True,
@@ -258,7 +260,7 @@ class StripeService:
             Invoice object
         """
         try:
-            invoice = stripe.Invoice.retrieve(invoice_id)
+            invoice = stripe.Invoice.retrieve(invoice_id, api_key=self.api_key)
             
             return {
                 "success": True,
@@ -302,7 +304,7 @@ class StripeService:
             if status:
                 params["status"] = status
                 
-            invoices = stripe.Invoice.list(**params)
+            invoices = stripe.Invoice.list(**params, api_key=self.api_key)
             
             return {
                 "success": True,
@@ -367,7 +369,7 @@ class StripeService:
             if metadata:
                 session_data["metadata"] = metadata
             
-            session = stripe.checkout.Session.create(**session_data)
+            session = stripe.checkout.Session.create(**session_data, api_key=self.api_key)
             
             return {
                 "success": True,
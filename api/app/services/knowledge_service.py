@@ -1,4 +1,9 @@
 """Knowledge base service — builds context strings for AI consumption."""
+from collections import OrderedDict
+from threading import Lock
+from typing import Tuple
+
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models import KnowledgeEntry
 
@@ -15,12 +20,55 @@ CATEGORY_LABELS = {
 }
 
 
+# Rendered contexts: (user_id, max_chars) -> (version, text). Every run, agent
+# task and chat message asks for the context, but entries rarely change.
+_CONTEXT_CACHE_SIZE = 2048
+_contexts: "OrderedDict[Tuple[str, int], Tuple[tuple, str]]" = OrderedDict()
+_contexts_lock = Lock()
+
+
 def get_knowledge_context(user_id: str, db: Session, max_chars: int = 4000) -> str:
     """Build a knowledge context string for injection into AI prompts.
     
     Returns empty string if no knowledge entries exist.
     Entries are ordered by priority (high first), then grouped by category.
+    
+    The rendered string is cached per (user_id, max_chars) and reused while the
+    user's entry count and latest updated_at are unchanged, so a cache hit costs
+    one small aggregate query instead of loading every entry.
     """
+    version = knowledge_version(user_id, db)
+    key = (user_id, max_chars)
+    with _contexts_lock:
+        cached = _contexts.get(key)
+        if cached and cached[0] == version:
+            _contexts.move_to_end(key)  # Recently used: evicted last
+            return cached[1]
+    
+    context = _render_knowledge_context(user_id, db, max_chars) if version[0] else ""
+    with _contexts_lock:
+        _contexts[key] = (version, context)
+        _contexts.move_to_end(key)
+        while len(_contexts) > _CONTEXT_CACHE_SIZE:
+            _contexts.popitem(last=False)
+    return context
+
+
+def knowledge_version(user_id: str, db: Session) -> tuple:
+    """(entry count, latest updated_at): changes whenever an entry is added, edited or deleted."""
+    return tuple(db.query(
+        func.count(KnowledgeEntry.id), func.max(KnowledgeEntry.updated_at)
+    ).filter(KnowledgeEntry.user_id == user_id).one())
+
+
+def invalidate_knowledge_context(user_id: str):
+    """Drop a user's rendered contexts after their entries change."""
+    with _contexts_lock:
+        for key in [k for k in _contexts if k[0] == user_id]:
+            del _contexts[key]
+
+
+def _render_knowledge_context(user_id: str, db: Session, max_chars: int) -> str:
     entries = db.query(KnowledgeEntry).filter(
         KnowledgeEntry.user_id == user_id
     ).order_by(
@@ -0,0 +1,212 @@
+"""
+Metrics Rollup - Keeps daily_metrics filled for the admin dashboard trends.
+
+The dashboard used to run one COUNT per day (and per month for MAU) against
+the raw tables on every refresh. Instead, each metric is rolled up with one
+GROUP BY over the days that can still change, and the endpoint reads the
+stored rows.
+
+Days before the last rolled-up day are closed and never recomputed, so the
+trends also survive run history retention deleting old executions. The job
+re-rolls from the latest stored day onwards, which covers writes that land
+after the previous run but before midnight.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, distinct, func, or_
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal, read_engine, read_replica_enabled
+from app.models import User, Workflow, Execution, ChatMessage, DailyMetric
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DAILY_METRICS = ("signups", "executions", "messages", "dau")
+TREND_DAYS = 30
+TREND_MONTHS = 12
+
+
+def _as_date(value) -> date:
+    """func.date() returns a string on SQLite and a date on PostgreSQL."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _month_start(day: date, months_back: int = 0) -> date:
+    month = day.month - months_back
+    year = day.year
+    while month <= 0:
+        month += 12
+        year -= 1
+    return date(year, month, 1)
+
+
+def _next_month(month_start: date) -> date:
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1)
+    return date(month_start.year, month_start.month + 1, 1)
+
+
+def _midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+def _per_day(db: Session, value, timestamp, start: date, end: date, join=None) -> Dict[date, int]:
+    """SELECT date(timestamp), value ... GROUP BY date(timestamp) for [start, end)."""
+    day = func.date(timestamp)
+    query = db.query(day, value)
+    if join is not None:
+        query = query.join(*join)
+    rows = (
+        query.filter(timestamp >= _midnight(start), timestamp < _midnight(end))
+        .group_by(day)
+        .all()
+    )
+    return {_as_date(d): count or 0 for d, count in rows}
+
+
+def _rollup_days(db: Session, start: date, end: date) -> Dict[str, Dict[date, int]]:
+    """Daily values of every metric in [start, end), one grouped query each."""
+    chat_users = _per_day(db, func.count(distinct(ChatMessage.user_id)), ChatMessage.created_at, start, end)
+    exec_users = _per_day(
+        db, func.count(distinct(Workflow.user_id)), Execution.started_at, start, end,
+        join=(Execution, Execution.workflow_id == Workflow.id),
+    )
+    return {
+        "signups": _per_day(db, func.count(User.id), User.created_at, start, end),
+        "executions": _per_day(db, func.count(Execution.id), Execution.started_at, start, end),
+        "messages": _per_day(db, func.count(ChatMessage.id), ChatMessage.created_at, start, end),
+        # Same definition as the live DAU figure: the larger of chat and execution actives
+        "dau": {
+            d: max(chat_users.get(d, 0), exec_users.get(d, 0))
+            for d in set(chat_users) | set(exec_users)
+        },
+    }
+
+
+def _monthly_active_users(db: Session, month_start: date) -> int:
+    return db.query(func.count(distinct(ChatMessage.user_id))).filter(
+        ChatMessage.created_at >= _midnight(month_start),
+        ChatMessage.created_at < _midnight(_next_month(month_start)),
+    ).scalar() or 0
+
+
+def _replace_rows(db: Session, metric_names, start: date, values: Dict[str, Dict[date, int]], days, now: datetime):
+    db.query(DailyMetric).filter(
+        DailyMetric.metric.in_(metric_names),
+        DailyMetric.day >= start,
+    ).delete(synchronize_session=False)
+    db.add_all([
+        DailyMetric(metric=metric, day=day, value=values[metric].get(day, 0), computed_at=now)
+        for metric in metric_names
+        for day in days
+    ])
+
+
+def refresh_metrics(db: Session, now: Optional[datetime] = None) -> int:
+    """Roll up every day/month that can still change. Returns rows written."""
+    now = now or datetime.utcnow()
+    today = now.date()
+    first_day = today - timedelta(days=TREND_DAYS - 1)
+    first_month = _month_start(today, TREND_MONTHS - 1)
+
+    latest = dict(
+        db.query(DailyMetric.metric, func.max(DailyMetric.day))
+        .group_by(DailyMetric.metric)
+        .all()
+    )
+
+    # Daily metrics: from the oldest "latest day" across metrics, within the trend window
+    start = min(_as_date(latest[m]) if m in latest else first_day for m in DAILY_METRICS)
+    start = max(start, first_day)
+    days = [start + timedelta(days=i) for i in range((today - start).days + 1)]
+    _replace_rows(db, DAILY_METRICS, start, _rollup_days(db, start, today + timedelta(days=1)), days, now)
+
+    # MAU: closed months are final, so usually only the current month is recounted
+    month = max(_as_date(latest["mau"]) if "mau" in latest else first_month, first_month)
+    months = []
+    while month <= today:
+        months.append(month)
+        month = _next_month(month)
+    mau = {m: _monthly_active_users(db, m) for m in months}
+    _replace_rows(db, ("mau",), months[0], {"mau": mau}, months, now)
+
+    db.commit()
+    return len(days) * len(DAILY_METRICS) + len(months)
+
+
+def read_trends(db: Session, now: Optional[datetime] = None) -> dict:
+    """Dashboard trends from daily_metrics, rolling up inline if today isn't there yet."""
+    now = now or datetime.utcnow()
+    today = now.date()
+    first_day = today - timedelta(days=TREND_DAYS - 1)
+    first_month = _month_start(today, TREND_MONTHS - 1)
+
+    in_window = or_(
+        and_(DailyMetric.metric.in_(DAILY_METRICS), DailyMetric.day >= first_day),
+        and_(DailyMetric.metric == "mau", DailyMetric.day >= first_month),
+    )
+    # Plain columns, not entities: an inline refresh replaces these rows
+    columns = (DailyMetric.metric, DailyMetric.day, DailyMetric.value)
+    rows = db.query(*columns).filter(in_window).all()
+    if not any(_as_date(r.day) == today for r in rows):
+        # First request after deploy, or the background job isn't running.
+        # Roll up on the primary: db may be a read-replica session.
+        primary = SessionLocal() if read_replica_enabled() and db.get_bind() is read_engine else db
+        try:
+            refresh_metrics(primary, now)
+        except Exception as e:
+            primary.rollback()
+            logger.warning(f"[Metrics] Inline rollup failed: {e}")
+        try:
+            # Read back from the primary too, in case the replica hasn't caught up
+            rows = primary.query(*columns).filter(in_window).all()
+        finally:
+            if primary is not db:
+                primary.close()
+
+    values = {(r.metric, _as_date(r.day)): r.value for r in rows}
+    days = [first_day + timedelta(days=i) for i in range(TREND_DAYS)]
+    months = [_month_start(today, TREND_MONTHS - 1 - i) for i in range(TREND_MONTHS)]
+
+    def _daily(metric):
+        return [{"date": d.strftime("%Y-%m-%d"), "count": values.get((metric, d), 0)} for d in days]
+
+    return {
+        "signups_30d": _daily("signups"),
+        "executions_30d": _daily("executions"),
+        "dau_30d": _daily("dau"),
+        "mau_12m": [{"date": m.strftime("%Y-%m"), "count": values.get(("mau", m), 0)} for m in months],
+        "messages_30d": _daily("messages"),
+    }
+
+
+def run_metrics_rollup() -> int:
+    db = SessionLocal()
+    try:
+        return refresh_metrics(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def metrics_rollup_task():
+    """Background task that keeps daily_metrics current."""
+    interval = max(1, settings.metrics_rollup_interval_minutes) * 60
+    while True:
+        try:
+            await asyncio.to_thread(run_metrics_rollup)
+        except Exception as e:
+            # Another worker rolling up at the same moment loses on the primary key; next run catches up
+            logger.error(f"[Metrics] Rollup error: {e}")
+        await asyncio.sleep(interval)
@@ -6,6 +6,7 @@ from typing import Any, Optional
 from datetime import datetime, timedelta
 import asyncio
 import json
+import threading
 
 from app.utils.timezone import now_local, parse_datetime, format_iso, get_default_timezone
 
@@ -39,6 +40,8 @@ class NodeExecutor:
                         "refresh_token": new_refresh_token,
                     }
                     self.db.commit()
+                    from app.services.connection_cache import invalidate_connections
+                    invalidate_connections(self.user_id)
                     # Also update in-memory connections
                     self.connections[provider]["access_token"] = new_access_token
                     self.connections[provider]["refresh_token"] = new_refresh_token
@@ -2723,11 +2726,10 @@ Extract: {fields_to_extract}"""
         node_type = params.get("__node_type", "unknown")
         logs = f"[{datetime.utcnow().isoformat()}] Node type '{node_type}' not in built-in executors\n"
 
-        # Try MCP registry as fallback
+        # Try MCP registry as fallback (pooled: for-each rows reuse its servers and connections)
         try:
-            from app.mcp_servers.registry import MCPToolRegistry
-            registry = MCPToolRegistry(self.connections)
-            try:
+            from app.mcp_servers.registry import pooled_registry
+            async with pooled_registry(self.user_id, self.connections) as registry:
                 if registry.has_tool(node_type):
                     logs += f"  Routing to MCP server ({registry.get_provider_for_tool(node_type)})\n"
                     result = await registry.call_tool(node_type, params)
@@ -2738,8 +2740,6 @@ Extract: {fields_to_extract}"""
                     return {"success": True, "output": {**input_data, **result}, "logs": logs}
                 else:
                     logs += f"  No MCP tool found for '{node_type}'\n"
-            finally:
-                await registry.close()
         except Exception as e:
             logs += f"  MCP fallback failed: {e}\n"
 
@@ -3124,7 +3124,18 @@ def execute_node(
             future = pool.submit(_run_executor_sync, executor, node_type, parameters, input_data)
             return future.result()
     except RuntimeError:
-        # No running loop - create a new one
+        # No running loop. Dispatcher workers reuse their thread's loop, so pooled
+        # MCP registries and their open connections carry over between nodes;
+        # any other thread gets a loop for this call only.
+        loop = getattr(_thread_state, "loop", None)
+        if loop is not None:
+            try:
+                return loop.run_until_complete(
+                    executor.execute(node_type, parameters, input_data)
+                )
+            finally:
+                loop.run_until_complete(executor.close())
+        
         loop = asyncio.new_event_loop()
         try:
             result = loop.run_until_complete(
@@ -3136,6 +3147,21 @@ def execute_node(
             loop.close()
 
 
+_thread_state = threading.local()
+
+
+def keep_thread_loop():
+    """
+    Give this thread one event loop for every node it runs, with pooled MCP
+    registries. Only for threads that live as long as the process (dispatcher
+    workers): the loop is never closed.
+    """
+    from app.mcp_servers.registry import register_pooling_loop
+    
+    _thread_state.loop = asyncio.new_event_loop()
+    register_pooling_loop(_thread_state.loop)
+
+
 def _run_executor_sync(executor, node_type, parameters, input_data):
     """Run executor in a new event loop (for use in thread pool)."""
     loop = asyncio.new_event_loop()
@@ -1,5 +1,6 @@
 """Plan limit enforcement for trial and paid users."""
 from fastapi import HTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.models import User, Workflow, KnowledgeEntry
 from app.models.user import TRIAL_DURATION_DAYS
@@ -145,9 +146,24 @@ def check_can_import_file(user: User):
 
 
 def increment_run_count(user: User, db: Session):
-    """Increment the user's total run count."""
-    user.total_runs_used = (user.total_runs_used or 0) + 1
+    """
+    Increment the user's total run count.
+    
+    Done as a single UPDATE so concurrent runs can't lose increments, and so
+    it works for a user object that isn't attached to this session.
+    """
+    db.query(User).filter(User.id == user.id).update(
+        {User.total_runs_used: func.coalesce(User.total_runs_used, 0) + 1},
+        synchronize_session=False,
+    )
     db.commit()
+    # Usage pages read total_runs_used off the cached current user
+    from app.services.user_cache import invalidate_user
+    invalidate_user(user.id)
+    # Trial run quotas are small enough that a cached verdict matters
+    if user.is_trial:
+        from app.services.webhook_routing import invalidate_user_routes
+        invalidate_user_routes(user.id)
 
 
 def get_usage_summary(user: User, db: Session) -> dict:
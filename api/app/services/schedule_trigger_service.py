@@ -9,8 +9,9 @@ from zoneinfo import ZoneInfo
 
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import SessionLocal, json_array_has
 from app.models import Workflow, Execution, User
+from app.services.webhook_routing import invalidate_webhook_route
 
 logger = logging.getLogger(__name__)
 
@@ -99,6 +100,7 @@ async def poll_schedule_triggers():
         workflows = db.query(Workflow).filter(
             Workflow.is_active == True,
             Workflow.is_agent_task == False,
+            json_array_has(Workflow.nodes, "type", "start_schedule", db.get_bind().dialect.name),
         ).all()
         
         now = datetime.now(ZoneInfo("UTC"))
@@ -211,6 +213,7 @@ async def poll_schedule_triggers():
                 if freq == "once":
                     workflow.is_active = False
                     db.commit()
+                    invalidate_webhook_route(workflow.id)
                     logger.info(f"[Schedule Trigger] Deactivated one-time workflow '{workflow.name}'")
                     
             except Exception as e:
@@ -0,0 +1,160 @@
+"""
+Trigger Coalescer - Turns bursts of webhook events into one batched run.
+
+A workflow opts in with batch_window_seconds (and optionally
+batch_max_events) on its form/webhook trigger node. The first event opens a
+window; every event that arrives before it closes is buffered, and when the
+window ends (or batch_max_events is reached) a single execution is created
+with trigger data shaped like a sheet read:
+
+    {"rows": [event, ...], "row_count": n, "__iterate_rows": True, "_batch": {...}}
+
+The start node passes that through, so WorkflowRunner's existing for-each
+path runs the downstream steps once per row inside one execution.
+
+Buffers live in this process's memory and run on the event loop, so no
+locking is needed. Senders are acked before the batch is stored, so a batch
+that fails to store goes back into the buffer and is retried one window
+later, up to webhook_batch_flush_attempts times. Open windows are flushed on
+shutdown; events still buffered when the process dies abruptly are lost,
+which is the trade-off for not writing each one.
+"""
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models import Execution
+from app.services.execution_dispatcher import dispatch_execution
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class _PendingBatch:
+    window_seconds: float
+    max_events: int
+    opened_at: datetime = field(default_factory=datetime.utcnow)
+    rows: List[dict] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    attempts: int = 0  # Failed attempts to store this batch
+
+
+class TriggerCoalescer:
+    """Per-workflow event buffers that flush into one execution each."""
+
+    def __init__(self):
+        self._pending: Dict[str, _PendingBatch] = {}
+        self._flushing: Set[asyncio.Task] = set()  # Timer flushes, held so they aren't garbage-collected
+
+    async def add(self, workflow_id: str, event: dict, window_seconds: float, max_events: int) -> dict:
+        """Buffer an event. Returns where it landed (position in the open batch)."""
+        batch = self._pending.get(workflow_id)
+        if batch is None:
+            batch = _PendingBatch(window_seconds=window_seconds, max_events=max_events)
+            self._schedule(workflow_id, batch)
+
+        batch.rows.append(event)
+        position = len(batch.rows)
+
+        if position >= batch.max_events:
+            await self.flush(workflow_id, "max_events")
+
+        return {"batch_position": position, "batch_window_seconds": window_seconds}
+
+    def _schedule(self, workflow_id: str, batch: _PendingBatch):
+        """Buffer a batch and flush it once its window has elapsed."""
+        batch.timer = asyncio.get_running_loop().call_later(
+            batch.window_seconds, self._flush_later, workflow_id
+        )
+        self._pending[workflow_id] = batch
+
+    def _requeue(self, workflow_id: str, batch: _PendingBatch):
+        """Put a batch that failed to store back in front of any events buffered since."""
+        newer = self._pending.pop(workflow_id, None)
+        if newer is not None:
+            if newer.timer:
+                newer.timer.cancel()
+            batch.rows.extend(newer.rows)
+        self._schedule(workflow_id, batch)
+
+    def _flush_later(self, workflow_id: str):
+        """Timer callback: flush once the window has elapsed."""
+        task = asyncio.ensure_future(self.flush(workflow_id, "window"))
+        self._flushing.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._flushing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"[Coalescer] Timed flush failed: {task.exception()}")
+
+    async def flush(self, workflow_id: str, reason: str) -> Optional[str]:
+        """Close a workflow's window and start one execution for its events."""
+        # Pop before any await so new events open a fresh window
+        batch = self._pending.pop(workflow_id, None)
+        if batch is None or not batch.rows:
+            return None
+        if batch.timer:
+            batch.timer.cancel()
+
+        trigger_data = {
+            "rows": batch.rows,
+            "row_count": len(batch.rows),
+            "__iterate_rows": True,
+            "_batch": {
+                "reason": reason,
+                "window_seconds": batch.window_seconds,
+                "opened_at": batch.opened_at.isoformat(),
+                "flushed_at": datetime.utcnow().isoformat(),
+            },
+        }
+
+        execution_id = str(uuid.uuid4())
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add(Execution(
+                    id=execution_id,
+                    workflow_id=workflow_id,
+                    status="running",
+                    started_at=datetime.utcnow(),
+                    trigger_data=trigger_data,
+                ))
+                await db.commit()
+        except Exception as e:
+            batch.attempts += 1
+            if batch.attempts >= settings.webhook_batch_flush_attempts:
+                logger.error(
+                    f"[Coalescer] Dropping batch of {len(batch.rows)} events for workflow {workflow_id} "
+                    f"after {batch.attempts} failed attempts: {e}"
+                )
+            else:
+                logger.warning(f"[Coalescer] Failed to store batch of {len(batch.rows)} events for workflow {workflow_id}, retrying: {e}")
+                self._requeue(workflow_id, batch)
+            return None
+
+        dispatch_execution(execution_id, trigger_data)
+        logger.info(f"[Coalescer] Workflow {workflow_id}: {len(batch.rows)} events -> execution {execution_id} ({reason})")
+        return execution_id
+
+    async def flush_all(self, reason: str = "shutdown"):
+        """Wait for timed flushes already underway, then flush every open window."""
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+        for workflow_id in list(self._pending):
+            # A failed store requeues the batch; retry now, bounded by its attempts
+            while workflow_id in self._pending:
+                await self.flush(workflow_id, reason)
+
+    def pending_count(self, workflow_id: str) -> int:
+        batch = self._pending.get(workflow_id)
+        return len(batch.rows) if batch else 0
+
+
+# Global coalescer instance
+trigger_coalescer = TriggerCoalescer()
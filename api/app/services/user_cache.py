@@ -0,0 +1,173 @@
+"""
+User Cache - Resolves the authenticated user without a DB round-trip per API call.
+
+Every authenticated request used to load the User row in get_current_user.
+The row changes rarely (profile edits, plan/run counters, admin grants), so a
+snapshot of its columns is cached for USER_CACHE_TTL_SECONDS, keyed by
+(user_id, token iat) so a freshly issued token never reuses an older entry.
+
+Writers call invalidate_user() after committing. The TTL is the safety net for
+changes made by another process; set USER_CACHE_REDIS_URL to share entries
+(and invalidations) between workers instead. Credential columns (password hash,
+verification and reset tokens) are never cached: endpoints that need them load
+the user on their own session.
+"""
+import json
+import time
+import logging
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import DateTime
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.config import get_settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_SECRET_COLUMNS = {"hashed_password", "verification_token", "password_reset_token", "password_reset_expires"}
+_COLUMNS = [c for c in User.__table__.columns if c.name not in _SECRET_COLUMNS]
+
+
+def snapshot_user(user: User) -> dict:
+    """The cacheable column values of a loaded user."""
+    return {c.name: getattr(user, c.name) for c in _COLUMNS}
+
+
+def user_from_snapshot(snapshot: dict) -> User:
+    """A new detached User per request, so callers never share an instance."""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
+
+class MemoryUserCache:
+    """
+    Per-process cache: {user_id: {iat: (expires_at, snapshot)}}.
+
+    Every login adds an entry, so expired ones are swept on write (at most
+    once per TTL) rather than left until the user's row changes.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Dict[int, Tuple[float, dict]]] = {}
+        self._lock = Lock()
+        self._next_prune = 0.0
+
+    def get(self, user_id: str, iat: int) -> Optional[dict]:
+        entry = self._entries.get(user_id, {}).get(iat)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def set(self, user_id: str, iat: int, snapshot: dict):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+                self._next_prune = now + self.ttl_seconds
+            self._entries.setdefault(user_id, {})[iat] = (now + self.ttl_seconds, snapshot)
+
+    def _prune(self, now: float):
+        for user_id in list(self._entries):
+            tokens = self._entries[user_id]
+            for iat in [iat for iat, (expires_at, _) in tokens.items() if expires_at <= now]:
+                del tokens[iat]
+            if not tokens:
+                del self._entries[user_id]
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisUserCache:
+    """
+    Shared cache for multi-process deployments: one hash per user (field = iat),
+    so invalidate() drops every token's entry in one DEL for all workers.
+    """
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis  # Optional dependency, only needed when USER_CACHE_REDIS_URL is set
+
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    @staticmethod
+    def _key(user_id: str) -> str:
+        return f"aivaro:user:{user_id}"
+
+    def get(self, user_id: str, iat: int) -> Optional[dict]:
+        try:
+            raw = self._client.hget(self._key(user_id), str(iat))
+        except Exception as e:
+            logger.warning(f"[UserCache] Redis get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        snapshot = json.loads(raw)
+        for column in _COLUMNS:
+            if isinstance(column.type, DateTime) and snapshot.get(column.name):
+                snapshot[column.name] = datetime.fromisoformat(snapshot[column.name])
+        return snapshot
+
+    def set(self, user_id: str, iat: int, snapshot: dict):
+        raw = json.dumps(snapshot, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+        try:
+            pipe = self._client.pipeline()
+            pipe.hset(self._key(user_id), str(iat), raw)
+            pipe.expire(self._key(user_id), self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[UserCache] Redis set failed: {e}")
+
+    def invalidate(self, user_id: str):
+        try:
+            self._client.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"[UserCache] Redis invalidate failed: {e}")
+
+    def clear(self):
+        pass  # Shared entries expire on their own
+
+
+def _build_cache():
+    if settings.user_cache_redis_url:
+        try:
+            return RedisUserCache(settings.user_cache_redis_url, settings.user_cache_ttl_seconds)
+        except ImportError:
+            logger.warning("[UserCache] USER_CACHE_REDIS_URL is set but redis is not installed; using the in-process cache")
+    return MemoryUserCache(settings.user_cache_ttl_seconds)
+
+
+_cache = _build_cache()
+
+
+def get_cached_user(user_id: str, iat: int) -> Optional[User]:
+    """The cached user for this token, or None on a miss (or if caching is off)."""
+    if settings.user_cache_ttl_seconds <= 0:
+        return None
+    snapshot = _cache.get(user_id, iat)
+    return user_from_snapshot(snapshot) if snapshot else None
+
+
+def cache_user(user: User, iat: int):
+    if settings.user_cache_ttl_seconds > 0:
+        _cache.set(user.id, iat, snapshot_user(user))
+
+
+def invalidate_user(user_id: str):
+    """Drop a user's cached entries after their row is changed."""
+    _cache.invalidate(user_id)
+
+
+def clear_user_cache():
+    _cache.clear()
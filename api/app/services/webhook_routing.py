@@ -0,0 +1,143 @@
+"""
+Webhook Routing Cache - Warm per-process table of webhook-triggerable workflows.
+
+Every webhook hit used to load the full Workflow row (nodes/edges JSON) and
+the owner User just to answer "may this id be triggered right now?". The
+answer only changes when the workflow is edited, (de)activated or deleted, or
+when the owner's plan state changes, so it is cached here keyed by workflow id.
+
+Writers call invalidate_webhook_route() / invalidate_user_routes() after
+committing. Entries also expire after WEBHOOK_ROUTE_CACHE_TTL_SECONDS so that
+changes made by another process are picked up. The plan verdict is only a fast
+reject: WorkflowRunner re-checks plan limits before doing any work.
+"""
+import time
+import logging
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models import Workflow, User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WEBHOOK_TRIGGER_TYPES = ("start_form", "start_webhook")
+
+
+@dataclass(frozen=True)
+class WebhookRoute:
+    """What the webhook endpoints need to know about a workflow."""
+    workflow_id: str
+    user_id: str
+    is_active: bool
+    trigger_types: Tuple[str, ...]
+    owner_found: bool
+    plan_error: Optional[str]  # None if the owner may run workflows
+    expires_at: float
+    batch_window_seconds: float = 0  # > 0: coalesce events into one run (see trigger_coalescer)
+    batch_max_events: int = 0
+
+    @property
+    def has_webhook_trigger(self) -> bool:
+        return any(t in WEBHOOK_TRIGGER_TYPES for t in self.trigger_types)
+
+
+_routes: Dict[str, WebhookRoute] = {}
+_routes_lock = Lock()
+
+
+def _batch_settings(nodes: list) -> Tuple[float, int]:
+    """
+    Read the optional batch window from the webhook/form trigger node.
+    
+    parameters.batch_window_seconds turns coalescing on; batch_max_events
+    flushes early once that many events are waiting. Both are clamped to
+    the server-wide limits.
+    """
+    trigger = next((n for n in nodes if n.get("type") in WEBHOOK_TRIGGER_TYPES), None)
+    params = (trigger or {}).get("parameters") or {}
+    try:
+        window = float(params.get("batch_window_seconds") or 0)
+        max_events = int(params.get("batch_max_events") or 0)
+    except (TypeError, ValueError):
+        return 0, 0
+    if window <= 0:
+        return 0, 0
+    window = min(window, settings.webhook_batch_window_max_seconds)
+    if max_events <= 0 or max_events > settings.webhook_batch_max_items:
+        max_events = settings.webhook_batch_max_items
+    return window, max_events
+
+
+def _compile_route(workflow: Workflow, owner: Optional[User]) -> WebhookRoute:
+    """Build a route entry from the workflow row and its owner."""
+    from app.services.plan_limits import check_can_run_workflow
+
+    trigger_types = tuple(
+        node.get("type")
+        for node in (workflow.nodes or [])
+        if str(node.get("type", "")).startswith("start_")
+    )
+
+    batch_window, batch_max = _batch_settings(workflow.nodes or [])
+
+    plan_error = None
+    if owner:
+        try:
+            check_can_run_workflow(owner)
+        except Exception as limit_err:
+            plan_error = str(getattr(limit_err, 'detail', {}).get('message', 'Plan limit reached'))
+
+    return WebhookRoute(
+        workflow_id=workflow.id,
+        user_id=workflow.user_id,
+        is_active=bool(workflow.is_active),
+        trigger_types=trigger_types,
+        owner_found=owner is not None,
+        plan_error=plan_error,
+        expires_at=time.monotonic() + settings.webhook_route_cache_ttl_seconds,
+        batch_window_seconds=batch_window,
+        batch_max_events=batch_max,
+    )
+
+
+async def get_webhook_route(db: AsyncSession, workflow_id: str) -> Optional[WebhookRoute]:
+    """Return the cached route for a workflow, loading it on a miss. None if the workflow doesn't exist."""
+    route = _routes.get(workflow_id)
+    if route and route.expires_at > time.monotonic():
+        return route
+
+    workflow = await db.get(Workflow, workflow_id)
+    if not workflow:
+        invalidate_webhook_route(workflow_id)
+        return None
+
+    owner = await db.get(User, workflow.user_id)
+    route = _compile_route(workflow, owner)
+    with _routes_lock:
+        _routes[workflow_id] = route
+    return route
+
+
+def invalidate_webhook_route(workflow_id: str):
+    """Drop a workflow's route after it is updated, (de)activated or deleted."""
+    with _routes_lock:
+        _routes.pop(workflow_id, None)
+
+
+def invalidate_user_routes(user_id: str):
+    """Drop every route owned by a user after their plan state changes."""
+    with _routes_lock:
+        stale = [wid for wid, route in _routes.items() if route.user_id == user_id]
+        for wid in stale:
+            del _routes[wid]
+
+
+def clear_webhook_routes():
+    """Drop the whole table."""
+    with _routes_lock:
+        _routes.clear()
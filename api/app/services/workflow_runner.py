@@ -3,20 +3,23 @@ from uuid import UUID
 from datetime import datetime
 from typing import Optional
 
-from app.models import Workflow, Execution, ExecutionNode, Approval, Connection, User
+from app.models import Workflow, Execution, ExecutionNode, Approval, User
+from app.services.connection_cache import get_user_connections, connected_credentials
 from app.services.node_executor import execute_node
 from app.utils.timezone import now_local, now_utc, today_local, current_time_local
 
 
 class WorkflowRunner:
-    def __init__(self, db: Session, execution_id: UUID):
+    def __init__(self, db: Session, execution_id: UUID, connections: Optional[dict] = None):
+        """connections: credentials already loaded for the workflow owner (bulk resumes share them)."""
         self.db = db
         self.execution = db.query(Execution).filter(Execution.id == execution_id).first()
         self.workflow = self.execution.workflow
         self.nodes = {n["id"]: n for n in self.workflow.nodes}
         self.edges = self.workflow.edges
         self._fix_condition_edges()  # Repair missing sourceHandle on condition edges
-        self.connections = self._load_connections()
+        self._user_connections = None  # Cached connection rows, shared with _build_input_data
+        self.connections = connections if connections is not None else self._load_connections()
     
     def _fix_condition_edges(self):
         """Auto-repair edges from condition nodes that are missing sourceHandle.
@@ -64,21 +67,14 @@ class WorkflowRunner:
                 # Also add a synthetic "no" handle so it doesn't block
                 print(f"[WorkflowRunner] Condition node {cid} has only 1 outgoing edge. Assigned sourceHandle='yes'.")
 
+    def _get_user_connections(self) -> list:
+        if self._user_connections is None:
+            self._user_connections = get_user_connections(self.db, self.workflow.user_id)
+        return self._user_connections
+
     def _load_connections(self) -> dict:
         """Load user's connections for use in node execution."""
-        user_id = self.workflow.user_id
-        connections_data = {}
-        
-        connections = self.db.query(Connection).filter(
-            Connection.user_id == user_id,
-            Connection.is_connected == True
-        ).all()
-        
-        for conn in connections:
-            if conn.credentials:
-                connections_data[conn.type] = conn.credentials
-        
-        return connections_data
+        return connected_credentials(self._get_user_connections())
         
     def get_start_nodes(self) -> list[dict]:
         """Find nodes with type 'start'"""
@@ -200,12 +196,8 @@ class WorkflowRunner:
             
             # Get the connected Google email (the actual Gmail they authenticated with)
             try:
-                from app.models.connection import Connection
                 import json
-                google_conn = self.db.query(Connection).filter(
-                    Connection.user_id == self.workflow.user_id,
-                    Connection.type == "google"
-                ).first()
+                google_conn = next((c for c in self._get_user_connections() if c.type == "google"), None)
                 if google_conn:
                     creds = google_conn.credentials
                     if isinstance(creds, str):
@@ -575,6 +567,45 @@ class WorkflowRunner:
             result = result.replace(f"{{{{{key}}}}}", str(value))
         return result
     
+    def _exec_node_for_approval(self, approval: Approval) -> Optional[ExecutionNode]:
+        """
+        The paused step an approval belongs to. A for-each run visits the same
+        node once per row, creating one execution node and one approval per
+        visit in the same order, so the n-th approval pairs with the n-th node.
+        """
+        approval_ids = [a_id for (a_id,) in self.db.query(Approval.id).filter(
+            Approval.execution_id == self.execution.id,
+            Approval.node_id == approval.node_id,
+        ).order_by(Approval.created_at).all()]
+        exec_nodes = self.db.query(ExecutionNode).filter(
+            ExecutionNode.execution_id == self.execution.id,
+            ExecutionNode.node_id == approval.node_id,
+        ).order_by(ExecutionNode.started_at).all()
+        if not exec_nodes:
+            return None
+        index = approval_ids.index(approval.id)
+        return exec_nodes[index] if index < len(exec_nodes) else exec_nodes[-1]
+    
+    def resume_from_approvals(self, approval_ids: list) -> str:
+        """
+        Resume several approved steps of this execution in one pass (bulk
+        approve), oldest first. Stays paused while other approvals are pending.
+        """
+        for approval_id in approval_ids:
+            self.resume_from_approval(approval_id)
+            if self.execution.status == "failed":
+                return self.execution.status
+        
+        still_pending = self.db.query(Approval.id).filter(
+            Approval.execution_id == self.execution.id,
+            Approval.status == "pending",
+        ).first()
+        if still_pending:
+            self.execution.status = "paused"
+            self.execution.completed_at = None
+            self.db.commit()
+        return self.execution.status
+    
     def resume_from_approval(self, approval_id: UUID):
         """Resume execution after approval"""
         approval = self.db.query(Approval).filter(Approval.id == approval_id).first()
@@ -582,10 +613,7 @@ class WorkflowRunner:
             return
         
         node = self.nodes.get(approval.node_id)
-        exec_node = self.db.query(ExecutionNode).filter(
-            ExecutionNode.execution_id == self.execution.id,
-            ExecutionNode.node_id == approval.node_id
-        ).first()
+        exec_node = self._exec_node_for_approval(approval)
         
         if not exec_node:
             return
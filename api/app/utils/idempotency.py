@@ -5,6 +5,7 @@ Prevents duplicate processing of the same request.
 from typing import Optional, Any, Dict
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from contextlib import contextmanager
 import hashlib
 import json
 import logging
@@ -27,9 +28,8 @@ class IdempotencyStore:
     """
     In-memory store for idempotency keys.
     
-    In production, use Redis for distributed systems:
-    - redis.setex(key, ttl, value)
-    - redis.get(key)
+    Only visible to the current process. Anything that must dedupe across
+    workers (webhooks) uses DatabaseIdempotencyStore below.
     """
     
     def __init__(self, default_ttl: int = 3600):
@@ -112,8 +112,240 @@ class IdempotencyStore:
         return self.get(key) is not None
 
 
-# Global idempotency store
-idempotency_store = IdempotencyStore()
+class DatabaseIdempotencyStore:
+    """
+    DB-backed store for idempotency keys.
+    
+    Shared by every worker process and survives restarts, so provider retries
+    (Stripe retries for up to 3 days) are caught no matter which replica they hit.
+    Methods take an optional session; without one they open a short-lived session.
+    """
+    
+    CLEANUP_INTERVAL_SECONDS = 300
+    CLEANUP_BATCH_SIZE = 1000
+    
+    def __init__(self, default_ttl: int = 3600, session_factory=None):
+        """
+        Initialize the store.
+        
+        Args:
+            default_ttl: Default time-to-live in seconds (1 hour)
+            session_factory: Callable returning a new Session (default: app.database.SessionLocal)
+        """
+        self.default_ttl = default_ttl
+        self._session_factory = session_factory
+        self._lock = Lock()
+        self._last_cleanup = datetime.utcnow()
+    
+    @contextmanager
+    def _session(self, db=None):
+        if db is not None:
+            yield db
+            return
+        if self._session_factory is None:
+            from app.database import SessionLocal
+            self._session_factory = SessionLocal
+        session = self._session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    
+    @staticmethod
+    def _to_record(row) -> IdempotencyRecord:
+        return IdempotencyRecord(
+            key=row.key,
+            response=row.response,
+            status_code=row.status_code or 200,
+            created_at=row.created_at,
+            expires_at=row.expires_at,
+        )
+    
+    def _maybe_cleanup(self, db):
+        """Purge expired keys at most every few minutes."""
+        now = datetime.utcnow()
+        with self._lock:
+            if (now - self._last_cleanup).total_seconds() < self.CLEANUP_INTERVAL_SECONDS:
+                return
+            self._last_cleanup = now
+        try:
+            self.purge_expired(db=db)
+        except Exception as e:
+            logger.warning(f"[Idempotency] Expired key cleanup failed: {e}")
+    
+    def get(self, key: str, db=None) -> Optional[IdempotencyRecord]:
+        """Get a record by key if it exists and hasn't expired."""
+        from app.models import IdempotencyKey
+        
+        with self._session(db) as session:
+            row = session.get(IdempotencyKey, key)
+            if row and row.expires_at > datetime.utcnow():
+                return self._to_record(row)
+        return None
+    
+    def claim(self, key: str, ttl: Optional[int] = None, db=None) -> Optional[IdempotencyRecord]:
+        """
+        Atomically reserve a key before doing the work.
+        
+        Returns None if this caller now owns the key, or the existing record if
+        the key was already claimed (its response is None while still in flight).
+        Relies on the primary key, so two concurrent deliveries can't both win.
+        
+        ttl is how long an unanswered claim holds the key. Keep it short: if the
+        owner dies before set() or release(), the next delivery takes over once
+        it lapses. set() then stores the result for its own (longer) ttl.
+        """
+        from sqlalchemy.exc import IntegrityError
+        from app.models import IdempotencyKey
+        
+        ttl = ttl or self.default_ttl
+        now = datetime.utcnow()
+        
+        with self._session(db) as session:
+            self._maybe_cleanup(session)
+            session.add(IdempotencyKey(
+                key=key,
+                created_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            ))
+            try:
+                session.commit()
+                return None
+            except IntegrityError:
+                session.rollback()
+            
+            row = session.get(IdempotencyKey, key)
+            if row is None:
+                # Deleted between our insert and read — treat as ours
+                return self.claim(key, ttl, db=session)
+            if row.expires_at <= now:
+                # Expired but not swept yet: take it over, unless a concurrent
+                # retry got there first
+                if self._take_over_expired(session, key, now, ttl):
+                    return None
+                row = session.get(IdempotencyKey, key, populate_existing=True)
+                if row is None:
+                    return self.claim(key, ttl, db=session)
+            return self._to_record(row)
+    
+    @staticmethod
+    def _take_over_expired(session, key: str, now: datetime, ttl: int) -> bool:
+        """
+        Reset an expired key to a fresh claim with one conditional UPDATE.
+        
+        Two retries can both read the expired row, but only one UPDATE still
+        matches expires_at <= now, so only that caller owns the key.
+        """
+        from app.models import IdempotencyKey
+        
+        taken = session.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= now,
+        ).update({
+            IdempotencyKey.response: None,
+            IdempotencyKey.status_code: None,
+            IdempotencyKey.created_at: now,
+            IdempotencyKey.expires_at: now + timedelta(seconds=ttl),
+        }, synchronize_session=False)
+        session.commit()
+        return taken == 1
+    
+    def renew(self, key: str, ttl: Optional[int] = None, db=None):
+        """Push back the expiry of a claim that is still in flight (no response stored yet)."""
+        from app.models import IdempotencyKey
+        
+        ttl = ttl or self.default_ttl
+        with self._session(db) as session:
+            session.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key,
+                IdempotencyKey.response.is_(None),
+            ).update(
+                {IdempotencyKey.expires_at: datetime.utcnow() + timedelta(seconds=ttl)},
+                synchronize_session=False,
+            )
+            session.commit()
+    
+    def set(
+        self,
+        key: str,
+        response: Any,
+        status_code: int = 200,
+        ttl: Optional[int] = None,
+        db=None,
+    ) -> IdempotencyRecord:
+        """
+        Store a response for an idempotency key.
+        
+        Args:
+            key: The idempotency key
+            response: The response to cache (must be JSON-serializable)
+            status_code: HTTP status code
+            ttl: Time-to-live in seconds (default: store default)
+        """
+        from app.models import IdempotencyKey
+        
+        ttl = ttl or self.default_ttl
+        now = datetime.utcnow()
+        
+        with self._session(db) as session:
+            row = session.get(IdempotencyKey, key)
+            if row is None:
+                row = IdempotencyKey(key=key, created_at=now)
+                session.add(row)
+            row.response = response
+            row.status_code = status_code
+            row.expires_at = now + timedelta(seconds=ttl)
+            session.commit()
+            return self._to_record(row)
+    
+    def release(self, key: str, db=None):
+        """Drop a claim whose work failed, so the sender's retry can go through."""
+        from app.models import IdempotencyKey
+        
+        with self._session(db) as session:
+            session.query(IdempotencyKey).filter(
+                IdempotencyKey.key == key,
+                IdempotencyKey.response.is_(None),
+            ).delete(synchronize_session=False)
+            session.commit()
+    
+    def exists(self, key: str, db=None) -> bool:
+        """Check if a key exists and is not expired."""
+        return self.get(key, db=db) is not None
+    
+    def purge_expired(self, db=None, batch_size: Optional[int] = None) -> int:
+        """Delete expired keys in small batches so the table is never locked for long."""
+        from app.models import IdempotencyKey
+        
+        batch_size = batch_size or self.CLEANUP_BATCH_SIZE
+        now = datetime.utcnow()
+        total = 0
+        
+        with self._session(db) as session:
+            while True:
+                keys = [
+                    k for (k,) in session.query(IdempotencyKey.key)
+                    .filter(IdempotencyKey.expires_at < now)
+                    .limit(batch_size)
+                    .all()
+                ]
+                if not keys:
+                    break
+                session.query(IdempotencyKey).filter(
+                    IdempotencyKey.key.in_(keys)
+                ).delete(synchronize_session=False)
+                session.commit()
+                total += len(keys)
+                if len(keys) < batch_size:
+                    break
+        
+        if total:
+            logger.debug(f"Cleaned up {total} expired idempotency records")
+        return total
+
+
+# Global idempotency store — DB-backed so every worker sees the same keys
+idempotency_store = DatabaseIdempotencyStore()
 
 
 def generate_idempotency_key(
@@ -164,6 +396,19 @@ def generate_webhook_idempotency_key(
     return ":".join(key_parts)
 
 
+def build_webhook_idempotency_key(workflow_id: str, source: str, value: str) -> str:
+    """
+    Build a bounded-length key for a webhook delivery.
+    
+    Args:
+        workflow_id: The workflow being triggered
+        source: Where the id came from (e.g. "header", "stripe", "github")
+        value: The Idempotency-Key header or the provider's event/delivery id
+    """
+    value_hash = hashlib.sha256(str(value).encode()).hexdigest()[:32]
+    return f"webhook:{workflow_id}:{source}:{value_hash}"
+
+
 class IdempotentOperation:
     """
     Context manager for idempotent operations.
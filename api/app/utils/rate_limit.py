@@ -76,11 +76,15 @@ class RateLimiter:
     def check_limit(
         self,
         key: str,
-        config: Optional[RateLimitConfig] = None
+        config: Optional[RateLimitConfig] = None,
+        weight: int = 1,
     ) -> tuple[bool, Optional[float]]:
         """
         Check if a request is allowed under rate limits.
         
+        Args:
+            weight: How many requests this call counts as (e.g. a batch of N API calls)
+        
         Returns:
             (allowed, retry_after) - If not allowed, retry_after is seconds to wait
         """
@@ -92,13 +96,13 @@ class RateLimiter:
             self._clean_old_requests(state, now)
             
             # Check minute limit
-            if len(state.minute_requests) >= config.requests_per_minute:
+            if state.minute_requests and len(state.minute_requests) + weight > config.requests_per_minute:
                 oldest = min(state.minute_requests)
                 retry_after = 60 - (now - oldest)
                 return False, max(0.1, retry_after)
             
             # Check hour limit
-            if len(state.hour_requests) >= config.requests_per_hour:
+            if state.hour_requests and len(state.hour_requests) + weight > config.requests_per_hour:
                 oldest = min(state.hour_requests)
                 retry_after = 3600 - (now - oldest)
                 return False, max(0.1, retry_after)
@@ -109,14 +113,14 @@ class RateLimiter:
             
             return True, None
     
-    def record_request(self, key: str):
+    def record_request(self, key: str, weight: int = 1):
         """Record a request for rate limiting."""
         state = self._get_state(key)
         now = time.time()
         
         with state.lock:
-            state.minute_requests.append(now)
-            state.hour_requests.append(now)
+            state.minute_requests.extend([now] * weight)
+            state.hour_requests.extend([now] * weight)
             state.concurrent += 1
     
     def release_request(self, key: str):
@@ -129,7 +133,8 @@ class RateLimiter:
         self,
         key: str,
         config: Optional[RateLimitConfig] = None,
-        timeout: float = 30.0
+        timeout: float = 30.0,
+        weight: int = 1,
     ) -> bool:
         """
         Acquire permission to make a request, waiting if necessary.
@@ -139,10 +144,10 @@ class RateLimiter:
         start_time = time.time()
         
         while time.time() - start_time < timeout:
-            allowed, retry_after = self.check_limit(key, config)
+            allowed, retry_after = self.check_limit(key, config, weight)
             
             if allowed:
-                self.record_request(key)
+                self.record_request(key, weight)
                 return True
             
             if retry_after and retry_after < timeout - (time.time() - start_time):
@@ -0,0 +1,98 @@
+"""
+Benchmark the chat system prompt layout for provider-side prefix caching.
+
+Compares the old layout (per-user context first, then the instructions) with
+the current one (CHAT_INSTRUCTIONS first, then the user context):
+
+- offline: how much of the prompt is shared between two users and between two
+  turns of one user whose run count changed, i.e. how much can be cached
+- with OPENAI_API_KEY set: prompt/cached tokens and latency over several turns
+
+Usage (from api/):
+    python benchmark_chat_prompt.py [--turns 6] [--model gpt-4o]
+"""
+import argparse
+import os
+import time
+
+from app.services.agentic_chat import CHAT_INSTRUCTIONS, TOOLS
+
+
+def _context(name, runs):
+    return (
+        f"USER CONTEXT:\nYou're talking to {name} who runs a salon business.\n"
+        f"ACCOUNT: 3 workflows. Timezone: America/Los_Angeles\n"
+        f"CONNECTED TOOLS:\n  - google: connected\n  - slack: connected\n"
+        f"RECENT ACTIVITY (last 7 days): {runs} workflow runs ({runs - 1} completed, 1 failed)\n"
+        f"BUSINESS KNOWLEDGE BASE (use this context when responding, creating workflows, and replying to emails):\n"
+        f"[Pricing & Packages]\n- Haircut: $40"
+    )
+
+
+def build(layout, name, runs):
+    if layout == "legacy":
+        return f"{_context(name, runs)}\n\n{CHAT_INSTRUCTIONS}"
+    return f"{CHAT_INSTRUCTIONS}\n\n{_context(name, runs)}"
+
+
+def _shared_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def offline():
+    print(f"{'':34}{'legacy':>12}{'split':>12}")
+    rows = {
+        "prompt chars": lambda l: len(build(l, "Ana", 12)),
+        "shared between users (chars)": lambda l: _shared_prefix(build(l, "Ana", 12), build(l, "Ben", 12)),
+        "shared across turns (chars)": lambda l: _shared_prefix(build(l, "Ana", 12), build(l, "Ana", 13)),
+    }
+    for label, fn in rows.items():
+        print(f"{label:34}{fn('legacy'):>12}{fn('split'):>12}")
+
+
+def online(args):
+    from openai import OpenAI
+
+    client = OpenAI()
+    print(f"\n{args.turns} turns per layout, {args.model}\n")
+    print(f"{'layout':8}{'turn':>6}{'prompt':>10}{'cached':>10}{'latency ms':>12}")
+    for layout in ("legacy", "split"):
+        messages = []
+        for turn in range(args.turns):
+            # The run count changes every other turn, like a busy account
+            system = build(layout, "Ana", 12 + turn // 2)
+            messages.append({"role": "user", "content": f"Quick question {turn}: what can you automate for me?"})
+            started = time.perf_counter()
+            response = client.chat.completions.create(
+                model=args.model,
+                messages=[{"role": "system", "content": system}, *messages],
+                tools=TOOLS,
+                max_completion_tokens=64,
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            cached = getattr(details, "cached_tokens", None) or 0
+            messages.append({"role": "assistant", "content": response.choices[0].message.content or ""})
+            print(f"{layout:8}{turn:>6}{response.usage.prompt_tokens:>10}{cached:>10}{elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--model", default="gpt-4o")
+    args = parser.parse_args()
+
+    offline()
+    if os.getenv("OPENAI_API_KEY"):
+        online(args)
+    else:
+        print("\nSet OPENAI_API_KEY to measure cached tokens and latency against the API.")
+
+
+if __name__ == "__main__":
+    main()
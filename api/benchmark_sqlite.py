@@ -0,0 +1,169 @@
+"""
+Benchmark single-node SQLite: concurrent webhook triggers + run history reads.
+
+Runs the same load twice against a fresh on-disk database, once with the
+tuned SQLite mode (WAL, pooled connections, single writer) and once with the
+old behaviour (SQLITE_TUNED=false: rollback journal, connection per session),
+and prints throughput, latency and failed requests for each.
+
+Usage (from api/):
+    python benchmark_sqlite.py [--seconds 10] [--webhooks 16] [--readers 8]
+
+Each mode runs in its own process because the engines are configured from
+settings at import time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def _worker(client, method, url, deadline, latencies, errors, **kwargs):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+
+
+def run_mode(args) -> dict:
+    """Child process: seed a workflow, drive the load, write the JSON result."""
+    import httpx
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.models import User, Workflow, Execution
+    from app.services.auth_service import create_access_token
+    from app.services.execution_dispatcher import shutdown_dispatcher
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="bench@example.com", hashed_password="x", plan="business", email_verified=True)
+    db.add(user)
+    db.commit()
+    # Trigger plus two steps, so each run journals several node rows
+    workflow = Workflow(
+        user_id=user.id, name="bench", is_active=True,
+        nodes=[
+            {"id": "start", "type": "start_webhook", "data": {}},
+            {"id": "t1", "type": "transform", "data": {"transforms": []}},
+            {"id": "t2", "type": "transform", "data": {"transforms": []}},
+        ],
+        edges=[
+            {"id": "e1", "source": "start", "target": "t1"},
+            {"id": "e2", "source": "t1", "target": "t2"},
+        ],
+    )
+    db.add(workflow)
+    db.commit()
+    workflow_id, user_id = workflow.id, user.id
+    db.close()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": user_id})}
+
+    async def drive():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            deadline = time.perf_counter() + args.seconds
+            webhook_lat, webhook_err, read_lat, read_err = [], [], [], []
+            started = time.perf_counter()
+            await asyncio.gather(
+                *[
+                    _worker(client, "POST", f"/api/webhooks/trigger/{workflow_id}", deadline,
+                            webhook_lat, webhook_err, json={"name": "bench", "n": i})
+                    for i in range(args.webhooks)
+                ],
+                *[
+                    _worker(client, "GET", "/api/executions/", deadline,
+                            read_lat, read_err, headers=headers, params={"limit": 50})
+                    for _ in range(args.readers)
+                ],
+            )
+            elapsed = time.perf_counter() - started
+        return elapsed, webhook_lat, webhook_err, read_lat, read_err
+
+    elapsed, webhook_lat, webhook_err, read_lat, read_err = asyncio.run(drive())
+    # Let queued runs finish so run failures (e.g. "database is locked") are counted
+    run_started = time.perf_counter()
+    shutdown_dispatcher(wait=True)
+    drain = time.perf_counter() - run_started
+
+    db = SessionLocal()
+    statuses = {}
+    for (status,) in db.query(Execution.status).all():
+        statuses[status] = statuses.get(status, 0) + 1
+    db.close()
+
+    return {
+        "webhook_rps": len(webhook_lat) / elapsed,
+        "webhook_p50_ms": _percentile(webhook_lat, 0.5) * 1000,
+        "webhook_p95_ms": _percentile(webhook_lat, 0.95) * 1000,
+        "webhook_errors": len(webhook_err),
+        "read_rps": len(read_lat) / elapsed,
+        "read_p50_ms": _percentile(read_lat, 0.5) * 1000,
+        "read_p95_ms": _percentile(read_lat, 0.95) * 1000,
+        "read_errors": len(read_err),
+        "runs": statuses,
+        "runs_per_s": sum(statuses.values()) / (elapsed + drain),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--webhooks", type=int, default=16, help="concurrent webhook senders")
+    parser.add_argument("--readers", type=int, default=8, help="concurrent run history readers")
+    parser.add_argument("--child", metavar="RESULT_PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.child, "w") as f:
+            json.dump(run_mode(args), f)
+        return
+
+    results = {}
+    for mode, tuned in (("tuned", "true"), ("legacy", "false")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+                "DATABASE_READ_URL": "",
+                "SQLITE_TUNED": tuned,
+            }
+            result_path = os.path.join(tmp, "result.json")
+            # The app logs to stdout, so the child reports through a file
+            subprocess.run(
+                [sys.executable, __file__, "--child", result_path, "--seconds", str(args.seconds),
+                 "--webhooks", str(args.webhooks), "--readers", str(args.readers)],
+                env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True,
+            )
+            with open(result_path) as f:
+                results[mode] = json.load(f)
+
+    print(f"{args.webhooks} webhook senders + {args.readers} history readers, {args.seconds:g}s\n")
+    print(f"{'':22}{'tuned':>12}{'legacy':>12}")
+    for key in results["tuned"]:
+        tuned, legacy = results["tuned"][key], results["legacy"][key]
+        if isinstance(tuned, float):
+            print(f"{key:22}{tuned:>12.1f}{legacy:>12.1f}")
+        else:
+            print(f"{key:22}{str(tuned):>12}{str(legacy):>12}")
+
+
+if __name__ == "__main__":
+    main()
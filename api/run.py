@@ -1,4 +1,7 @@
 import uvicorn
 
 if __name__ == "__main__":
+    # The app doesn't create or migrate tables on import; do it once here
+    from app.migrate import migrate
+    migrate()
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
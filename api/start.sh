@@ -1,9 +1,9 @@
 #!/bin/sh
 # Start script for production deployment
 
-# Run database migrations
+# Run database migrations (alembic + schema checks; the app itself never migrates)
 echo "Running database migrations..."
-alembic upgrade head
+python -m app.migrate
 
 # Seed templates (only adds if not already present)
 echo "Seeding templates..."
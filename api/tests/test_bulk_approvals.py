@@ -0,0 +1,65 @@
+"""
+Tests for resuming several approvals of one execution (bulk approve).
+
+Covers:
+1. Each for-each approval resumes its own row's paused step
+2. The execution stays paused while other approvals are still pending
+"""
+import pytest
+
+from app.models import User, Workflow, Execution, ExecutionNode, Approval
+from app.services.workflow_runner import WorkflowRunner
+
+ROWS = [{"name": f"row{i}"} for i in range(3)]
+
+
+def _paused_foreach_run(db) -> Execution:
+    """A run whose for-each stopped at one approval per row."""
+    db.add(User(id="u1", email="a@example.com", hashed_password="x", plan="business"))
+    db.add(Workflow(
+        id="w1", user_id="u1", name="wf",
+        nodes=[
+            {"id": "start", "type": "start_manual", "parameters": {}},
+            {"id": "step", "type": "transform", "requiresApproval": True, "parameters": {
+                "transforms": [{"source": "name", "target": "out", "operation": "uppercase"}],
+            }},
+        ],
+        edges=[{"id": "e1", "source": "start", "target": "step"}],
+    ))
+    execution = Execution(id="e1", workflow_id="w1", status="running")
+    db.add(execution)
+    db.commit()
+    WorkflowRunner(db, "e1", connections={}).run({"__iterate_rows": True, "rows": ROWS})
+    return execution
+
+
+def _approve(db, approvals):
+    for approval in approvals:
+        approval.status = "approved"
+    db.commit()
+    return [a.id for a in approvals]
+
+
+def test_each_approval_resumes_its_own_row(db):
+    execution = _paused_foreach_run(db)
+    approvals = db.query(Approval).order_by(Approval.created_at).all()
+    assert execution.status == "paused" and len(approvals) == 3
+
+    # Approve the last row only: its step (not the first one) must run
+    status = WorkflowRunner(db, "e1", connections={}).resume_from_approvals(_approve(db, approvals[2:]))
+
+    steps = db.query(ExecutionNode).filter_by(node_id="step").order_by(ExecutionNode.started_at).all()
+    assert [s.status for s in steps] == ["waiting_approval", "waiting_approval", "completed"]
+    assert steps[2].output_data["out"] == "ROW2"
+    assert status == "paused"
+
+
+def test_completes_once_all_approved(db):
+    _paused_foreach_run(db)
+    approvals = db.query(Approval).order_by(Approval.created_at).all()
+
+    status = WorkflowRunner(db, "e1", connections={}).resume_from_approvals(_approve(db, approvals))
+
+    steps = db.query(ExecutionNode).filter_by(node_id="step").order_by(ExecutionNode.started_at).all()
+    assert [s.output_data["out"] for s in steps] == ["ROW0", "ROW1", "ROW2"]
+    assert status == "completed"
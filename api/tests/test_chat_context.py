@@ -0,0 +1,48 @@
+"""
+Tests for the memoized user context in the chat system prompt.
+
+Covers:
+1. Consecutive turns reuse the context
+2. Connecting a tool or editing knowledge outside chat shows up on the next turn
+"""
+import pytest
+
+from app.models import User, Connection, KnowledgeEntry
+from app.services import agentic_chat
+from app.services.agentic_chat import build_system_prompt
+from app.services.connection_cache import clear_connection_cache
+
+
+@pytest.fixture(autouse=True)
+def _empty_caches():
+    agentic_chat._user_contexts.clear()
+    clear_connection_cache()
+    yield
+    agentic_chat._user_contexts.clear()
+    clear_connection_cache()
+
+
+@pytest.fixture
+def user(db):
+    user = User(id="u1", email="a@example.com", hashed_password="x", full_name="Ana")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_consecutive_turns_reuse_the_context(db, user, monkeypatch):
+    first = build_system_prompt(user, db)
+    monkeypatch.setattr(agentic_chat, "_build_user_context", lambda *args: pytest.fail("context rebuilt"))
+    assert build_system_prompt(user, db) == first
+
+
+def test_outside_changes_show_up_on_the_next_turn(db, user):
+    assert "google: connected" not in build_system_prompt(user, db)
+
+    db.add(Connection(id="c1", user_id="u1", name="Google", type="google", is_connected=True, credentials={"a": 1}))
+    db.commit()
+    assert "google: connected" in build_system_prompt(user, db)
+
+    db.add(KnowledgeEntry(id="k1", user_id="u1", category="pricing", title="Haircut", content="$40"))
+    db.commit()
+    assert "- Haircut: $40" in build_system_prompt(user, db)
@@ -0,0 +1,69 @@
+"""
+Tests for the per-user connection/credential cache.
+
+Covers:
+1. Repeat lookups only read the version stamp, not the connection rows
+2. A write from another session (new updated_at) is picked up without invalidation
+3. Callers get their own copy of the credentials
+"""
+import pytest
+
+from app.models import User, Connection
+from app.services.connection_cache import (
+    clear_connection_cache,
+    connected_credentials,
+    get_user_connections,
+)
+
+
+@pytest.fixture
+def Session(session_factory):
+    db = session_factory()
+    db.add(User(id="u1", email="a@example.com", hashed_password="x"))
+    db.add(Connection(id="c1", user_id="u1", name="Google", type="google", is_connected=True,
+                      credentials={"access_token": "old"}))
+    db.add(Connection(id="c2", user_id="u1", name="Slack", type="slack", is_connected=False,
+                      credentials={"access_token": "s"}))
+    db.commit()
+    db.close()
+
+    clear_connection_cache()
+    yield session_factory
+    clear_connection_cache()
+
+
+def test_repeat_lookups_use_the_cache(Session, statements):
+    db = Session()
+    get_user_connections(db, "u1")
+    statements.clear()
+
+    connections = get_user_connections(db, "u1")
+
+    assert [c.type for c in connections] == ["google", "slack"]
+    assert len(statements) == 1 and "max(connections.updated_at)" in statements[0]
+    assert connected_credentials(connections) == {"google": {"access_token": "old"}}
+    db.close()
+
+
+def test_refresh_elsewhere_is_picked_up(Session):
+    db = Session()
+    get_user_connections(db, "u1")
+
+    # e.g. another worker persisting a refreshed token
+    other = Session()
+    conn = other.get(Connection, "c1")
+    conn.credentials = {"access_token": "new"}
+    other.commit()
+    other.close()
+
+    assert connected_credentials(get_user_connections(db, "u1"))["google"]["access_token"] == "new"
+    db.close()
+
+
+def test_callers_get_copies(Session):
+    db = Session()
+    creds = connected_credentials(get_user_connections(db, "u1"))
+    creds["google"]["access_token"] = "patched"
+
+    assert connected_credentials(get_user_connections(db, "u1"))["google"]["access_token"] == "old"
+    db.close()
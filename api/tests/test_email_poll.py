@@ -0,0 +1,73 @@
+"""
+Tests for concurrent email trigger polling.
+
+Covers:
+1. Each trigger job works on its own session: one job failing mid-commit
+   doesn't discard another job's execution
+2. With retention on, the Gmail query never reaches past the history horizon,
+   where runs (and their message_id) have been purged
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import User, Workflow, Connection, Execution
+from app.services.email_trigger_service import EmailTriggerService, settings
+
+EMAIL_NODES = [{"id": "1", "type": "start_email", "parameters": {}}]
+
+
+def test_failing_job_does_not_touch_other_jobs(tmp_path, monkeypatch):
+    # A file database: jobs must really use separate connections
+    engine = create_engine(f"sqlite:///{tmp_path}/poll.db", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autoflush=False, bind=engine)
+
+    db = Session()
+    db.add(User(id="u1", email="a@example.com", hashed_password="x"))
+    db.add(Connection(id="c1", user_id="u1", name="Google", type="google", is_connected=True,
+                      credentials={"access_token": "t"}))
+    for workflow_id in ("good", "bad"):
+        db.add(Workflow(id=workflow_id, user_id="u1", name=workflow_id, nodes=EMAIL_NODES, edges=[], is_active=True))
+    db.add(Execution(id="taken", workflow_id="bad", status="completed"))
+    db.commit()
+
+    sessions = []
+
+    async def fake_check(cls, job_db, workflow, trigger, credentials):
+        sessions.append(job_db)
+        # Duplicate primary key for the bad job: its commit fails
+        job_db.add(Execution(id="taken" if workflow.id == "bad" else "new", workflow_id=workflow.id, status="running"))
+        await asyncio.sleep(0)  # Let the other job add its row first
+        job_db.commit()
+        return [{"workflow_id": workflow.id}]
+
+    monkeypatch.setattr(EmailTriggerService, "_check_trigger", classmethod(fake_check))
+    results = asyncio.run(EmailTriggerService.poll_and_trigger(db, session_factory=Session))
+
+    assert [r["workflow_id"] for r in results] == ["good"]
+    assert len({id(s) for s in sessions}) == 2 and db not in sessions
+    check = Session()
+    assert check.get(Execution, "new").workflow_id == "good"
+    check.close()
+    db.close()
+    engine.dispose()
+
+
+def test_poll_window_stops_at_the_history_horizon(monkeypatch):
+    now = datetime(2026, 6, 1)
+    # Trial user: 30 days of history
+    user = User(id="u1", email="a@example.com", hashed_password="x", plan="trial", trial_started_at=now)
+    workflow = Workflow(id="wf", user_id="u1", name="wf", updated_at=now - timedelta(days=90))
+
+    monkeypatch.setattr(settings, "execution_retention_enabled", False)
+    assert EmailTriggerService._poll_after(workflow, user, now) == now - timedelta(days=90)
+
+    monkeypatch.setattr(settings, "execution_retention_enabled", True)
+    assert EmailTriggerService._poll_after(workflow, user, now) == now - timedelta(days=30)
+
+    workflow.updated_at = now - timedelta(days=2)
+    assert EmailTriggerService._poll_after(workflow, user, now) == now - timedelta(days=2)
@@ -0,0 +1,100 @@
+"""
+Tests for run history retention.
+
+Covers:
+1. Finished runs past the detail horizon are compacted into the archive (message_id stays)
+2. Paused and recent runs keep their payloads
+3. Finished runs past the history horizon are deleted with their children;
+   paused and running ones are kept
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.models import User, Workflow, Execution, ExecutionNode, ExecutionArchive, Approval
+from app.services.execution_retention import (
+    compact_user_executions,
+    purge_user_executions,
+    unpack_payloads,
+)
+
+NOW = datetime(2026, 6, 1)
+
+
+@pytest.fixture
+def user(db):
+    # Trial user: 7 days of detail, 30 days of history
+    user = User(id="u1", email="u1@example.com", hashed_password="x", plan="trial", trial_started_at=NOW)
+    db.add(user)
+    db.add(Workflow(id="w1", user_id="u1", name="wf", nodes=[], edges=[]))
+    for execution_id, days_ago, status in (
+        ("recent", 1, "completed"),
+        ("old", 10, "completed"),
+        ("old_paused", 10, "paused"),
+        ("ancient", 40, "completed"),
+    ):
+        db.add(Execution(
+            id=execution_id, workflow_id="w1", status=status,
+            started_at=NOW - timedelta(days=days_ago), trigger_data={"order": execution_id},
+        ))
+        db.add(ExecutionNode(
+            id=f"{execution_id}-n1", execution_id=execution_id, node_id="n1", node_type="transform",
+            status="completed", input_data={"in": 1}, output_data={"out": 2}, logs="done",
+        ))
+    db.add(Approval(id="a1", execution_id="ancient", node_id="n1", status="pending"))
+    db.commit()
+    return user
+
+
+class TestCompaction:
+    def test_compacts_finished_runs_past_detail_horizon(self, db, user):
+        assert compact_user_executions(db, user, NOW, batch_size=1) == 2  # old + ancient
+
+        old = db.get(Execution, "old")
+        assert old.compacted_at == NOW
+        assert old.trigger_data is None
+        node = db.get(ExecutionNode, "old-n1")
+        assert node.output_data is None and node.status == "completed"
+
+        payloads = unpack_payloads(db.get(ExecutionArchive, "old").payload)
+        assert payloads["trigger_data"] == {"order": "old"}
+        assert payloads["nodes"]["old-n1"] == {"input_data": {"in": 1}, "output_data": {"out": 2}, "logs": "done"}
+
+    def test_keeps_email_message_id(self, db, user):
+        db.get(Execution, "old").trigger_data = {"message_id": "m1", "body": "..."}
+        db.commit()
+        compact_user_executions(db, user, NOW, batch_size=10)
+        assert db.get(Execution, "old").trigger_data == {"message_id": "m1"}
+
+    def test_keeps_recent_and_paused_runs(self, db, user):
+        compact_user_executions(db, user, NOW, batch_size=10)
+        for execution_id in ("recent", "old_paused"):
+            execution = db.get(Execution, execution_id)
+            assert execution.compacted_at is None
+            assert execution.trigger_data == {"order": execution_id}
+
+    def test_is_idempotent(self, db, user):
+        compact_user_executions(db, user, NOW, batch_size=10)
+        assert compact_user_executions(db, user, NOW, batch_size=10) == 0
+
+
+class TestPurge:
+    def test_deletes_runs_past_history_horizon(self, db, user):
+        compact_user_executions(db, user, NOW, batch_size=10)
+        assert purge_user_executions(db, user, NOW, batch_size=10) == 1
+
+        assert db.get(Execution, "ancient") is None
+        assert db.query(ExecutionNode).filter_by(execution_id="ancient").count() == 0
+        assert db.query(ExecutionArchive).filter_by(execution_id="ancient").count() == 0
+        assert db.query(Approval).filter_by(execution_id="ancient").count() == 0
+        assert db.query(Execution).count() == 3
+
+    def test_keeps_unfinished_runs_past_history_horizon(self, db, user):
+        for execution_id, status in (("ancient_paused", "paused"), ("ancient_running", "running")):
+            db.add(Execution(
+                id=execution_id, workflow_id="w1", status=status,
+                started_at=NOW - timedelta(days=40), trigger_data={"message_id": execution_id},
+            ))
+        db.commit()
+        assert purge_user_executions(db, user, NOW, batch_size=10) == 1
+        assert db.get(Execution, "ancient_paused").trigger_data == {"message_id": "ancient_paused"}
+        assert db.get(Execution, "ancient_running") is not None
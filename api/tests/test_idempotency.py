@@ -0,0 +1,161 @@
+"""
+Tests for the DB-backed idempotency store used by webhook ingress.
+
+Covers:
+1. First claim wins, later claims see the stored record
+2. Released claims can be re-claimed (failed work is retryable)
+3. Expired keys are taken over and purged
+4. A cancelled webhook delivery releases its claim
+"""
+import asyncio
+
+import pytest
+from datetime import datetime, timedelta
+from starlette.responses import Response
+
+from app.models import IdempotencyKey
+from app.utils.idempotency import DatabaseIdempotencyStore, build_webhook_idempotency_key
+
+
+@pytest.fixture
+def store(session_factory):
+    return DatabaseIdempotencyStore(default_ttl=60, session_factory=session_factory)
+
+
+class TestClaim:
+    def test_first_claim_wins(self, store):
+        assert store.claim("k1") is None
+
+    def test_second_claim_sees_in_flight_record(self, store):
+        store.claim("k1")
+        record = store.claim("k1")
+        assert record is not None
+        assert record.response is None
+
+    def test_second_claim_sees_stored_response(self, store):
+        store.claim("k1")
+        store.set("k1", {"execution_id": "abc"}, status_code=202)
+        record = store.claim("k1")
+        assert record.response == {"execution_id": "abc"}
+        assert record.status_code == 202
+
+    def test_release_allows_retry(self, store):
+        store.claim("k1")
+        store.release("k1")
+        assert store.claim("k1") is None
+
+    def test_release_keeps_completed_keys(self, store):
+        store.claim("k1")
+        store.set("k1", {"ok": True})
+        store.release("k1")
+        assert store.exists("k1")
+
+    def test_result_outlives_the_claim(self, store):
+        store.claim("k1", ttl=1)
+        record = store.set("k1", {"ok": True}, ttl=3600)
+        assert record.expires_at > datetime.utcnow() + timedelta(minutes=30)
+
+
+class TestExpiry:
+    def _expire(self, session_factory, key):
+        db = session_factory()
+        try:
+            row = db.get(IdempotencyKey, key)
+            row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+            db.commit()
+        finally:
+            db.close()
+
+    def test_expired_key_is_not_returned(self, store, session_factory):
+        store.claim("k1")
+        store.set("k1", {"ok": True})
+        self._expire(session_factory, "k1")
+        assert store.get("k1") is None
+
+    def test_expired_key_can_be_reclaimed(self, store, session_factory):
+        store.claim("k1")
+        store.set("k1", {"ok": True})
+        self._expire(session_factory, "k1")
+        assert store.claim("k1") is None
+
+    def test_only_one_retry_takes_over_an_expired_key(self, store, session_factory):
+        store.claim("k1")
+        self._expire(session_factory, "k1")
+        now = datetime.utcnow()
+        first, second = session_factory(), session_factory()
+        try:
+            # Both retries saw the expired row; the second UPDATE no longer matches
+            assert store._take_over_expired(first, "k1", now, 60)
+            assert not store._take_over_expired(second, "k1", now, 60)
+        finally:
+            first.close()
+            second.close()
+        record = store.claim("k1")
+        assert record is not None and record.response is None
+
+    def test_renew_extends_an_in_flight_claim(self, store, session_factory):
+        store.claim("k1")
+        self._expire(session_factory, "k1")
+        store.renew("k1", ttl=60)
+        assert store.claim("k1") is not None
+
+    def test_renew_leaves_completed_keys_alone(self, store, session_factory):
+        store.claim("k1")
+        store.set("k1", {"ok": True})
+        self._expire(session_factory, "k1")
+        store.renew("k1", ttl=60)
+        assert store.get("k1") is None
+
+    def test_purge_expired_in_batches(self, store, session_factory):
+        for i in range(5):
+            store.claim(f"k{i}")
+            self._expire(session_factory, f"k{i}")
+        store.claim("live")
+        assert store.purge_expired(batch_size=2) == 5
+        assert store.exists("live")
+
+
+class TestWebhookKeys:
+    def test_keys_are_scoped_and_bounded(self):
+        a = build_webhook_idempotency_key("wf-1", "stripe", "evt_123")
+        b = build_webhook_idempotency_key("wf-2", "stripe", "evt_123")
+        c = build_webhook_idempotency_key("wf-1", "header", "x" * 5000)
+        assert a != b
+        assert a == build_webhook_idempotency_key("wf-1", "stripe", "evt_123")
+        assert len(c) <= 128
+
+
+class TestRunOnce:
+    def test_cancelled_delivery_releases_its_claim(self, store, monkeypatch):
+        from app.routers import webhooks
+
+        class FakeSession:
+            async def rollback(self):
+                pass
+
+        async def start():
+            raise asyncio.CancelledError()
+
+        monkeypatch.setattr(webhooks, "idempotency_store", store)
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(webhooks._run_once(FakeSession(), "k1", Response(), start))
+        assert store.claim("k1") is None
+
+    def test_claim_is_renewed_while_the_run_waits(self, store, session_factory, monkeypatch):
+        from app.routers import webhooks
+
+        class FakeSession:
+            async def rollback(self):
+                pass
+
+        async def start():
+            # Lease lapses mid-run; the renewal task must put it back
+            TestExpiry()._expire(session_factory, "k1")
+            await asyncio.sleep(1.2)
+            assert store.claim("k1") is not None
+            return {"ok": True}
+
+        monkeypatch.setattr(webhooks, "idempotency_store", store)
+        monkeypatch.setattr(webhooks.settings, "webhook_claim_ttl_seconds", 1)
+        asyncio.run(webhooks._run_once(FakeSession(), "k1", Response(), start))
+        assert store.get("k1").response == {"ok": True}
@@ -0,0 +1,52 @@
+"""
+Tests for the cached knowledge context.
+
+Covers:
+1. A repeat call reuses the rendered string after one aggregate query
+2. Adding or editing an entry changes the version, so the context is re-rendered
+3. Eviction drops the least recently used context
+"""
+import pytest
+
+from app.models import User, KnowledgeEntry
+from app.services import knowledge_service
+from app.services.knowledge_service import get_knowledge_context, invalidate_knowledge_context
+
+
+@pytest.fixture(autouse=True)
+def _seed(db):
+    db.add(User(id="u1", email="a@example.com", hashed_password="x"))
+    db.add(KnowledgeEntry(id="k1", user_id="u1", category="pricing", title="Haircut", content="$40"))
+    db.commit()
+    invalidate_knowledge_context("u1")
+
+
+def test_repeat_calls_reuse_the_rendered_context(db, statements):
+    first = get_knowledge_context("u1", db)
+    statements.clear()
+
+    assert get_knowledge_context("u1", db) == first
+    assert len(statements) == 1 and "count(knowledge_entries.id)" in statements[0]
+    assert "- Haircut: $40" in first
+
+
+def test_changes_are_rendered(db):
+    get_knowledge_context("u1", db)
+
+    db.add(KnowledgeEntry(id="k2", user_id="u1", category="policies", title="Cancellations", content="24h notice"))
+    db.commit()
+    assert "- Cancellations: 24h notice" in get_knowledge_context("u1", db)
+
+    db.get(KnowledgeEntry, "k1").content = "$45"
+    db.commit()
+    assert "- Haircut: $45" in get_knowledge_context("u1", db)
+
+
+def test_hits_keep_a_context_cached(db, monkeypatch):
+    monkeypatch.setattr(knowledge_service, "_CONTEXT_CACHE_SIZE", 2)
+    get_knowledge_context("u1", db, max_chars=100)
+    get_knowledge_context("u1", db, max_chars=200)
+    get_knowledge_context("u1", db, max_chars=100)  # Hit: now the most recent
+    get_knowledge_context("u1", db, max_chars=300)
+
+    assert list(knowledge_service._contexts) == [("u1", 100), ("u1", 300)]
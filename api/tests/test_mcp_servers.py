@@ -8,6 +8,8 @@ Tests every integration's:
 4. Handler signatures match schema parameters
 5. Tool name uniqueness across all servers
 6. BaseMCPServer interface compliance
+7. The registry schema catalog matches the servers it describes
+8. A provider whose schemas fail to load is retried, not cached as empty
 """
 import pytest
 import inspect
@@ -437,3 +439,29 @@ class TestRegistryIntegration:
         print(f"\n[INFO] Total tools across all {len(SERVERS)} providers: {total}")
         # We had 212 before adding 13 new providers. Each adds 5-10 tools.
         assert total >= 300, f"Expected >= 300 total tools, got {total}"
+
+    def test_schema_catalog_matches_servers(self, server_config):
+        """get_tool_schemas() must describe the same tools without building a server."""
+        from app.mcp_servers.registry import get_tool_schemas
+        name, config = server_config
+        assert get_tool_schemas(name) == _create_server(config).list_tools()
+
+    def test_failed_schema_load_is_not_cached(self, monkeypatch):
+        from app.mcp_servers import registry
+        from app.services import ai_generator
+
+        real = registry.get_tool_schemas
+
+        def broken(provider):
+            if provider == "github":
+                raise ImportError("github_server failed to import")
+            return real(provider)
+
+        ai_generator._provider_tool_docs.cache_clear()
+        ai_generator._mcp_tool_docs_for.cache_clear()
+        monkeypatch.setattr(registry, "get_tool_schemas", broken)
+        docs = ai_generator._get_mcp_tool_docs(["github", "zoom"])
+        assert "GITHUB node types" not in docs and "ZOOM node types" in docs
+
+        monkeypatch.setattr(registry, "get_tool_schemas", real)
+        assert "GITHUB node types" in ai_generator._get_mcp_tool_docs(["github", "zoom"])
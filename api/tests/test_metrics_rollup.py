@@ -0,0 +1,86 @@
+"""
+Tests for the admin dashboard daily_metrics rollup.
+
+Covers:
+1. Trends match per-day counts over the raw tables
+2. Incremental refreshes only re-roll days that can still change
+3. Closed days survive the raw rows being deleted (retention)
+4. An inline rollup from a read-replica session runs on the primary
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.models import User, Workflow, Execution, ChatConversation, ChatMessage, DailyMetric
+from app.services.metrics_rollup import refresh_metrics, read_trends
+
+NOW = datetime(2026, 3, 15, 12, 0)
+
+
+def _seed(db):
+    for u in range(3):
+        db.add(User(id=f"u{u}", email=f"u{u}@example.com", hashed_password="x", created_at=NOW - timedelta(days=u)))
+        db.add(Workflow(id=f"w{u}", user_id=f"u{u}", name="wf", nodes=[], edges=[]))
+        db.add(ChatConversation(id=f"c{u}", user_id=f"u{u}", title="hi"))
+    # Today: 2 runs by u0, 1 by u1; 3 messages from u2
+    for i, wid in enumerate(("w0", "w0", "w1")):
+        db.add(Execution(id=f"e{i}", workflow_id=wid, started_at=NOW - timedelta(hours=i)))
+    for i in range(3):
+        db.add(ChatMessage(id=f"m{i}", conversation_id="c2", user_id="u2", role="user", content="x", created_at=NOW))
+    # Two days ago, and in January (MAU)
+    db.add(Execution(id="old", workflow_id="w2", started_at=NOW - timedelta(days=2)))
+    db.add(ChatMessage(id="jan", conversation_id="c1", user_id="u1", role="user", content="x", created_at=datetime(2026, 1, 20)))
+    db.commit()
+
+
+def _counts(series):
+    return {point["date"]: point["count"] for point in series}
+
+
+def test_trends_match_raw_counts(db):
+    _seed(db)
+    trends = read_trends(db, NOW)
+
+    assert len(trends["signups_30d"]) == 30
+    assert _counts(trends["signups_30d"])["2026-03-15"] == 1
+    assert _counts(trends["signups_30d"])["2026-03-13"] == 1
+    assert _counts(trends["executions_30d"])["2026-03-15"] == 3
+    assert _counts(trends["executions_30d"])["2026-03-13"] == 1
+    assert _counts(trends["messages_30d"])["2026-03-15"] == 3
+    # max(chat actives, execution actives): 1 chatter vs 2 runners
+    assert _counts(trends["dau_30d"])["2026-03-15"] == 2
+    assert _counts(trends["mau_12m"]) == {**{k: 0 for k in _counts(trends["mau_12m"])}, "2026-01": 1, "2026-03": 1}
+
+
+def test_refresh_only_rerolls_open_days(db):
+    _seed(db)
+    assert refresh_metrics(db, NOW) == 30 * 4 + 12
+    # Same day: only today (and the current month) can still change
+    assert refresh_metrics(db, NOW + timedelta(hours=1)) == 4 + 1
+    # Next day: yesterday is re-rolled once more, then closed
+    assert refresh_metrics(db, NOW + timedelta(days=1)) == 2 * 4 + 1
+
+
+def test_closed_days_survive_raw_deletes(db):
+    _seed(db)
+    refresh_metrics(db, NOW)
+    db.query(Execution).filter(Execution.id == "old").delete()
+    db.commit()
+
+    refresh_metrics(db, NOW + timedelta(hours=1))
+    trends = read_trends(db, NOW + timedelta(hours=1))
+    assert _counts(trends["executions_30d"])["2026-03-13"] == 1
+    assert db.query(DailyMetric).filter_by(metric="executions").count() == 30
+
+
+def test_inline_rollup_never_writes_to_a_replica(db, session_factory, engine, monkeypatch):
+    from app.services import metrics_rollup
+
+    _seed(db)
+    used = []
+    monkeypatch.setattr(metrics_rollup, "read_engine", engine)
+    monkeypatch.setattr(metrics_rollup, "read_replica_enabled", lambda: True)
+    monkeypatch.setattr(metrics_rollup, "SessionLocal", lambda: used.append(session_factory()) or used[-1])
+
+    trends = read_trends(db, NOW)
+    assert len(used) == 1 and used[0] is not db
+    assert _counts(trends["executions_30d"])["2026-03-15"] == 3
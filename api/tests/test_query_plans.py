@@ -0,0 +1,253 @@
+"""
+Query-plan regression tests for the hot tables.
+
+Seeds about 170k rows (40k executions, 120k execution nodes, plus users,
+workflows, connections, approvals and knowledge), runs ANALYZE, then asserts
+via EXPLAIN that the lookups every run, poll and list endpoint does are served
+by the indexes from alembic 004 and 006 instead of full table scans.
+
+Runs against in-memory SQLite by default. Set TEST_POSTGRES_URL to also
+check the plans on PostgreSQL (the seeded tables are dropped afterwards).
+"""
+import os
+import uuid
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, or_, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, json_array_has, json_text
+from app.models import User, Workflow, Execution, ExecutionNode, Connection, Approval, KnowledgeEntry
+
+N_USERS = 200
+WORKFLOWS_PER_USER = 5
+EXECUTIONS_PER_WORKFLOW = 40
+NODES_PER_EXECUTION = 3
+
+
+def _id():
+    return str(uuid.uuid4())
+
+
+def _seed(engine):
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    users, workflows, executions, nodes, connections, approvals, knowledge = [], [], [], [], [], [], []
+
+    for u in range(N_USERS):
+        user_id = _id()
+        users.append({"id": user_id, "email": f"user{u}@example.com", "hashed_password": "x"})
+        for conn_type in ("google", "slack", "stripe", "notion"):
+            connections.append({"id": _id(), "user_id": user_id, "name": conn_type, "type": conn_type})
+        for k in range(10):
+            knowledge.append({
+                "id": _id(), "user_id": user_id, "category": "custom",
+                "title": f"entry {k}", "content": "...", "priority": rnd.randint(0, 5),
+            })
+        for w in range(WORKFLOWS_PER_USER):
+            workflow_id = _id()
+            workflows.append({
+                "id": workflow_id, "user_id": user_id, "name": f"wf {w}",
+                "nodes": [{"id": "1", "type": "start_schedule" if w == 0 else "start_manual"}],
+                "edges": [], "is_active": w == 0, "is_agent_task": False,
+            })
+            for e in range(EXECUTIONS_PER_WORKFLOW):
+                execution_id = _id()
+                executions.append({
+                    "id": execution_id, "workflow_id": workflow_id, "status": "completed",
+                    "started_at": now - timedelta(minutes=rnd.randint(0, 100000)),
+                    "trigger_data": {"message_id": f"msg-{execution_id[:8]}"},
+                })
+                for n in range(NODES_PER_EXECUTION):
+                    nodes.append({
+                        "id": _id(), "execution_id": execution_id, "node_id": f"n{n}",
+                        "node_type": "transform", "status": "completed",
+                    })
+                if e % 10 == 0:
+                    approvals.append({"id": _id(), "execution_id": execution_id, "node_id": "n1", "status": "pending"})
+
+    with engine.begin() as conn:
+        for model, rows in (
+            (User, users), (Workflow, workflows), (Execution, executions), (ExecutionNode, nodes),
+            (Connection, connections), (Approval, approvals), (KnowledgeEntry, knowledge),
+        ):
+            conn.execute(model.__table__.insert(), rows)
+        conn.execute(text("ANALYZE"))
+
+    return {
+        "user_id": users[7]["id"],
+        "workflow_id": workflows[17]["id"],
+        "execution_id": executions[123]["id"],
+    }
+
+
+def _engines():
+    engines = [pytest.param("sqlite", id="sqlite")]
+    if os.getenv("TEST_POSTGRES_URL"):
+        engines.append(pytest.param("postgresql", id="postgresql"))
+    return engines
+
+
+@pytest.fixture(scope="module", params=_engines())
+def seeded(request):
+    if request.param == "sqlite":
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.create_all(bind=engine)
+    ids = _seed(engine)
+    yield engine, ids
+    if request.param != "sqlite":
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _plan(engine, stmt) -> str:
+    """EXPLAIN the statement with its parameters inlined and return the plan as one string."""
+    sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+            return "\n".join(row[-1] for row in rows)
+        rows = conn.execute(text(f"EXPLAIN {sql}")).fetchall()
+        return "\n".join(row[0] for row in rows)
+
+
+def _assert_uses_index(engine, stmt, index_name):
+    plan = _plan(engine, stmt)
+    if engine.dialect.name == "sqlite":
+        assert f"INDEX {index_name}" in plan, plan
+    else:
+        assert index_name in plan and "Seq Scan" not in plan, plan
+    return plan
+
+
+def test_run_history_for_workflow(seeded):
+    engine, ids = seeded
+    stmt = (
+        select(Execution)
+        .filter(Execution.workflow_id == ids["workflow_id"])
+        .order_by(Execution.started_at.desc())
+        .limit(50)
+    )
+    plan = _assert_uses_index(engine, stmt, "ix_executions_workflow_id_started_at")
+    # The index already yields newest-first, so no separate sort step
+    if engine.dialect.name == "sqlite":
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_run_history_keyset_page(seeded):
+    engine, ids = seeded
+    cursor_at = datetime.utcnow() - timedelta(days=30)
+    stmt = (
+        select(Execution.id, Execution.status, Execution.started_at)
+        .filter(
+            Execution.workflow_id == ids["workflow_id"],
+            Execution.started_at <= cursor_at,
+            or_(Execution.started_at < cursor_at, Execution.id < ids["execution_id"]),
+        )
+        .order_by(Execution.started_at.desc(), Execution.id.desc())
+        .limit(51)
+    )
+    _assert_uses_index(engine, stmt, "ix_executions_workflow_id_started_at")
+
+
+def test_execution_nodes_for_execution(seeded):
+    engine, ids = seeded
+    stmt = select(ExecutionNode).filter(ExecutionNode.execution_id == ids["execution_id"])
+    _assert_uses_index(engine, stmt, "ix_execution_nodes_execution_id")
+
+
+def test_connection_by_user_and_type(seeded):
+    engine, ids = seeded
+    stmt = select(Connection).filter(Connection.user_id == ids["user_id"], Connection.type == "google")
+    _assert_uses_index(engine, stmt, "ix_connections_user_id_type")
+
+
+def test_active_workflows_for_user(seeded):
+    engine, ids = seeded
+    stmt = select(Workflow).filter(Workflow.user_id == ids["user_id"], Workflow.is_active == True)
+    _assert_uses_index(engine, stmt, "ix_workflows_user_id_is_active")
+
+
+def test_approvals_for_execution(seeded):
+    engine, ids = seeded
+    stmt = select(Approval).filter(Approval.execution_id == ids["execution_id"])
+    _assert_uses_index(engine, stmt, "ix_approvals_execution_id")
+
+
+def test_approval_inbox_page(seeded):
+    engine, ids = seeded
+    cursor_at = datetime.utcnow()
+    stmt = (
+        select(Approval)
+        .join(Execution).join(Workflow)
+        .filter(
+            Workflow.user_id == ids["user_id"],
+            Approval.status == "pending",
+            Approval.created_at <= cursor_at,
+            or_(Approval.created_at < cursor_at, Approval.id < ids["execution_id"]),
+        )
+        .order_by(Approval.created_at.desc(), Approval.id.desc())
+        .limit(51)
+    )
+    plan = _plan(engine, stmt)
+    # Either way in is indexed: via the owner's executions, or walking pending approvals by time
+    if engine.dialect.name == "sqlite":
+        assert "SCAN approvals" not in plan, plan
+    else:
+        assert "Seq Scan on approvals" not in plan, plan
+
+
+def test_knowledge_entries_for_user(seeded):
+    engine, ids = seeded
+    stmt = (
+        select(KnowledgeEntry)
+        .filter(KnowledgeEntry.user_id == ids["user_id"])
+        .order_by(KnowledgeEntry.priority.desc())
+    )
+    _assert_uses_index(engine, stmt, "ix_knowledge_entries_user_id_priority")
+
+
+def test_email_trigger_dedup_by_message_id(seeded):
+    engine, ids = seeded
+    if engine.dialect.name != "postgresql":
+        pytest.skip("JSONB expression index is PostgreSQL-only")
+    message_id = json_text(Execution.trigger_data, "message_id", engine.dialect.name)
+    stmt = select(message_id).filter(
+        Execution.workflow_id == ids["workflow_id"],
+        message_id.in_(["msg-1", "msg-2"]),
+    )
+    # With only a few runs per seeded workflow the planner may pick the
+    # started_at index instead; either way it must not scan executions
+    _assert_uses_index(engine, stmt, "ix_executions_workflow_id_")
+
+
+def test_email_dedup_lookup_matches_the_index_expression():
+    # Runs without PostgreSQL: the planner only uses an expression index whose
+    # expression is the one in the query, CAST and all
+    dialect = postgresql.dialect()
+    expression = "(trigger_data ->> 'message_id')"
+    index = next(i for i in Execution.__table__.indexes if i.name == "ix_executions_workflow_id_message_id")
+    assert expression in str(CreateIndex(index).compile(dialect=dialect))
+
+    message_id = json_text(Execution.trigger_data, "message_id", "postgresql")
+    stmt = select(message_id).filter(Execution.workflow_id == "w", message_id.in_(["msg-1"]))
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    assert f"(executions.{expression[1:]} IN" in sql
+
+    migration = Path(__file__).parent.parent / "alembic" / "versions" / "006_jsonb_payloads.py"
+    assert f'sa.text("{expression}")' in migration.read_text()
+
+
+def test_schedule_trigger_discovery(seeded):
+    engine, _ = seeded
+    if engine.dialect.name != "postgresql":
+        pytest.skip("JSONB GIN index is PostgreSQL-only")
+    stmt = select(Workflow.id).filter(json_array_has(Workflow.nodes, "type", "start_schedule", "postgresql"))
+    _assert_uses_index(engine, stmt, "ix_workflows_nodes")
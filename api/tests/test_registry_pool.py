@@ -0,0 +1,72 @@
+"""
+Tests for the pooled MCP tool registries.
+
+Covers:
+1. Calls on one loop with the same user and credentials share a registry
+2. Changed credentials or another user get their own registry
+3. Idle registries are closed on the next request
+4. Loops not registered for pooling (one-off threads) get a registry per call
+"""
+import asyncio
+
+import pytest
+
+from app.mcp_servers import registry as registry_module
+from app.mcp_servers.registry import close_pooled_registries, pooled_registry, register_pooling_loop
+
+
+@pytest.fixture(autouse=True)
+def _empty_pool():
+    registry_module._pool.clear()
+    yield
+    registry_module._pool.clear()
+
+
+def test_same_credentials_share_a_registry():
+    async def scenario():
+        register_pooling_loop(asyncio.get_running_loop())
+        async with pooled_registry("u1", {}) as first:
+            async with pooled_registry("u1", {}) as nested:
+                assert nested is first
+        async with pooled_registry("u1", {}) as again:
+            assert again is first
+        async with pooled_registry("u2", {}) as other_user:
+            assert other_user is not first
+        async with pooled_registry("u1", {"brevo": {"api_key": "k"}}) as new_creds:
+            assert new_creds is not first
+        assert len(registry_module._pool) == 3
+        await close_pooled_registries()
+        assert registry_module._pool == {}
+
+    asyncio.run(scenario())
+
+
+def test_idle_registries_are_closed(monkeypatch):
+    closed = []
+
+    async def scenario():
+        register_pooling_loop(asyncio.get_running_loop())
+        async with pooled_registry("u1", {}) as first:
+            monkeypatch.setattr(first, "close", lambda: closed.append(first) or asyncio.sleep(0))
+            monkeypatch.setattr(registry_module.settings, "mcp_registry_idle_seconds", -1)
+            async with pooled_registry("u1", {}) as in_use:
+                assert in_use is first  # Never evicted while borrowed
+        async with pooled_registry("u1", {}) as replacement:
+            assert replacement is not first
+        assert closed == [first]
+
+    asyncio.run(scenario())
+
+
+def test_unregistered_loops_do_not_pool(monkeypatch):
+    closed = []
+
+    async def scenario():
+        async with pooled_registry("u1", {}) as first:
+            monkeypatch.setattr(first, "close", lambda: closed.append(first) or asyncio.sleep(0))
+        async with pooled_registry("u1", {}) as second:
+            assert second is not first
+        assert closed == [first]
+        assert registry_module._pool == {}
+
+    asyncio.run(scenario())
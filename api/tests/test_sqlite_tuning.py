@@ -0,0 +1,82 @@
+"""
+Tests for single-node SQLite mode (WAL, pooled connections, single writer).
+
+Covers:
+1. Only on-disk SQLite databases are tuned
+2. New connections come up in WAL with synchronous=NORMAL and a busy timeout
+3. Sessions hold the writer gate from first flush until commit/rollback
+4. Sessions used on an event loop thread never wait on the gate
+"""
+import asyncio
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.database import Base, _is_sqlite_file, _tune_sqlite_connection
+from app.models import User
+
+
+def test_only_file_databases_are_tuned():
+    assert _is_sqlite_file("sqlite:///./aivaro.db")
+    assert not _is_sqlite_file("sqlite://")
+    assert not _is_sqlite_file("sqlite:///:memory:")
+    assert not _is_sqlite_file("sqlite:///file:shared?mode=memory&uri=true")
+    assert not _is_sqlite_file("postgresql://u:p@host/db")
+
+
+def test_connections_use_wal(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/tuned.db")
+    event.listen(engine, "connect", _tune_sqlite_connection)
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == database.settings.sqlite_busy_timeout_ms
+    engine.dispose()
+
+
+def _gated_sessions(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autoflush=False, bind=engine)
+    event.listen(Session, "before_flush", database._before_flush)
+    event.listen(Session, "after_transaction_end", database._after_transaction_end)
+    return engine, Session
+
+
+def test_writer_gate_held_until_transaction_ends(tmp_path):
+    engine, Session = _gated_sessions(tmp_path / "gate.db")
+    db = Session()
+    db.add(User(id="u1", email="a@example.com", hashed_password="x"))
+    db.flush()
+    assert db.info["sqlite_writer"]
+    assert database._sqlite_writer.locked()
+
+    db.commit()
+    assert "sqlite_writer" not in db.info
+    assert not database._sqlite_writer.locked()
+
+    # Reads never take the gate
+    db.query(User).all()
+    assert not database._sqlite_writer.locked()
+    db.close()
+    engine.dispose()
+
+
+def test_event_loop_sessions_skip_the_gate(tmp_path):
+    engine, Session = _gated_sessions(tmp_path / "loop.db")
+
+    async def handler():
+        db = Session()
+        db.add(User(id="u1", email="a@example.com", hashed_password="x"))
+        db.flush()
+        assert "sqlite_writer" not in db.info
+        db.commit()
+        db.close()
+
+    with database._sqlite_writer:  # A worker holds the gate; the handler must not wait for it
+        started = time.monotonic()
+        asyncio.run(handler())
+        assert time.monotonic() - started < database.settings.sqlite_busy_timeout_ms / 1000
+    engine.dispose()
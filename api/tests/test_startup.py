@@ -0,0 +1,96 @@
+"""
+Tests for side-effect-free startup and the explicit migrate step.
+
+Each case runs in a fresh interpreter, since settings and engines are built
+at import time.
+
+Covers:
+1. Importing app.main touches no database and loads no SDKs (openai, stripe, integrations)
+2. python -m app.migrate builds a complete schema on an empty database and is re-runnable
+3. A database created by create_all before alembic ran (no alembic_version) is
+   stamped at the baseline and upgraded
+"""
+import os
+import sqlite3
+import subprocess
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code_or_module, database_url, module=False):
+    args = [sys.executable, "-m", code_or_module] if module else [sys.executable, "-c", code_or_module]
+    return subprocess.run(
+        args, cwd=API_DIR, capture_output=True, text=True,
+        env={**os.environ, "DATABASE_URL": database_url, "DATABASE_READ_URL": ""},
+    )
+
+
+def test_import_is_side_effect_free(tmp_path):
+    # The directory doesn't exist, so any connection attempt would fail
+    url = f"sqlite:///{tmp_path}/missing/aivaro.db"
+    result = _run(
+        "import sys, app.main\n"
+        "heavy = [m for m in sys.modules if m.split('.')[0] in ('openai', 'stripe')\n"
+        "         or m.startswith('app.services.integrations')]\n"
+        "print('HEAVY', heavy)",
+        url,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "HEAVY []" in result.stdout
+    assert not os.path.exists(f"{tmp_path}/missing")
+
+
+def test_migrate_builds_schema(tmp_path):
+    url = f"sqlite:///{tmp_path}/aivaro.db"
+    for _ in range(2):
+        result = _run("app.migrate", url, module=True)
+        assert result.returncode == 0, result.stderr
+
+    conn = sqlite3.connect(f"{tmp_path}/aivaro.db")
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    user_columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+    conn.close()
+
+    assert {"alembic_version", "users", "executions", "chat_conversations", "knowledge_entries"} <= tables
+    assert {"plan", "email_verified", "is_admin"} <= user_columns
+
+
+def test_migrate_upgrades_pre_alembic_database(tmp_path):
+    url = f"sqlite:///{tmp_path}/aivaro.db"
+    # The schema as of the baseline revision, as create_all left it: no alembic_version
+    result = _run(
+        "from alembic import command\n"
+        "from alembic.config import Config\n"
+        "config = Config()\n"
+        "config.set_main_option('script_location', 'alembic')\n"
+        "command.upgrade(config, '002')",
+        url,
+    )
+    assert result.returncode == 0, result.stderr
+    conn = sqlite3.connect(f"{tmp_path}/aivaro.db")
+    conn.execute("DROP TABLE alembic_version")
+    conn.execute("INSERT INTO users (id, email, hashed_password) VALUES ('u1', 'a@example.com', 'x')")
+    conn.commit()
+    conn.close()
+
+    result = _run("app.migrate", url, module=True)
+    assert result.returncode == 0, result.stderr
+
+    conn = sqlite3.connect(f"{tmp_path}/aivaro.db")
+    version = conn.execute("SELECT version_num FROM alembic_version").fetchone()[0]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    conn.close()
+
+    heads = _run(
+        "from alembic.config import Config\n"
+        "from alembic.script import ScriptDirectory\n"
+        "config = Config()\n"
+        "config.set_main_option('script_location', 'alembic')\n"
+        "print(ScriptDirectory.from_config(config).get_current_head())",
+        url,
+    )
+    assert version == heads.stdout.strip()
+    assert {"idempotency_keys", "execution_archives", "daily_metrics"} <= tables
+    assert users == 1
@@ -0,0 +1,81 @@
+"""
+Tests for the webhook trigger coalescer.
+
+Covers:
+1. A batch whose store fails stays buffered and goes out on the next flush
+2. A batch that keeps failing is dropped after the configured attempts
+"""
+import asyncio
+
+import pytest
+
+from app.services import trigger_coalescer as coalescer_module
+from app.services.trigger_coalescer import TriggerCoalescer
+
+
+class FlakySession:
+    """Stands in for AsyncSessionLocal(): commit fails while failures remain."""
+
+    failures = 0
+    stored = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add(self, execution):
+        self.pending = execution
+
+    async def commit(self):
+        if FlakySession.failures:
+            FlakySession.failures -= 1
+            raise RuntimeError("database is locked")
+        FlakySession.stored.append(self.pending)
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    FlakySession.failures = 0
+    FlakySession.stored = []
+    runs = []
+    monkeypatch.setattr(coalescer_module, "AsyncSessionLocal", FlakySession)
+    monkeypatch.setattr(coalescer_module, "dispatch_execution", lambda execution_id, data: runs.append(data))
+    monkeypatch.setattr(coalescer_module.settings, "webhook_batch_flush_attempts", 3)
+    return runs
+
+
+def test_failed_store_keeps_the_events(dispatched):
+    FlakySession.failures = 1
+
+    async def scenario():
+        coalescer = TriggerCoalescer()
+        await coalescer.add("wf-1", {"n": 1}, window_seconds=60, max_events=100)
+        await coalescer.add("wf-1", {"n": 2}, window_seconds=60, max_events=100)
+        assert await coalescer.flush("wf-1", "window") is None
+        assert coalescer.pending_count("wf-1") == 2
+
+        # Events acked while the store was failing join the retried batch
+        await coalescer.add("wf-1", {"n": 3}, window_seconds=60, max_events=100)
+        assert await coalescer.flush("wf-1", "window") is not None
+        assert coalescer.pending_count("wf-1") == 0
+
+    asyncio.run(scenario())
+    assert len(dispatched) == 1
+    assert dispatched[0]["rows"] == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert len(FlakySession.stored) == 1
+
+
+def test_batch_is_dropped_after_the_last_attempt(dispatched):
+    FlakySession.failures = 5
+
+    async def scenario():
+        coalescer = TriggerCoalescer()
+        await coalescer.add("wf-1", {"n": 1}, window_seconds=60, max_events=100)
+        await coalescer.flush_all()
+        assert coalescer.pending_count("wf-1") == 0
+
+    asyncio.run(scenario())
+    assert FlakySession.failures == 2
+    assert dispatched == []
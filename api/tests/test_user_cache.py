@@ -0,0 +1,90 @@
+"""
+Tests for the authenticated user cache behind get_current_user.
+
+Covers:
+1. Repeat requests with one token are served without loading the user again
+2. A new token (different iat) and invalidate_user() both force a reload
+3. Credential columns are never cached
+4. Expired entries are swept instead of piling up per login
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.models import User
+from app.routers.auth import get_current_user
+from app.services.auth_service import ALGORITHM, create_access_token, settings
+from app.services.user_cache import MemoryUserCache, clear_user_cache, invalidate_user
+
+
+class CountingSession:
+    """Stands in for the AsyncSession: returns a fresh copy of one user and counts loads."""
+
+    def __init__(self):
+        self.loads = 0
+
+    async def get(self, model, user_id):
+        self.loads += 1
+        return User(id=user_id, email="a@example.com", hashed_password="secret", plan="trial", total_runs_used=self.loads)
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    clear_user_cache()
+    yield
+    clear_user_cache()
+
+
+def _resolve(db, token):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(get_current_user(credentials, db))
+
+
+def test_repeat_requests_skip_the_database():
+    db = CountingSession()
+    token = create_access_token({"sub": "u1"})
+
+    first = _resolve(db, token)
+    second = _resolve(db, token)
+
+    assert db.loads == 1
+    assert second is not first
+    assert (second.id, second.email, second.total_runs_used) == ("u1", "a@example.com", 1)
+    assert "hashed_password" not in inspect(second).dict
+
+
+def _token(iat):
+    expires = datetime.utcnow() + timedelta(minutes=5)
+    return jwt.encode({"sub": "u1", "iat": iat, "exp": expires}, settings.secret_key, algorithm=ALGORITHM)
+
+
+def test_new_token_and_invalidation_reload():
+    db = CountingSession()
+    _resolve(db, _token(1000))
+    _resolve(db, _token(1000))
+    assert db.loads == 1
+
+    # A token issued later (new login) carries a different iat
+    assert _resolve(db, _token(2000)).total_runs_used == 2
+
+    invalidate_user("u1")
+    assert _resolve(db, _token(1000)).total_runs_used == 3
+    assert _resolve(db, _token(2000)).total_runs_used == 4
+    assert db.loads == 4
+
+
+def test_expired_entries_are_swept(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.user_cache.time.monotonic", lambda: clock[0])
+    cache = MemoryUserCache(ttl_seconds=30)
+    for iat in range(5):
+        cache.set("u1", iat, {"id": "u1"})
+    cache.set("u2", 0, {"id": "u2"})
+
+    clock[0] += 31
+    cache.set("u3", 0, {"id": "u3"})
+    assert list(cache._entries) == ["u3"]
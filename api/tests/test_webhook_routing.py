@@ -0,0 +1,55 @@
+"""
+Tests for the webhook routing cache.
+
+Covers:
+1. Editing a workflow's trigger through the chat tool is seen by the next webhook
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.models import User, Workflow
+from app.services import agentic_chat
+from app.services.webhook_routing import clear_webhook_routes, get_webhook_route
+
+
+class SyncSession:
+    """Stands in for the AsyncSession the webhook endpoints use."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def get(self, model, key):
+        return self.db.get(model, key)
+
+
+@pytest.fixture(autouse=True)
+def _empty_routes():
+    clear_webhook_routes()
+    yield
+    clear_webhook_routes()
+
+
+def test_chat_edit_reaches_the_next_webhook(db, monkeypatch):
+    user = User(id="u1", email="a@example.com", hashed_password="x", plan="pro")
+    db.add(user)
+    db.add(Workflow(
+        id="wf-1", user_id="u1", name="Leads", is_active=True,
+        nodes=[{"id": "t", "type": "start_webhook", "parameters": {}}], edges=[],
+    ))
+    db.commit()
+    route = asyncio.run(get_webhook_route(SyncSession(db), "wf-1"))
+    assert route.batch_window_seconds == 0
+
+    monkeypatch.setattr(agentic_chat, "generate_workflow_from_prompt", lambda *args, **kwargs: {
+        "nodes": [{"id": "t", "type": "start_webhook", "parameters": {"batch_window_seconds": 5}}],
+        "edges": [],
+    })
+    result = json.loads(agentic_chat._tool_modify_workflow(
+        {"workflow_name": "leads", "description": "batch incoming leads"}, user, db,
+    ))
+    assert result["success"]
+
+    route = asyncio.run(get_webhook_route(SyncSession(db), "wf-1"))
+    assert route.batch_window_seconds == 5
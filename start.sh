@@ -44,7 +44,7 @@ pip install -r requirements.txt -q
 
 # Run migrations
 echo "  Running database migrations..."
-alembic upgrade head
+python -m app.migrate
 
 # Seed templates
 echo "  Seeding templates..."
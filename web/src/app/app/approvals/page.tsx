@@ -112,7 +112,9 @@ function ActionPreview({ data }: { data: Record<string, any> }) {
 
 export default function ApprovalsPage() {
   const [approvals, setApprovals] = useState<Approval[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [filter, setFilter] = useState<'pending' | 'approved' | 'rejected' | 'all'>('pending');
 
   useEffect(() => {
@@ -121,8 +123,9 @@ export default function ApprovalsPage() {
 
   const loadApprovals = async () => {
     try {
-      const data = await api.getApprovals(filter === 'all' ? undefined : filter);
-      setApprovals(data);
+      const page = await api.getApprovals(filter === 'all' ? undefined : filter);
+      setApprovals(page.items);
+      setNextCursor(page.next_cursor || null);
     } catch (err) {
       console.error('Failed to load approvals:', err);
     } finally {
@@ -130,6 +133,20 @@ export default function ApprovalsPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await api.getApprovals(filter === 'all' ? undefined : filter, nextCursor);
+      setApprovals((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor || null);
+    } catch (err) {
+      console.error('Failed to load more approvals:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleApprove = async (id: string) => {
     try {
       await api.approveAction(id);
@@ -296,6 +313,17 @@ export default function ApprovalsPage() {
               </div>
             );
           })}
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-4 py-2 text-sm font-medium text-gray-600 bg-white border border-gray-200 rounded-lg hover:bg-gray-50 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
 
@@ -20,12 +20,12 @@ export default function ExecutionDetailPage() {
 
   const loadApprovals = useCallback(async () => {
     try {
-      const data = await api.getApprovals('pending');
-      setApprovals(data);
+      const page = await api.getApprovals('pending', undefined, params.id as string);
+      setApprovals(page.items);
     } catch (err) {
       console.error('Failed to load approvals:', err);
     }
-  }, []);
+  }, [params.id]);
 
   const handleApproval = async (approvalId: string, action: 'approve' | 'reject') => {
     setActioningApproval(prev => new Set(prev).add(approvalId));
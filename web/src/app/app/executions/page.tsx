@@ -5,18 +5,21 @@ import Link from 'next/link';
 import { BarChart3, RefreshCw } from 'lucide-react';
 import { api } from '@/lib/api';
 import { formatDate } from '@/lib/utils';
-import type { Execution } from '@/types';
+import type { ExecutionSummary } from '@/types';
 
 export default function ExecutionsPage() {
-  const [executions, setExecutions] = useState<Execution[]>([]);
+  const [executions, setExecutions] = useState<ExecutionSummary[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const loadExecutions = useCallback(async (showRefresh = false) => {
     if (showRefresh) setRefreshing(true);
     try {
-      const data = await api.getExecutions();
-      setExecutions(data);
+      const page = await api.getExecutions();
+      setExecutions(page.items);
+      setNextCursor(page.next_cursor || null);
     } catch (err) {
       console.error('Failed to load executions:', err);
     } finally {
@@ -25,6 +28,20 @@ export default function ExecutionsPage() {
     }
   }, []);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await api.getExecutions(undefined, nextCursor);
+      setExecutions((prev) => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor || null);
+    } catch (err) {
+      console.error('Failed to load more executions:', err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     loadExecutions();
   }, [loadExecutions]);
@@ -115,7 +132,7 @@ export default function ExecutionsPage() {
                   <span className="text-2xl">{getStatusIcon(execution.status)}</span>
                   <div>
                     <div className="font-medium">
-                      {(execution as any).workflow_name || (execution as any).workflow?.name || 'Workflow'}
+                      {execution.workflow_name || 'Workflow'}
                     </div>
                     <div className="text-sm text-gray-500">
                       Started {formatDate(execution.started_at)}
@@ -136,6 +153,17 @@ export default function ExecutionsPage() {
               </div>
             </Link>
           ))}
+          {nextCursor && (
+            <div className="text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-4 py-2 text-sm font-medium text-gray-600 bg-white border border-gray-200 rounded-lg hover:bg-gray-50 disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -12,7 +12,7 @@ import ConfirmDialog from '@/components/ui/ConfirmDialog';
 import { api } from '@/lib/api';
 import { useAuthStore } from '@/stores/authStore';
 import { formatDate } from '@/lib/utils';
-import type { Workflow, Approval } from '@/types';
+import type { Workflow } from '@/types';
 
 // --- Types ---
 
@@ -379,7 +379,7 @@ export default function DashboardPage() {
 
   // Right sidebar
   const [workflows, setWorkflows] = useState<Workflow[]>([]);
-  const [approvals, setApprovals] = useState<Approval[]>([]);
+  const [pendingApprovals, setPendingApprovals] = useState(0);
   const [sidebarLoading, setSidebarLoading] = useState(true);
   const [deleteConvoTarget, setDeleteConvoTarget] = useState<string | null>(null);
   const [connections, setConnections] = useState<any[]>([]);
@@ -458,9 +458,9 @@ export default function DashboardPage() {
 
   const loadSidebarData = async () => {
     try {
-      const [wf, ap] = await Promise.all([api.getWorkflows(), api.getApprovals('pending')]);
+      const [wf, ap] = await Promise.all([api.getWorkflows(), api.getApprovalCount('pending')]);
       setWorkflows(wf);
-      setApprovals(ap);
+      setPendingApprovals(ap.count);
       // Load connections and knowledge for getting started
       try {
         const conns = await api.getConnections();
@@ -819,14 +819,14 @@ export default function DashboardPage() {
       {/* Right Sidebar */}
       <div className="w-72 flex-shrink-0 border-l border-gray-200 bg-white overflow-y-auto hidden xl:block">
         <div className="p-5">
-          {approvals.length > 0 && (
+          {pendingApprovals > 0 && (
             <div className="mb-6">
               <Link href="/app/approvals">
                 <div className="bg-amber-50 border border-amber-200 rounded-xl p-4 hover:border-amber-300 transition">
                   <div className="flex items-center gap-2 mb-1">
                     <AlertCircle className="w-4 h-4 text-amber-600" />
                     <span className="text-sm font-semibold text-amber-900">
-                      {approvals.length} pending approval{approvals.length !== 1 ? 's' : ''}
+                      {pendingApprovals} pending approval{pendingApprovals !== 1 ? 's' : ''}
                     </span>
                   </div>
                   <p className="text-xs text-amber-700">Review before they can proceed</p>
@@ -18,6 +18,7 @@ const nodeConfigs: Record<string, { fields: { key: string; label: string; type:
     fields: [
       { key: 'from', label: 'From Email', type: 'text', placeholder: 'sender@example.com' },
       { key: 'subject', label: 'Subject Contains (optional)', type: 'text', placeholder: 'Leave empty for all emails' },
+      { key: 'include_body', label: 'Read Email Body', type: 'select', options: ['true', 'false'], helpText: 'Set to false if the workflow only needs the sender, subject and snippet (faster)' },
     ],
   },
   start_schedule: {
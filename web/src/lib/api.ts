@@ -1,3 +1,5 @@
+import type { ApprovalPage, ExecutionPage } from '@/types';
+
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
 class ApiClient {
@@ -106,9 +108,12 @@ class ApiClient {
   }
 
   // Executions
-  async getExecutions(workflowId?: string) {
-    const params = workflowId ? `?workflow_id=${workflowId}` : '';
-    return this.request<any[]>(`/api/executions/${params}`);
+  async getExecutions(workflowId?: string, cursor?: string) {
+    const query = new URLSearchParams();
+    if (workflowId) query.set('workflow_id', workflowId);
+    if (cursor) query.set('cursor', cursor);
+    const params = query.toString() ? `?${query}` : '';
+    return this.request<ExecutionPage>(`/api/executions/${params}`);
   }
 
   async getExecution(id: string) {
@@ -127,9 +132,18 @@ class ApiClient {
   }
 
   // Approvals
-  async getApprovals(status?: string) {
+  async getApprovals(status?: string, cursor?: string, executionId?: string) {
+    const query = new URLSearchParams();
+    if (status) query.set('status_filter', status);
+    if (cursor) query.set('cursor', cursor);
+    if (executionId) query.set('execution_id', executionId);
+    const params = query.toString() ? `?${query}` : '';
+    return this.request<ApprovalPage>(`/api/approvals/${params}`);
+  }
+
+  async getApprovalCount(status?: string) {
     const params = status ? `?status_filter=${status}` : '';
-    return this.request<any[]>(`/api/approvals/${params}`);
+    return this.request<{ count: number }>(`/api/approvals/count${params}`);
   }
 
   async getApproval(id: string) {
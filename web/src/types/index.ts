@@ -67,6 +67,23 @@ export interface Execution {
   node_executions?: ExecutionNode[];
 }
 
+export interface ExecutionSummary {
+  id: string;
+  workflow_id: string;
+  workflow_name?: string;
+  status: Execution['status'];
+  error?: string;
+  is_test: boolean;
+  started_at: string;
+  completed_at?: string;
+  current_node_id?: string;
+}
+
+export interface ExecutionPage {
+  items: ExecutionSummary[];
+  next_cursor?: string | null;
+}
+
 export interface Approval {
   id: string;
   execution_id: string;
@@ -84,6 +101,11 @@ export interface Approval {
   created_at: string;
 }
 
+export interface ApprovalPage {
+  items: Approval[];
+  next_cursor?: string | null;
+}
+
 export interface Connection {
   id: string;
   user_id: string;